@@ -11,5 +11,5 @@ from desktop_test.utils.init_project import init_project_structure
 
 __all__ = ['init_project_structure']
 
-# 初始化项目结构
-init_project_structure() 
\ No newline at end of file
+# 导入时不做任何文件操作，目录结构由 pytest_configure 或
+# `python -m desktop_test.utils.init_project` 显式初始化
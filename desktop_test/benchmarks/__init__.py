@@ -0,0 +1,6 @@
+"""
+Benchmark modules for desktop testing
+
+在合成的屏幕图像上测量各定位路径的延迟和吞吐量，无需显示器即可运行：
+    python -m desktop_test.benchmarks
+"""
@@ -0,0 +1,8 @@
+"""
+python -m desktop_test.benchmarks
+"""
+import sys
+
+from desktop_test.benchmarks.locate_benchmark import main
+
+sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+端到端流程基准测试
+
+在虚拟桌面（desktop_test.simulator）上运行页面对象和 TestFixtures 的流程，
+测量整条流程的耗时，不需要真实应用和显示器：
+    python -m desktop_test.benchmarks.flow_benchmark --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from desktop_test.utils.config import BENCHMARKS_DIR
+from desktop_test.utils.baseline import git_revision
+from desktop_test.utils.metrics import Histogram
+from desktop_test.simulator import VirtualDesktop, default_application_spec
+
+
+def _main_page():
+    from desktop_test.pages.main_page import MainPage
+    return MainPage()
+
+
+def _fixtures():
+    from desktop_test.test_cases.test_fixtures import TestFixtures
+    return TestFixtures
+
+
+# 流程名称 -> (起始状态, 流程函数, 期望的结束状态)
+FLOWS: Dict[str, Tuple[str, Callable[[], Any], str]] = {
+    "setup_application": ("desktop", lambda: _fixtures().setup_application(), "main"),
+    "import_test_files": ("main", lambda: _fixtures().import_test_files([], "D:/test_files"), "main"),
+    "click_menu_file": ("main", lambda: _main_page().click_menu("file"), "file_menu"),
+    "open_feature_ocr": ("main", lambda: _main_page().open_feature("ocr"), "ocr"),
+    "open_feature_scan": ("main", lambda: _main_page().open_feature("scan"), "scan"),
+    "navigate_ocr_to_scan": ("ocr", lambda: _fixtures().navigate_to("scan"), "scan"),
+    "navigate_menu_to_import": ("file_menu", lambda: _fixtures().navigate_to("import_dialog"), "import_dialog"),
+}
+
+
+def run_flows(
+    flows: List[str],
+    repeat: int = 3,
+    startup_delay: float = 0.5,
+    transition_delay: float = 0.1
+) -> Dict[str, Any]:
+    """在虚拟桌面上运行流程
+
+    Args:
+        flows: 流程名称列表
+        repeat: 每个流程的运行次数
+        startup_delay: 模拟应用的启动时间（秒）
+        transition_delay: 模拟应用的界面切换时间（秒）
+
+    Returns:
+        Dict[str, Any]: 基准测试结果
+    """
+    desktop = VirtualDesktop(default_application_spec(startup_delay, transition_delay))
+    results = []
+    with desktop.installed():
+        for name in flows:
+            start_state, flow, expected_state = FLOWS[name]
+            histogram = Histogram()
+            passed = 0
+            errors: List[str] = []
+            for _ in range(repeat):
+                desktop.reset(start_state)
+                start = time.perf_counter()
+                try:
+                    result = flow()
+                except Exception as e:
+                    result = False
+                    errors.append(f"{type(e).__name__}: {e}")
+                histogram.record(time.perf_counter() - start)
+                # 等待延迟的界面切换生效后再检查结束状态
+                time.sleep(transition_delay)
+                passed += bool(result) and desktop.state == expected_state
+            summary = histogram.summary()
+            results.append({
+                "flow": name,
+                "runs": repeat,
+                "passed": passed,
+                "mean_ms": summary["mean"] * 1000,
+                "p50_ms": summary["p50"] * 1000,
+                "max_ms": summary["max"] * 1000,
+                "errors": sorted(set(errors))
+            })
+            print(f"{name:<22} {passed:>3}/{repeat:<3} {summary['mean'] * 1000:>9.1f} "
+                  f"{summary['p50'] * 1000:>9.1f} {summary['max'] * 1000:>9.1f}  {'; '.join(sorted(set(errors)))}",
+                  flush=True)
+    return {
+        "benchmark": "flow",
+        "revision": git_revision(),
+        "generated_at": datetime.now().isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "parameters": {"repeat": repeat, "startup_delay": startup_delay, "transition_delay": transition_delay},
+        "results": results
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="虚拟桌面上的端到端流程基准测试")
+    parser.add_argument("--flows", nargs="+", choices=list(FLOWS), default=list(FLOWS))
+    parser.add_argument("--repeat", type=int, default=3, help="每个流程的运行次数")
+    parser.add_argument("--startup-delay", type=float, default=0.5, help="模拟应用的启动时间（秒）")
+    parser.add_argument("--transition-delay", type=float, default=0.1, help="模拟应用的界面切换时间（秒）")
+    parser.add_argument("--output", default=BENCHMARKS_DIR, help="结果输出目录")
+    args = parser.parse_args(argv)
+
+    print(f"{'flow':<22} {'passed':>7} {'mean_ms':>9} {'p50_ms':>9} {'max_ms':>9}")
+    results = run_flows(args.flows, args.repeat, args.startup_delay, args.transition_delay)
+    os.makedirs(args.output, exist_ok=True)
+    filepath = os.path.join(
+        args.output, f"flow_{results['revision'] or 'unknown'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {filepath}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
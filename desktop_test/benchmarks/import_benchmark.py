@@ -0,0 +1,187 @@
+"""
+导入耗时基准测试
+
+在新的解释器中用 `python -X importtime` 导入框架模块，检查导入耗时是否超出预算，
+导入时是否加载了应当延迟导入的重型依赖（cv2、pyautogui 等），以及导入是否有副作用
+（在 desktop_test 目录下创建、修改或删除文件，打开文件，启动线程）：
+    python -m desktop_test.benchmarks.import_benchmark --repeat 5
+超出预算、加载了重型依赖或有副作用时退出码为 1，可以直接放在 CI 中作为门禁。
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from desktop_test.utils.config import BENCHMARKS_DIR, IMPORT_TIME_BUDGETS, IMPORT_HEAVY_MODULES
+from desktop_test.utils.baseline import git_revision, _median
+
+# 项目根目录（desktop_test 的上一级），子进程从这里导入
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_PACKAGE_DIR = os.path.join(_PROJECT_ROOT, "desktop_test")
+
+# 子进程中导入模块并输出副作用：加载的重型依赖、新启动的线程、打开的文件、变化的文件
+_PROBE = '''
+import os, sys, json, threading
+def files():
+    found = {}
+    for root, dirs, names in os.walk(%(package)r):
+        dirs[:] = [d for d in dirs if d != "__pycache__"]
+        for name in dirs + names:
+            path = os.path.join(root, name)
+            try:
+                found[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+    return found
+def open_files():
+    if not os.path.isdir("/proc/self/fd"):
+        return set()
+    paths = set()
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            path = os.readlink(os.path.join("/proc/self/fd", fd))
+        except OSError:
+            continue
+        if os.path.isfile(path):
+            paths.add(path)
+    return paths
+before, opened, threads = files(), open_files(), set(threading.enumerate())
+import %(module)s
+after = files()
+print(json.dumps({
+    "heavy": sorted(m for m in %(heavy)r if m in sys.modules),
+    "threads": sorted(t.name for t in threading.enumerate() if t not in threads),
+    "open_files": sorted(open_files() - opened),
+    "files": sorted(p for p in set(before) | set(after) if before.get(p) != after.get(p)),
+}))
+'''
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """解析 -X importtime 输出
+
+    Returns:
+        List[Tuple[str, int, int]]: [(模块名, 自身耗时 us, 累计耗时 us)]
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """在新的解释器中导入模块一次
+
+    Returns:
+        Dict[str, Any]: 累计耗时（毫秒）、自身耗时最高的模块、加载的重型依赖、导入的副作用
+    """
+    code = _PROBE % {"package": _PACKAGE_DIR, "module": module, "heavy": IMPORT_HEAVY_MODULES}
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=_PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败: {proc.stderr.strip().splitlines()[-1:]}")
+    rows = _parse_importtime(proc.stderr)
+    cumulative = next((total for name, _, total in rows if name == module), 0)
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "total_ms": cumulative / 1000,
+        "top_self": [(name, own / 1000) for name, own, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:5]],
+        "heavy": probe["heavy"],
+        "side_effects": [f"thread:{name}" for name in probe["threads"]]
+                        + [f"open:{path}" for path in probe["open_files"]]
+                        + [f"file:{path}" for path in probe["files"]]
+    }
+
+
+def run_benchmark(budgets: Dict[str, float], repeat: int = 5) -> Dict[str, Any]:
+    """测量各模块的导入耗时并与预算比较
+
+    Args:
+        budgets: 模块 -> 预算（毫秒）
+        repeat: 每个模块的测量次数（取中位数）
+
+    Returns:
+        Dict[str, Any]: 基准测试结果
+    """
+    results = []
+    for module, budget in budgets.items():
+        runs = [measure_import(module) for _ in range(repeat)]
+        median = _median([run["total_ms"] for run in runs])
+        heavy = sorted({name for run in runs for name in run["heavy"]})
+        side_effects = sorted({item for run in runs for item in run["side_effects"]})
+        # 用最接近中位数的一次运行展示耗时最高的模块
+        typical = min(runs, key=lambda run: abs(run["total_ms"] - median))
+        results.append({
+            "module": module,
+            "median_ms": median,
+            "min_ms": min(run["total_ms"] for run in runs),
+            "budget_ms": budget,
+            "heavy_modules": heavy,
+            "side_effects": side_effects,
+            "top_self": typical["top_self"],
+            "passed": median <= budget and not heavy and not side_effects
+        })
+        row = results[-1]
+        print(f"{module:<36} {row['median_ms']:>9.1f} {row['min_ms']:>9.1f} {budget:>9.0f}  "
+              f"{'OK' if row['passed'] else 'FAIL'}  {', '.join(heavy + side_effects)}", flush=True)
+    return {
+        "benchmark": "import",
+        "revision": git_revision(),
+        "generated_at": datetime.now().isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "parameters": {"repeat": repeat},
+        "results": results
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="框架模块的导入耗时基准测试")
+    parser.add_argument("--modules", nargs="+", default=list(IMPORT_TIME_BUDGETS), help="要测量的模块")
+    parser.add_argument("--budget", type=float, default=None, help="统一的导入耗时预算（毫秒），覆盖配置")
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块的测量次数")
+    parser.add_argument("--output", default=BENCHMARKS_DIR, help="结果输出目录")
+    parser.add_argument("--verbose", action="store_true", help="打印自身耗时最高的模块")
+    args = parser.parse_args(argv)
+
+    budgets = {
+        module: args.budget if args.budget is not None else IMPORT_TIME_BUDGETS.get(module, float("inf"))
+        for module in args.modules
+    }
+    print(f"{'module':<36} {'median_ms':>9} {'min_ms':>9} {'budget':>9}  status")
+    results = run_benchmark(budgets, args.repeat)
+    if args.verbose:
+        for row in results["results"]:
+            print(f"\n{row['module']} 自身耗时最高的模块:")
+            for name, own in row["top_self"]:
+                print(f"  {name:<40} {own:>8.1f} ms")
+
+    os.makedirs(args.output, exist_ok=True)
+    filepath = os.path.join(
+        args.output, f"import_{results['revision'] or 'unknown'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {filepath}")
+
+    failed = [row["module"] for row in results["results"] if not row["passed"]]
+    if failed:
+        print(f"超出导入预算、加载了重型依赖或有副作用: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
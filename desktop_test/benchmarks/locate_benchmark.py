@@ -0,0 +1,268 @@
+"""
+模板定位基准测试
+
+在合成屏幕上测量各定位路径的延迟、吞吐量和命中率：
+    - find_element_on_screen（冷启动：清空上次位置缓存）
+    - find_element_on_screen（热启动：命中上次位置附近的小区域）
+    - element_exists（单次匹配，不等待）
+    - find_elements_on_screen（批量，每次轮询只采集一帧）
+    - find_element_pyramid（两级金字塔匹配）
+
+延迟不包含轮询间隔的等待（idle_sleep），未命中的样本只计入匹配本身的耗时。
+屏幕来自合成帧（ScreenCapture.set_source），不需要显示器，运行中加载了 pyautogui 时退出码为 1。
+结果写入 JSON 文件（带 git 版本），可用 --compare 与其他提交的结果对比：
+    python -m desktop_test.benchmarks --resolutions 1080p 4k --repeat 3
+    python -m desktop_test.benchmarks --compare reports/benchmarks/locate_abc1234_20250101_120000.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from desktop_test.utils.config import BENCHMARKS_DIR
+from desktop_test.utils.baseline import git_revision
+from desktop_test.utils.exceptions import ElementNotFoundError
+from desktop_test.utils.idle import IdleClock
+from desktop_test.utils.metrics import Histogram, template_label
+from desktop_test.utils.screen_capture import ScreenCapture
+from desktop_test.utils.test_helper import TestHelper
+from desktop_test.benchmarks.synthetic import SCREEN_SIZES, SCENARIOS, Placement, build_screen, load_templates
+
+# 定位结果与已知中心点的最大允许偏差（像素）
+POSITION_TOLERANCE = 3
+
+METHODS = ("locate_cold", "locate_warm", "element_exists", "locate_batch", "locate_pyramid")
+
+
+def _hit(location: Optional[Tuple[int, int]], placement: Placement) -> bool:
+    """定位结果是否落在已知位置"""
+    if location is None:
+        return False
+    x, y = placement.center
+    return abs(location[0] - x) <= POSITION_TOLERANCE and abs(location[1] - y) <= POSITION_TOLERANCE
+
+
+def _busy_since(start: float, idle_start: float) -> float:
+    """start 之后的耗时，扣除期间轮询间隔的等待"""
+    return time.perf_counter() - start - (IdleClock.total() - idle_start)
+
+
+def _try_locate(func: Callable[[], Optional[Tuple[int, int]]]) -> Optional[Tuple[int, int]]:
+    """执行定位，未找到时返回 None"""
+    try:
+        return func()
+    except ElementNotFoundError:
+        return None
+
+
+def _bench_single(
+    method: str, placements: List[Placement], confidence: float, repeat: int
+) -> Tuple[Histogram, int, int]:
+    """逐个模板测量单模板定位路径
+
+    Returns:
+        Tuple[Histogram, int, int]: 延迟直方图、命中数、样本数
+    """
+    histogram = Histogram()
+    hits = 0
+    for _ in range(repeat):
+        for placement in placements:
+            path = placement.image_path
+            if method == "locate_cold":
+                TestHelper._last_found_positions.pop(path, None)
+            elif method == "locate_warm":
+                TestHelper._last_found_positions[path] = placement.center
+            idle_start = IdleClock.total()
+            start = time.perf_counter()
+            if method == "element_exists":
+                found = TestHelper.element_exists(path, confidence)
+                histogram.record(_busy_since(start, idle_start))
+                # 位置校验不计入耗时
+                hits += found and _hit(TestHelper._locate(path, confidence), placement)
+                continue
+            if method == "locate_pyramid":
+                location = _try_locate(lambda: TestHelper.find_element_pyramid(path, confidence, timeout=0.01))
+            else:
+                location = _try_locate(lambda: TestHelper.find_element_on_screen(path, confidence, timeout=0.01))
+            histogram.record(_busy_since(start, idle_start))
+            hits += _hit(location, placement)
+    return histogram, hits, repeat * len(placements)
+
+
+def _bench_batch(placements: List[Placement], confidence: float, repeat: int) -> Tuple[Histogram, int, int]:
+    """测量批量定位（每次调用查找全部模板，延迟按模板数量均摊）"""
+    histogram = Histogram()
+    hits = 0
+    paths = [placement.image_path for placement in placements]
+    for _ in range(repeat):
+        idle_start = IdleClock.total()
+        start = time.perf_counter()
+        locations = TestHelper.find_elements_on_screen(paths, confidence, timeout=0.01)
+        elapsed = _busy_since(start, idle_start)
+        for placement in placements:
+            histogram.record(elapsed / len(placements))
+            hits += _hit(locations.get(placement.image_path), placement)
+    return histogram, hits, repeat * len(placements)
+
+
+def run_benchmark(
+    resolutions: List[str],
+    scenarios: List[str],
+    methods: List[str] = METHODS,
+    repeat: int = 3,
+    confidence: float = 0.8,
+    template_limit: Optional[int] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """运行基准测试
+
+    Args:
+        resolutions: 屏幕尺寸名称列表
+        scenarios: 场景名称列表
+        methods: 定位路径列表
+        repeat: 每个模板重复次数
+        confidence: 匹配置信度
+        template_limit: 最多使用的模板数量
+        seed: 合成屏幕的随机种子
+
+    Returns:
+        Dict[str, Any]: 基准测试结果
+    """
+    templates = load_templates(limit=template_limit)
+    results = []
+    previous_source = ScreenCapture.get_source()
+    try:
+        for resolution in resolutions:
+            for scenario in scenarios:
+                screen, placements = build_screen(resolution, templates, scenario, seed)
+                ScreenCapture.set_source(screen)
+                for method in methods:
+                    if method == "locate_batch":
+                        histogram, hits, samples = _bench_batch(placements, confidence, repeat)
+                    else:
+                        histogram, hits, samples = _bench_single(method, placements, confidence, repeat)
+                    summary = histogram.summary()
+                    results.append({
+                        "resolution": resolution,
+                        "scenario": scenario,
+                        "method": method,
+                        "samples": samples,
+                        "hits": hits,
+                        "hit_rate": hits / samples if samples else 0.0,
+                        "mean_ms": summary["mean"] * 1000,
+                        "p50_ms": summary["p50"] * 1000,
+                        "p95_ms": summary["p95"] * 1000,
+                        "max_ms": summary["max"] * 1000,
+                        "throughput_per_s": samples / summary["total"] if summary["total"] else 0.0
+                    })
+                    print(_format_row(results[-1]), flush=True)
+    finally:
+        ScreenCapture.set_source(previous_source)
+    return {
+        "benchmark": "locate",
+        "revision": git_revision(),
+        "generated_at": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__
+        },
+        "parameters": {
+            "repeat": repeat,
+            "confidence": confidence,
+            "seed": seed,
+            "templates": [template_label(path) for path in templates]
+        },
+        "results": results
+    }
+
+
+def _format_row(row: Dict[str, Any]) -> str:
+    """格式化一行结果"""
+    return (f"{row['resolution']:<8} {row['scenario']:<12} {row['method']:<15} {row['samples']:>6} "
+            f"{row['hit_rate']:>7.1%} {row['mean_ms']:>9.2f} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+            f"{row['throughput_per_s']:>9.1f}")
+
+
+def save_results(results: Dict[str, Any], directory: str = BENCHMARKS_DIR) -> str:
+    """保存结果文件
+
+    Returns:
+        str: 结果文件路径
+    """
+    os.makedirs(directory, exist_ok=True)
+    filepath = os.path.join(
+        directory,
+        f"locate_{results.get('revision') or 'unknown'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return filepath
+
+
+def compare_results(current: Dict[str, Any], previous: Dict[str, Any]) -> List[str]:
+    """对比两次结果的 p50 延迟和命中率
+
+    Returns:
+        List[str]: 文本格式的对比表
+    """
+    key = lambda row: (row["resolution"], row["scenario"], row["method"])
+    old_rows = {key(row): row for row in previous.get("results", [])}
+    lines = [
+        f"对比 {previous.get('revision')} -> {current.get('revision')}",
+        f"{'resolution':<10} {'scenario':<12} {'method':<15} {'old_p50':>9} {'new_p50':>9} {'ratio':>6} {'hit_delta':>9}"
+    ]
+    for row in current.get("results", []):
+        old = old_rows.get(key(row))
+        if old is None:
+            continue
+        ratio = row["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("inf")
+        lines.append(
+            f"{row['resolution']:<10} {row['scenario']:<12} {row['method']:<15} {old['p50_ms']:>9.2f} "
+            f"{row['p50_ms']:>9.2f} {ratio:>6.2f} {row['hit_rate'] - old['hit_rate']:>+9.1%}"
+        )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="合成屏幕上的模板定位基准测试")
+    parser.add_argument("--resolutions", nargs="+", choices=list(SCREEN_SIZES), default=list(SCREEN_SIZES))
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--repeat", type=int, default=3, help="每个模板重复次数")
+    parser.add_argument("--confidence", type=float, default=0.8, help="匹配置信度")
+    parser.add_argument("--templates", type=int, default=None, help="最多使用的模板数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", default=BENCHMARKS_DIR, help="结果输出目录")
+    parser.add_argument("--compare", default=None, help="与之前的结果文件对比")
+    args = parser.parse_args(argv)
+
+    print(f"{'res':<8} {'scenario':<12} {'method':<15} {'n':>6} {'hit':>7} {'mean_ms':>9} "
+          f"{'p50_ms':>9} {'p95_ms':>9} {'per_s':>9}")
+    results = run_benchmark(
+        args.resolutions, args.scenarios, args.methods,
+        repeat=args.repeat, confidence=args.confidence,
+        template_limit=args.templates, seed=args.seed
+    )
+    print(f"结果已保存: {save_results(results, args.output)}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print("\n".join(compare_results(results, previous)))
+    if "pyautogui" in sys.modules:
+        print("基准测试加载了 pyautogui，定位路径绕过了 ScreenCapture")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+OCR 预处理基准测试
+
+比较预处理前后的识别耗时和准确率：
+    - test_data/ocr 中的图片（可选的 expected_texts.json 给出 文件名 -> 期望文本，用于计算准确率；
+      没有期望文本的图片只统计耗时）
+    - 合成样本：用 cv2.putText 渲染已知文本，再做缩小、低对比度、深色主题、倾斜等退化
+      （Hershey 字体只有西文字符，中文准确率需要 test_data 中的真实截图）
+准确率为识别结果与期望文本的字符相似度（0~1）：
+    python -m desktop_test.benchmarks.ocr_benchmark --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import difflib
+import argparse
+import platform
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from desktop_test.utils.config import BENCHMARKS_DIR, TEST_DATA_DIR, OCR_LANG
+from desktop_test.utils.baseline import git_revision
+from desktop_test.utils.exceptions import OCRError
+from desktop_test.utils.metrics import Histogram
+from desktop_test.utils.ocr_engine import OCREngine
+
+OCR_DATA_DIR = os.path.join(TEST_DATA_DIR, 'ocr')
+EXPECTED_TEXTS_FILE = "expected_texts.json"
+
+SYNTHETIC_TEXTS = (
+    "Start recognition",
+    "Output format: PDF",
+    "Language: English",
+    "Accuracy 95%",
+    "Scan completed 12/12",
+)
+
+SYNTHETIC_VARIANTS = ("small", "low_contrast", "dark", "skewed")
+
+
+class Sample(NamedTuple):
+    """一个测试样本"""
+    group: str  # 分组：data 或 synthetic/<退化方式>
+    name: str
+    image: np.ndarray
+    expected: Optional[str]
+
+
+def load_data_samples(directory: str = OCR_DATA_DIR) -> Tuple[List[Sample], List[str]]:
+    """读取 test_data/ocr 中的图片
+
+    Returns:
+        Tuple[List[Sample], List[str]]: (样本, 无法读取的文件)
+    """
+    expected: Dict[str, str] = {}
+    expected_file = os.path.join(directory, EXPECTED_TEXTS_FILE)
+    if os.path.exists(expected_file):
+        with open(expected_file, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+    samples, skipped = [], []
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        if not name.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")):
+            continue
+        image = cv2.imread(os.path.join(directory, name), cv2.IMREAD_COLOR)
+        if image is None:
+            skipped.append(name)
+            continue
+        samples.append(Sample("data", name, image, expected.get(name)))
+    return samples, skipped
+
+
+def render_sample(text: str, variant: str) -> np.ndarray:
+    """渲染一个退化的合成样本"""
+    background, foreground, font_scale = (235, 235, 235), (30, 30, 30), 0.6
+    if variant == "small":
+        font_scale = 0.35
+    elif variant == "low_contrast":
+        background, foreground = (200, 200, 200), (150, 150, 150)
+    elif variant == "dark":
+        background, foreground = (45, 45, 48), (210, 210, 210)
+    (width, height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 1)
+    image = np.full((height + baseline + 24, width + 40, 3), background, dtype=np.uint8)
+    cv2.putText(image, text, (20, height + 12), cv2.FONT_HERSHEY_SIMPLEX, font_scale, foreground, 1, cv2.LINE_AA)
+    if variant == "skewed":
+        rows, columns = image.shape[:2]
+        matrix = cv2.getRotationMatrix2D((columns / 2, rows / 2), 3.0, 1.0)
+        image = cv2.warpAffine(image, matrix, (columns, rows), borderMode=cv2.BORDER_CONSTANT,
+                               borderValue=background)
+    return image
+
+
+def synthetic_samples() -> List[Sample]:
+    """全部合成样本"""
+    return [Sample(f"synthetic/{variant}", text, render_sample(text, variant), text)
+            for variant in SYNTHETIC_VARIANTS for text in SYNTHETIC_TEXTS]
+
+
+def _accuracy(expected: Optional[str], actual: Optional[str]) -> Optional[float]:
+    if expected is None or actual is None:
+        return None
+    return difflib.SequenceMatcher(None, "".join(expected.split()), "".join(actual.split())).ratio()
+
+
+def _mean(values: List[Optional[float]]) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+
+def run_benchmark(samples: List[Sample], repeat: int = 3, lang: str = OCR_LANG) -> Dict[str, Any]:
+    """测量每个样本的预处理耗时，以及预处理前后的识别耗时和准确率"""
+    engine = OCREngine()
+    try:
+        backend = engine.backend.name
+    except OCRError as e:
+        # 没有可用的识别引擎时只测量预处理
+        backend = None
+        print(f"识别引擎不可用，只测量预处理: {e}")
+
+    rows = []
+    for sample in samples:
+        preprocess = Histogram()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            prepared = engine.preprocessor.apply(sample.image)
+            preprocess.record(time.perf_counter() - start)
+        row: Dict[str, Any] = {
+            "group": sample.group,
+            "name": sample.name,
+            "size": list(sample.image.shape[1::-1]),
+            "prepared_size": list(prepared.image.shape[::-1]),
+            "scale": prepared.scale,
+            "angle": prepared.angle,
+            "preprocess_ms": preprocess.summary()["mean"] * 1000,
+        }
+        if backend is not None:
+            for mode, enabled in (("raw", False), ("preprocessed", True)):
+                latency = Histogram()
+                text = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    text = engine.recognize(sample.image, lang, use_cache=False, preprocess=enabled).text
+                    latency.record(time.perf_counter() - start)
+                row[f"{mode}_ms"] = latency.summary()["mean"] * 1000
+                row[f"{mode}_text"] = text
+                row[f"{mode}_accuracy"] = _accuracy(sample.expected, text)
+        rows.append(row)
+
+    groups = []
+    for group in dict.fromkeys(row["group"] for row in rows):
+        members = [row for row in rows if row["group"] == group]
+        summary = {"group": group, "samples": len(members),
+                   "preprocess_ms": _mean([row["preprocess_ms"] for row in members])}
+        for key in ("raw_ms", "preprocessed_ms", "raw_accuracy", "preprocessed_accuracy"):
+            summary[key] = _mean([row.get(key) for row in members])
+        groups.append(summary)
+        print(f"{group:<24} {len(members):>4} {summary['preprocess_ms']:>8.2f} "
+              + " ".join(f"{summary[key]:>9.3f}" if summary[key] is not None else f"{'-':>9}"
+                         for key in ("raw_ms", "preprocessed_ms", "raw_accuracy", "preprocessed_accuracy")),
+              flush=True)
+
+    return {
+        "benchmark": "ocr_preprocess",
+        "revision": git_revision(),
+        "generated_at": datetime.now().isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "opencv": cv2.__version__, "backend": backend},
+        "parameters": {"repeat": repeat, "lang": lang, "preprocessor": engine.preprocessor.signature},
+        "groups": groups,
+        "samples": rows
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="OCR 预处理基准测试")
+    parser.add_argument("--data-dir", default=OCR_DATA_DIR, help="测试图片目录")
+    parser.add_argument("--no-synthetic", action="store_true", help="不使用合成样本")
+    parser.add_argument("--repeat", type=int, default=3, help="每个样本的运行次数")
+    parser.add_argument("--lang", default=OCR_LANG, help="识别语言")
+    parser.add_argument("--output", default=BENCHMARKS_DIR, help="结果输出目录")
+    args = parser.parse_args(argv)
+
+    samples, skipped = load_data_samples(args.data_dir)
+    if skipped:
+        print(f"跳过无法读取的图片 {len(skipped)} 个: {', '.join(skipped)}")
+    if not args.no_synthetic:
+        samples += synthetic_samples()
+    if not samples:
+        print("没有可用的样本")
+        return 1
+
+    print(f"{'group':<24} {'n':>4} {'pre_ms':>8} {'raw_ms':>9} {'pre+ocr':>9} {'raw_acc':>9} {'pre_acc':>9}")
+    results = run_benchmark(samples, args.repeat, args.lang)
+    results["skipped"] = skipped
+    os.makedirs(args.output, exist_ok=True)
+    filepath = os.path.join(
+        args.output, f"ocr_{results['revision'] or 'unknown'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {filepath}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+合成屏幕
+
+生成指定分辨率的桌面图像：渐变背景、窗口色块、文字等干扰内容，再把 test_data
+中的真实模板放在已知位置，可选加入噪声、缩放和近似重复的干扰模板。生成的
+SyntheticScreen 可通过 ScreenCapture.set_source 作为帧来源。
+"""
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from desktop_test.utils.config import TEST_DATA_DIR
+
+# 基准测试使用的屏幕尺寸 (width, height)
+SCREEN_SIZES: Dict[str, Tuple[int, int]] = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+    "dual-4k": (7680, 2160),
+}
+
+# 场景：噪声标准差、模板缩放比例、干扰模板数量
+SCENARIOS: Dict[str, Dict[str, float]] = {
+    "clean": {"noise": 0.0, "scale": 1.0, "distractors": 0},
+    "noisy": {"noise": 6.0, "scale": 1.0, "distractors": 0},
+    "scaled": {"noise": 0.0, "scale": 1.1, "distractors": 0},
+    "distractors": {"noise": 2.0, "scale": 1.0, "distractors": 40},
+}
+
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class Placement(NamedTuple):
+    """模板在合成屏幕上的位置"""
+    image_path: str
+    box: Tuple[int, int, int, int]  # (left, top, width, height)
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        left, top, width, height = self.box
+        return left + width // 2, top + height // 2
+
+
+class SyntheticScreen:
+    """合成屏幕帧来源，提供 ScreenCapture 需要的 grab(region) 和 size()"""
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+
+    def grab(self, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """返回整个屏幕或指定区域（BGR）"""
+        if region is None:
+            return self.image
+        left, top, width, height = region
+        return self.image[max(0, top):top + height, max(0, left):left + width]
+
+    def size(self) -> Tuple[int, int]:
+        """屏幕尺寸 (width, height)"""
+        return self.image.shape[1], self.image.shape[0]
+
+
+def load_templates(
+    directory: str = TEST_DATA_DIR,
+    max_size: Tuple[int, int] = (640, 360),
+    limit: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """加载 test_data 中的模板图片
+
+    Args:
+        directory: 模板目录
+        max_size: 超过该尺寸 (width, height) 的图片（如整页截图）不作为模板
+        limit: 最多加载的数量
+
+    Returns:
+        Dict[str, np.ndarray]: 图片路径 -> BGR 图像
+    """
+    templates = {}
+    for root, _, files in sorted(os.walk(directory)):
+        for name in sorted(files):
+            if not name.lower().endswith(_IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            image = cv2.imread(path)
+            if image is None or image.shape[1] > max_size[0] or image.shape[0] > max_size[1]:
+                continue
+            templates[path] = image
+            if limit and len(templates) >= limit:
+                return templates
+    return templates
+
+
+def _background(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """渐变背景 + 窗口色块 + 文字"""
+    gradient = np.linspace(40, 90, width, dtype=np.float32)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = np.stack([gradient, gradient * 0.8 + 20, gradient * 0.6 + 60], axis=-1).astype(np.uint8)
+    for _ in range(width * height // 200_000):
+        x, y = int(rng.integers(0, width - 200)), int(rng.integers(0, height - 150))
+        w, h = int(rng.integers(200, 900)), int(rng.integers(150, 700))
+        color = tuple(int(c) for c in rng.integers(150, 256, 3))
+        cv2.rectangle(image, (x, y), (x + w, y + h), color, -1)
+        cv2.rectangle(image, (x, y), (x + w, y + 28), tuple(int(c * 0.7) for c in color), -1)
+        for line in range(1, min(12, h // 30)):
+            cv2.putText(image, f"Document {int(rng.integers(1000, 9999))}.docx", (x + 10, y + 28 + line * 26),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.55, (40, 40, 40), 1, cv2.LINE_AA)
+    return image
+
+
+def _free_position(
+    width: int, height: int, size: Tuple[int, int], boxes: List[Tuple[int, int, int, int]],
+    rng: np.random.Generator, attempts: int = 200
+) -> Optional[Tuple[int, int]]:
+    """在屏幕上找一个不与已放置模板重叠的位置"""
+    w, h = size
+    if w >= width or h >= height:
+        return None
+    for _ in range(attempts):
+        x, y = int(rng.integers(0, width - w)), int(rng.integers(0, height - h))
+        if all(x + w + 4 <= bx or bx + bw + 4 <= x or y + h + 4 <= by or by + bh + 4 <= y
+               for bx, by, bw, bh in boxes):
+            return x, y
+    return None
+
+
+def build_screen(
+    resolution: str,
+    templates: Dict[str, np.ndarray],
+    scenario: str = "clean",
+    seed: int = 0
+) -> Tuple[SyntheticScreen, List[Placement]]:
+    """生成一张合成屏幕
+
+    Args:
+        resolution: SCREEN_SIZES 中的名称
+        templates: load_templates() 的结果
+        scenario: SCENARIOS 中的名称
+        seed: 随机种子，相同参数生成相同的屏幕
+
+    Returns:
+        Tuple[SyntheticScreen, List[Placement]]: 帧来源和模板的已知位置
+    """
+    width, height = SCREEN_SIZES[resolution]
+    params = SCENARIOS[scenario]
+    rng = np.random.default_rng(seed)
+    image = _background(width, height, rng)
+    boxes: List[Tuple[int, int, int, int]] = []
+    placements = []
+    for path, template in templates.items():
+        if params["scale"] != 1.0:
+            template = cv2.resize(template, None, fx=params["scale"], fy=params["scale"],
+                                  interpolation=cv2.INTER_LINEAR)
+        position = _free_position(width, height, (template.shape[1], template.shape[0]), boxes, rng)
+        if position is None:
+            continue
+        x, y = position
+        image[y:y + template.shape[0], x:x + template.shape[1]] = template
+        box = (x, y, template.shape[1], template.shape[0])
+        boxes.append(box)
+        placements.append(Placement(path, box))
+
+    # 干扰模板：亮度偏移并轻微模糊的模板副本
+    paths = list(templates)
+    for _ in range(int(params["distractors"])):
+        template = templates[paths[int(rng.integers(0, len(paths)))]]
+        distractor = cv2.GaussianBlur(cv2.convertScaleAbs(template, alpha=0.85, beta=25), (3, 3), 0)
+        position = _free_position(width, height, (distractor.shape[1], distractor.shape[0]), boxes, rng)
+        if position is None:
+            continue
+        x, y = position
+        image[y:y + distractor.shape[0], x:x + distractor.shape[1]] = distractor
+        boxes.append((x, y, distractor.shape[1], distractor.shape[0]))
+
+    if params["noise"]:
+        noise = rng.normal(0, params["noise"], image.shape).astype(np.int16)
+        image = np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+    return SyntheticScreen(image), placements
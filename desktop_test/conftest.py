@@ -1,6 +1,7 @@
 import pytest
 import os
-import pyautogui
+import re
+import fnmatch
 import json
 import time
 from datetime import datetime
@@ -14,9 +15,65 @@ from desktop_test.utils.config import (
     REPORTS_DIR
 )
 from desktop_test.utils.custom_logger import setup_logger
+from desktop_test.utils.screen_capture import ScreenCapture
+from desktop_test.utils.tracing import Tracer
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.template_stats import TemplateLeaderboard
+from desktop_test.utils.idle import IdleClock, idle_sleep
+from desktop_test.utils.profiler import SamplingProfiler
+from desktop_test.utils.baseline import PerformanceBaseline, git_revision
+from desktop_test.utils.init_project import init_project_structure
+
+# 每个测试的空闲时间（按调用位置）
+_idle_by_test = {}
+
+# 采样分析器（--dt-profile 开启时创建）
+_profiler = None
+
+# 与性能基线比较得到的退化指标
+_regressions = []
+
+# 会话级应用管理器（第一个使用 app 夹具的测试创建）
+_app_session = None
 
 custom_logger = CustomLogger()
 
+def pytest_addoption(parser):
+    """注册命令行参数"""
+    group = parser.getgroup("desktop_test", "桌面测试框架")
+    group.addoption(
+        "--dt-trace",
+        action="store_true",
+        default=False,
+        help="记录 span 追踪并为每个测试导出 Chrome Trace 文件"
+    )
+    group.addoption(
+        "--dt-profile",
+        nargs="?",
+        const="*",
+        default=None,
+        metavar="PATTERN",
+        help="开启栈采样分析并为每个测试导出折叠栈文件；可选 PATTERN 按测试 nodeid 通配匹配，只分析选中的测试"
+    )
+    group.addoption(
+        "--dt-baseline-mode",
+        choices=("off", "warn", "fail"),
+        default=BASELINE_MODE,
+        help="与性能基线比较，发现退化时仅警告（warn）或使会话失败（fail）"
+    )
+    group.addoption(
+        "--dt-baseline-update",
+        action="store_true",
+        default=False,
+        help="把本次运行的耗时追加到性能基线文件"
+    )
+    group.addoption(
+        "--dt-app-lifecycle",
+        choices=("session", "test"),
+        default=APP_LIFECYCLE,
+        help="整个会话复用一个应用实例并在测试之间恢复到主窗口（session），或每个测试重新启动应用（test）"
+    )
+
 def pytest_configure(config):
     """配置pytest"""
     # 添加HTML报告
@@ -24,14 +81,157 @@ def pytest_configure(config):
     config.option.self_contained_html = True
     custom_logger.log_step("pytest配置完成")
 
-    # 创建必要的目录
-    for directory in [TEST_DATA_DIR, SCREENSHOTS_DIR, LOGS_DIR, REPORTS_DIR]:
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+    # 创建必要的目录（幂等，只创建缺失的目录）
+    init_project_structure()
     
     # 设置日志
     log_file = os.path.join(LOGS_DIR, f"test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
     setup_logger(log_file)
+    
+    # 开启耗时追踪
+    if config.getoption("--dt-trace"):
+        Tracer.enable()
+        os.makedirs(TRACES_DIR, exist_ok=True)
+    
+    # 开启采样分析
+    global _profiler
+    if config.getoption("--dt-profile"):
+        _profiler = SamplingProfiler()
+        _profiler.start()
+        os.makedirs(PROFILES_DIR, exist_ok=True)
+
+def pytest_unconfigure(config):
+    """停止采样分析并导出整个会话的折叠栈"""
+    global _profiler
+    if _profiler is None:
+        return
+    _profiler.stop()
+    if _profiler.session:
+        session_file = os.path.join(PROFILES_DIR, f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed")
+        SamplingProfiler.write_collapsed(_profiler.session, session_file)
+    _profiler = None
+
+def _should_profile(item):
+    """判断测试是否需要采样分析"""
+    if _profiler is None:
+        return False
+    pattern = item.config.getoption("--dt-profile")
+    return fnmatch.fnmatch(item.nodeid, pattern) or pattern in item.nodeid
+
+def pytest_runtest_setup(item):
+    """测试开始前清空追踪缓冲区和空闲时间统计"""
+    IdleClock.reset()
+    if Tracer.enabled:
+        Tracer.clear()
+    if _should_profile(item):
+        _profiler.begin()
+
+def _report_idle(item, report):
+    """记录当前测试的空闲时间并附加到报告"""
+    sites = IdleClock.snapshot()
+    total = sum(sites.values())
+    _idle_by_test[item.nodeid] = sites
+    item.user_properties.append(("idle_seconds", round(total, 3)))
+    MetricsRegistry().observe("test.idle", total, item.name)
+    if sites:
+        lines = [f"空闲总计: {total:.2f}秒"]
+        lines.extend(f"  {site}: {seconds:.2f}秒" for site, seconds in sites.items())
+        report.sections.append(("desktop_test 空闲时间", "\n".join(lines)))
+        custom_logger.log_step(
+            "空闲时间统计: %s", details={"total": total, "sites": sites}, args=(item.nodeid,)
+        )
+
+def _export_profile(item):
+    """导出当前测试的折叠栈文件"""
+    stacks = _profiler.end()
+    if not stacks:
+        return None
+    safe_name = re.sub(r'[^\w.-]+', '_', item.nodeid)
+    profile_path = os.path.join(PROFILES_DIR, f"{safe_name}.collapsed")
+    SamplingProfiler.write_collapsed(stacks, profile_path)
+    hot = SamplingProfiler.top_frames(stacks, limit=5)
+    if hot:
+        custom_logger.log_step("采样分析热点: %s", details=hot, args=(item.nodeid,))
+    return profile_path
+
+def _export_trace(item):
+    """导出当前测试的 Chrome Trace 文件"""
+    safe_name = re.sub(r'[^\w.-]+', '_', item.nodeid)
+    trace_path = os.path.join(TRACES_DIR, f"{safe_name}.trace.json")
+    return Tracer.export_chrome_trace(trace_path, {"test": item.nodeid})
+
+def pytest_sessionfinish(session, exitstatus):
+    """与性能基线比较，按配置警告或使会话失败，并按需更新基线"""
+    config = session.config
+    mode = config.getoption("--dt-baseline-mode")
+    update = config.getoption("--dt-baseline-update")
+    if mode == "off" and not update:
+        return
+    try:
+        baseline = PerformanceBaseline()
+        current = PerformanceBaseline.collect()
+        if mode != "off":
+            _regressions[:] = baseline.compare(current)
+            for regression in _regressions:
+                custom_logger.warning(
+                    "性能退化: %s 中位数 %.3f秒, 基线 %.3f秒, 上界 %.3f秒",
+                    regression["metric"], regression["current"], regression["baseline"], regression["bound"]
+                )
+        if update and current:
+            baseline.update(current, git_revision())
+            baseline.save()
+    except Exception as e:
+        custom_logger.error(f"性能基线处理失败: {e}")
+        return
+    if _regressions and mode == "fail" and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """打印指标汇总表并导出指标 JSON"""
+    registry = MetricsRegistry()
+    if METRICS_SUMMARY:
+        lines = registry.format_summary()
+        if lines:
+            terminalreporter.write_sep("-", "desktop_test 指标汇总 (毫秒)")
+            for line in lines:
+                terminalreporter.write_line(line)
+    try:
+        metrics_file = os.path.join(METRICS_DIR, f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        registry.dump_json(metrics_file)
+        terminalreporter.write_line(f"指标已导出: {metrics_file}")
+    except Exception as e:
+        custom_logger.error(f"导出指标失败: {e}")
+    idle_tests = sorted(
+        ((nodeid, sites) for nodeid, sites in _idle_by_test.items() if sites),
+        key=lambda item: -sum(item[1].values())
+    )
+    if METRICS_SUMMARY and idle_tests:
+        terminalreporter.write_sep("-", "desktop_test 空闲时间 (秒)")
+        for nodeid, sites in idle_tests[:10]:
+            terminalreporter.write_line(f"{sum(sites.values()):>8.2f}  {nodeid}")
+            for site, seconds in sites.items():
+                terminalreporter.write_line(f"{seconds:>16.2f}  {site}")
+    if _regressions:
+        terminalreporter.write_sep(
+            "-", f"desktop_test 性能退化 ({config.getoption('--dt-baseline-mode')}, 毫秒)", red=True
+        )
+        for line in PerformanceBaseline.format_regressions(_regressions):
+            terminalreporter.write_line(line)
+    if _app_session is not None and METRICS_SUMMARY:
+        terminalreporter.write_sep("-", "desktop_test 应用会话")
+        terminalreporter.write_line(_app_session.summary())
+    leaderboard = TemplateLeaderboard()
+    rows = leaderboard.rank()
+    if METRICS_SUMMARY and any(row["locates"] for row in rows):
+        terminalreporter.write_sep("-", "desktop_test 模板排行榜 (按累计耗时, 毫秒)")
+        for line in leaderboard.format_table(rows):
+            terminalreporter.write_line(line)
+    try:
+        report_file = leaderboard.save_session_report()
+        leaderboard.accumulate()
+        terminalreporter.write_line(f"模板排行榜已导出: {report_file}")
+    except Exception as e:
+        custom_logger.error(f"导出模板排行榜失败: {e}")
 
 def pytest_html_report_title(report):
     """设置HTML报告标题"""
@@ -44,12 +244,53 @@ def pytest_runtest_makereport(item, call):
     outcome = yield
     report = outcome.get_result()
     
+    if report.when == "call":
+        MetricsRegistry().observe("test.call", report.duration, item.nodeid)
+    
+    if report.when == "teardown":
+        try:
+            _report_idle(item, report)
+        except Exception as e:
+            custom_logger.error(f"统计空闲时间失败: {e}")
+    
+    if report.when == "teardown" and _should_profile(item):
+        try:
+            profile_path = _export_profile(item)
+            if profile_path:
+                extra = getattr(report, 'extra', [])
+                extra.append({
+                    'name': 'Collapsed Stacks',
+                    'format': 'url',
+                    'content': os.path.relpath(profile_path, REPORTS_DIR),
+                    'mime_type': 'text/plain',
+                    'extension': 'txt'
+                })
+                report.extra = extra
+        except Exception as e:
+            custom_logger.error(f"导出采样分析文件失败: {e}")
+    
+    if report.when == "teardown" and Tracer.enabled:
+        try:
+            trace_path = _export_trace(item)
+            extra = getattr(report, 'extra', [])
+            extra.append({
+                'name': 'Chrome Trace',
+                'format': 'url',
+                'content': os.path.relpath(trace_path, REPORTS_DIR),
+                'mime_type': 'application/json',
+                'extension': 'json'
+            })
+            report.extra = extra
+        except Exception as e:
+            custom_logger.error(f"导出追踪文件失败: {e}")
+    
     if report.when == "call" and report.failed:
         try:
             # 在报告中添加失败截图
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             screenshot_path = os.path.join(SCREENSHOTS_DIR, f"failure_{timestamp}.png")
-            pyautogui.screenshot(screenshot_path)
+            os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+            ScreenCapture.save(screenshot_path)
             
             # 将截图添加到HTML报告
             extra = getattr(report, 'extra', [])
@@ -95,6 +336,22 @@ def reports_dir():
     """报告目录"""
     return REPORTS_DIR
 
+@pytest.fixture(scope="session")
+def app_session(request):
+    """会话级应用管理器：整个会话复用一个应用实例，会话结束时关闭"""
+    global _app_session
+    from desktop_test.test_cases.app_session import ApplicationSession
+    _app_session = ApplicationSession(request.config.getoption("--dt-app-lifecycle"))
+    yield _app_session
+    _app_session.close()
+
+@pytest.fixture(scope="function")
+def app(app_session, request):
+    """测试开始前保证应用已启动并恢复到主窗口，恢复失败或超出预算时才重新启动"""
+    app_session.acquire(request.node.nodeid)
+    yield app_session
+    app_session.release()
+
 @pytest.fixture(scope="function")
 def test_logger():
     """测试用例日志记录器"""
@@ -146,14 +403,15 @@ def cleanup_files():
 def retry_on_failure():
     """失败重试装饰器"""
     def _retry_on_failure(func, max_retries=3, delay=1):
-        import time
         for i in range(max_retries):
             try:
                 return func()
             except Exception as e:
+                MetricsRegistry().increment("retry.failures", getattr(func, "__name__", None))
                 if i == max_retries - 1:
                     raise
-                time.sleep(delay)
+                MetricsRegistry().increment("retry.attempts", getattr(func, "__name__", None))
+                idle_sleep(delay, "conftest.retry_on_failure")
         return None
     return _retry_on_failure
 
@@ -168,12 +426,13 @@ def test_environment():
     }
 
 @pytest.fixture(scope="function")
-def performance_timer():
+def performance_timer(request):
     """性能计时器"""
     start_time = time.time()
     yield
     end_time = time.time()
     duration = end_time - start_time
+    MetricsRegistry().observe("test.duration", duration, request.node.name)
     custom_logger.info(f"测试执行时间: {duration:.2f}秒")
 
 @pytest.fixture(scope="function")
@@ -221,6 +480,6 @@ def wait_for_condition():
         while time.time() - start_time < timeout:
             if condition_func():
                 return True
-            time.sleep(interval)
+            idle_sleep(interval, "conftest.wait_for_condition")
         return False
     return _wait_for_condition 
\ No newline at end of file
@@ -1,10 +1,14 @@
 from desktop_test.utils.test_helper import TestHelper
-from desktop_test.utils.config import IMAGE_SIMILARITY_THRESHOLD, DEFAULT_TIMEOUT
+from desktop_test.utils.config import IMAGE_SIMILARITY_THRESHOLD, DEFAULT_TIMEOUT, PROGRESS_TIMEOUT
 from desktop_test.utils.exceptions import ElementNotFoundError, ElementNotVisibleError, TimeoutError
 from desktop_test.utils.custom_logger import CustomLogger
+from desktop_test.utils.screen_capture import ScreenCapture
+from desktop_test.utils.input_driver import InputDriver
+from desktop_test.utils.tracing import span, traced
+from desktop_test.utils.idle import idle_sleep
+from desktop_test.utils.metrics import MetricsRegistry
 import time
 import os
-import pyautogui
 
 class BasePage:
     """基础页面类，提供通用的页面操作方法"""
@@ -12,6 +16,7 @@ class BasePage:
     def __init__(self):
         self.test_helper = TestHelper()
         self.logger = CustomLogger(self.__class__.__name__)
+        self.metrics = MetricsRegistry()
         self.screenshot_dir = os.path.join(os.getcwd(), "test_results", "screenshots")
         os.makedirs(self.screenshot_dir, exist_ok=True)
     
@@ -21,7 +26,27 @@ class BasePage:
     
     def click_element(self, image_path, timeout=DEFAULT_TIMEOUT, similarity=IMAGE_SIMILARITY_THRESHOLD):
         """点击元素"""
-        return self.test_helper.click_element(image_path, timeout, similarity)
+        return self.test_helper.click_element(image_path, confidence=similarity, timeout=timeout)
+
+    def double_click_element(self, image_path, timeout=DEFAULT_TIMEOUT, similarity=IMAGE_SIMILARITY_THRESHOLD):
+        """双击元素"""
+        return self.test_helper.double_click_element(image_path, similarity, timeout)
+
+    def find_text(self, text, timeout=DEFAULT_TIMEOUT, region=None, exact=False):
+        """按文字查找元素"""
+        return self.test_helper.find_text(text, timeout, region, exact)
+    
+    def click_text(self, text, timeout=DEFAULT_TIMEOUT, region=None, exact=False):
+        """按文字点击元素"""
+        return self.test_helper.click_text(text, timeout, region, exact)
+    
+    def wait_for_progress(self, image_path, timeout=PROGRESS_TIMEOUT, on_progress=None):
+        """等待进度条完成或停滞"""
+        return self.test_helper.wait_for_progress(image_path, timeout, on_progress=on_progress)
+    
+    def current_state(self):
+        """识别当前界面状态"""
+        return self.test_helper.current_state()
     
     def input_text(self, text):
         """输入文本"""
@@ -59,64 +84,79 @@ class BasePage:
         """检查元素是否可用"""
         return self.test_helper.is_element_enabled(image_path, timeout, similarity)
 
+    @traced("BasePage.take_screenshot")
     def take_screenshot(self, name):
         """截取当前屏幕"""
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = f"{name}_{timestamp}.png"
         filepath = os.path.join(self.screenshot_dir, filename)
         try:
-            screenshot = pyautogui.screenshot()
-            screenshot.save(filepath)
+            ScreenCapture.save(filepath)
             self.logger.info(f"截图已保存: {filepath}")
             return filepath
         except Exception as e:
             self.logger.error(f"截图失败: {str(e)}")
             return None
 
+    @traced("BasePage.retry_action")
     def retry_action(self, action, max_retries=3, retry_interval=1):
         """重试执行操作"""
+        label = getattr(action, "__name__", None)
         for i in range(max_retries):
+            if i:
+                self.metrics.increment("retry.attempts", label)
             try:
                 result = action()
                 if result:
                     return result
             except Exception as e:
                 self.logger.warning(f"第{i+1}次尝试失败: {str(e)}")
+                self.metrics.increment("retry.failures", label)
                 if i < max_retries - 1:
-                    time.sleep(retry_interval)
+                    idle_sleep(retry_interval, "BasePage.retry_action")
                 else:
                     raise
         return False
 
+    @traced("BasePage.wait_and_click")
     def wait_and_click(self, image_path, timeout=DEFAULT_TIMEOUT, similarity=IMAGE_SIMILARITY_THRESHOLD):
         """等待元素出现并点击"""
         if self.wait_for_element(image_path, timeout, similarity):
             return self.click_element(image_path, timeout, similarity)
-        raise ElementNotFoundError(f"等待点击元素失败: {image_path}")
+        raise ElementNotFoundError(image_path, timeout)
 
+    @traced("BasePage.wait_for_any_element")
     def wait_for_any_element(self, image_paths, timeout=DEFAULT_TIMEOUT, similarity=IMAGE_SIMILARITY_THRESHOLD):
         """等待多个元素中的任意一个出现"""
         start_time = time.time()
+        attempt = 0
         while time.time() - start_time < timeout:
+            attempt += 1
+            self.logger.log_sampled("轮询等待任意元素: %s", image_paths, iteration=attempt)
             for image_path in image_paths:
                 if self.is_element_visible(image_path, 1, similarity):
                     return image_path
-            time.sleep(0.5)
+            idle_sleep(0.5, "BasePage.wait_for_any_element")
         raise TimeoutError(f"等待元素超时: {image_paths}")
 
+    @traced("BasePage.wait_for_all_elements")
     def wait_for_all_elements(self, image_paths, timeout=DEFAULT_TIMEOUT, similarity=IMAGE_SIMILARITY_THRESHOLD):
         """等待所有元素出现"""
         start_time = time.time()
         found_elements = set()
+        attempt = 0
         while time.time() - start_time < timeout:
+            attempt += 1
+            self.logger.log_sampled("轮询等待全部元素: 已找到 %d/%d", len(found_elements), len(image_paths), iteration=attempt)
             for image_path in image_paths:
                 if image_path not in found_elements and self.is_element_visible(image_path, 1, similarity):
                     found_elements.add(image_path)
             if len(found_elements) == len(image_paths):
                 return True
-            time.sleep(0.5)
+            idle_sleep(0.5, "BasePage.wait_for_all_elements")
         raise TimeoutError(f"等待元素超时: {set(image_paths) - found_elements}")
 
+    @traced("BasePage.verify_element_state")
     def verify_element_state(self, image_path, expected_state, timeout=DEFAULT_TIMEOUT, similarity=IMAGE_SIMILARITY_THRESHOLD):
         """验证元素状态"""
         if expected_state == "visible":
@@ -128,18 +168,20 @@ class BasePage:
         else:
             raise ValueError(f"不支持的元素状态: {expected_state}")
 
+    @traced("BasePage.scroll_to_element")
     def scroll_to_element(self, image_path, direction="down", max_scrolls=10, similarity=IMAGE_SIMILARITY_THRESHOLD):
         """滚动到元素位置"""
         for _ in range(max_scrolls):
             if self.is_element_visible(image_path, 1, similarity):
                 return True
             if direction == "down":
-                pyautogui.scroll(-100)
+                InputDriver.scroll(-100)
             else:
-                pyautogui.scroll(100)
-            time.sleep(0.5)
+                InputDriver.scroll(100)
+            idle_sleep(0.5, "BasePage.scroll_to_element")
         raise ElementNotFoundError(f"滚动查找元素失败: {image_path}")
 
+    @traced("BasePage.drag_and_drop")
     def drag_and_drop(self, source_image, target_image, timeout=DEFAULT_TIMEOUT, similarity=IMAGE_SIMILARITY_THRESHOLD):
         """拖拽元素"""
         source_pos = self.get_element_position(source_image, timeout, similarity)
@@ -148,10 +190,11 @@ class BasePage:
         if not source_pos or not target_pos:
             raise ElementNotFoundError("未找到源元素或目标元素")
             
-        pyautogui.moveTo(source_pos[0], source_pos[1])
-        pyautogui.mouseDown()
-        time.sleep(0.5)
-        pyautogui.moveTo(target_pos[0], target_pos[1], duration=1)
-        time.sleep(0.5)
-        pyautogui.mouseUp()
+        with span("input"):
+            InputDriver.move_to(source_pos[0], source_pos[1])
+            InputDriver.mouse_down()
+            idle_sleep(0.5, "BasePage.drag_and_drop")
+            InputDriver.move_to(target_pos[0], target_pos[1], duration=1)
+            idle_sleep(0.5, "BasePage.drag_and_drop")
+            InputDriver.mouse_up()
         return True 
\ No newline at end of file
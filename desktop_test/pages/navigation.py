@@ -0,0 +1,380 @@
+"""
+界面导航
+
+用声明式的导航图描述界面状态（与 ScreenStateIndex 的状态名一致）之间的操作：
+每条边是页面对象上的一次操作，例如 click_toolbar('ocr')、press_key('escape')、关闭确认。
+测试只需请求目标状态，Navigator 识别当前状态后按实测耗时规划代价最小的路径，
+每执行一步都重新识别状态，偏离路径时从实际到达的状态重新规划（本次导航中失败过的边不再使用），
+不再重新启动应用：
+    Navigator().go_to("scan")
+边的代价初始为导航图中的估计值，之后按实测耗时滑动平均并保存到 NAVIGATION_COST_FILE；
+执行后没有到达目标状态的边会增加 NAVIGATION_FAILURE_PENALTY（累计不超过 NAVIGATION_PENALTY_MAX），
+下次规划时优先选择其他路径；惩罚按 NAVIGATION_PENALTY_HALF_LIFE 衰减，之后该边会重新被尝试，
+成功执行一次即清除惩罚。
+"""
+import os
+import json
+import time
+import heapq
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from desktop_test.utils.config import (
+    TEST_DATA_DIR,
+    APP_STARTUP_TIMEOUT,
+    NAVIGATION_STEP_TIMEOUT,
+    NAVIGATION_POLL_INTERVAL,
+    NAVIGATION_MAX_STEPS,
+    NAVIGATION_MAX_RECOVERY,
+    NAVIGATION_COST_FILE,
+    NAVIGATION_COST_SMOOTHING,
+    NAVIGATION_FAILURE_PENALTY,
+    NAVIGATION_PENALTY_MAX,
+    NAVIGATION_PENALTY_HALF_LIFE
+)
+from desktop_test.utils.custom_logger import CustomLogger
+from desktop_test.utils.exceptions import NavigationError
+from desktop_test.utils.idle import idle_sleep
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.screen_state import ScreenStateIndex
+from desktop_test.utils.test_helper import TestHelper
+from desktop_test.utils.tracing import span
+
+
+class NavigationEdge(NamedTuple):
+    """导航图中的一条边：在 source 状态执行页面对象的 action(*args) 后到达 target 状态"""
+    source: str
+    target: Optional[str]  # None 表示恢复操作：到达任意已知状态即可
+    action: str  # 页面对象的方法名
+    args: Tuple[Any, ...] = ()
+    cost: float = 1.0  # 没有实测数据时的估计耗时（秒）
+    timeout: float = NAVIGATION_STEP_TIMEOUT  # 执行后等待到达目标状态的时间（秒）
+
+    @property
+    def key(self) -> str:
+        """边的标识（实测耗时按此保存）"""
+        args = ", ".join(os.path.basename(arg) if isinstance(arg, str) else repr(arg) for arg in self.args)
+        return f"{self.source}->{self.target or '*'}:{self.action}({args})"
+
+
+def _common(name: str) -> str:
+    return os.path.join(TEST_DATA_DIR, 'common', name)
+
+
+def default_navigation_edges() -> List[NavigationEdge]:
+    """采编王的默认导航图（状态名与模拟器 default_application_spec 一致）"""
+    edges = [
+        NavigationEdge("desktop", "main", "double_click_element", (_common('caibian_icon.png'),),
+                       cost=APP_STARTUP_TIMEOUT / 2, timeout=APP_STARTUP_TIMEOUT),
+        NavigationEdge("main", "ocr", "click_toolbar", ("ocr",)),
+        NavigationEdge("main", "scan", "click_toolbar", ("scan",)),
+        NavigationEdge("main", "file_menu", "click_menu", ("file",)),
+        NavigationEdge("main", "import_menu", "click_element", (_common('import_button.png'),)),
+        NavigationEdge("import_menu", "import_dialog", "click_element", (_common('import_file_button.png'),)),
+        NavigationEdge("main", "confirm_close", "close_application"),
+        NavigationEdge("confirm_close", "desktop", "click_element", (_common('confirm_close.png'),), cost=2.0),
+        # 菜单也可以通过点击菜单外的主窗口关闭
+        NavigationEdge("file_menu", "main", "click_element", (_common('main_window.png'),), cost=1.5),
+        NavigationEdge("import_menu", "main", "click_element", (_common('main_window.png'),), cost=1.5),
+    ]
+    for state in ("ocr", "scan", "file_menu", "import_menu", "import_dialog", "confirm_close"):
+        edges.append(NavigationEdge(state, "main", "press_key", ("escape",), cost=0.5))
+    return edges
+
+
+def default_recovery_edges() -> List[NavigationEdge]:
+    """无法识别当前状态（意外弹窗等）时依次尝试的恢复操作"""
+    return [NavigationEdge("*", None, "press_key", ("escape",), cost=0.5)]
+
+
+class EdgeCosts:
+    """导航边的实测代价"""
+
+    def __init__(self, filepath: Optional[str] = NAVIGATION_COST_FILE, smoothing: float = NAVIGATION_COST_SMOOTHING):
+        """
+        Args:
+            filepath: 实测耗时的保存路径，None 表示只在内存中记录
+            smoothing: 新测得的耗时在滑动平均中的权重
+        """
+        self.filepath = filepath
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._costs: Dict[str, float] = {}
+        self._penalties: Dict[str, Tuple[float, float]] = {}  # 边 -> (失败惩罚, 最后一次失败的时间)
+        self._dirty = False
+        if filepath and os.path.exists(filepath):
+            try:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    self._load(json.load(f))
+            except (OSError, ValueError, AttributeError, KeyError, TypeError):
+                self._costs, self._penalties = {}, {}
+
+    def _load(self, data: Dict[str, Any]) -> None:
+        for key, value in data.items():
+            if not isinstance(value, dict):
+                self._costs[key] = float(value)
+                continue
+            if value.get("cost") is not None:
+                self._costs[key] = float(value["cost"])
+            if value.get("penalty"):
+                self._penalties[key] = (float(value["penalty"]), float(value["failed_at"]))
+
+    def penalty(self, edge: NavigationEdge, now: Optional[float] = None) -> float:
+        """边当前的失败惩罚（按半衰期衰减）"""
+        entry = self._penalties.get(edge.key)
+        if entry is None:
+            return 0.0
+        penalty, failed_at = entry
+        age = max(0.0, (time.time() if now is None else now) - failed_at)
+        return penalty * 0.5 ** (age / NAVIGATION_PENALTY_HALF_LIFE)
+
+    def get(self, edge: NavigationEdge) -> float:
+        """边的代价：有实测数据时为实测耗时的滑动平均，否则为估计值；加上衰减后的失败惩罚"""
+        return self._costs.get(edge.key, edge.cost) + self.penalty(edge)
+
+    def record(self, edge: NavigationEdge, seconds: float, reached: bool) -> None:
+        """记录一次执行的耗时
+
+        Args:
+            edge: 执行的边
+            seconds: 执行操作并等待到达目标状态的耗时（秒）
+            reached: 是否到达了目标状态
+        """
+        with self._lock:
+            if reached:
+                cost = self._costs.get(edge.key, edge.cost)
+                self._costs[edge.key] = cost + self.smoothing * (seconds - cost)
+                self._penalties.pop(edge.key, None)
+            else:
+                now = time.time()
+                penalty = min(self.penalty(edge, now) + NAVIGATION_FAILURE_PENALTY, NAVIGATION_PENALTY_MAX)
+                self._penalties[edge.key] = (penalty, now)
+            self._dirty = True
+
+    def save(self) -> None:
+        """保存实测代价（先写临时文件再原子替换）"""
+        with self._lock:
+            if not self.filepath or not self._dirty:
+                return
+            directory = os.path.dirname(self.filepath)
+            os.makedirs(directory, exist_ok=True)
+            data: Dict[str, Any] = dict(self._costs)
+            for key, (penalty, failed_at) in self._penalties.items():
+                data[key] = {"cost": self._costs.get(key), "penalty": penalty, "failed_at": failed_at}
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.filepath)
+            self._dirty = False
+
+
+class NavigationGraph:
+    """导航图类"""
+
+    def __init__(
+        self,
+        edges: Optional[Iterable[NavigationEdge]] = None,
+        recovery: Optional[Sequence[NavigationEdge]] = None
+    ):
+        """
+        Args:
+            edges: 状态之间的边，None 表示默认导航图
+            recovery: 无法识别当前状态时的恢复操作，None 表示默认恢复操作
+        """
+        self.edges = list(default_navigation_edges() if edges is None else edges)
+        self.recovery = list(default_recovery_edges() if recovery is None else recovery)
+        self._outgoing: Dict[str, List[NavigationEdge]] = {}
+        for edge in self.edges:
+            self._outgoing.setdefault(edge.source, []).append(edge)
+
+    @property
+    def states(self) -> List[str]:
+        """导航图中的状态"""
+        states = [edge.source for edge in self.edges] + [edge.target for edge in self.edges]
+        return list(dict.fromkeys(states))
+
+    def plan(
+        self,
+        source: str,
+        target: str,
+        costs: Optional[EdgeCosts] = None,
+        exclude: Iterable[str] = ()
+    ) -> List[NavigationEdge]:
+        """规划从 source 到 target 代价最小的路径（Dijkstra）
+
+        Args:
+            source: 起始状态
+            target: 目标状态
+            costs: 边的实测代价，None 表示使用估计值
+            exclude: 不使用的边（NavigationEdge.key）
+
+        Returns:
+            List[NavigationEdge]: 依次执行的边，source 与 target 相同时为空列表
+
+        Raises:
+            NavigationError: 没有从 source 到 target 的路径
+        """
+        cost_of = costs.get if costs is not None else (lambda edge: edge.cost)
+        exclude = set(exclude)
+        best: Dict[str, float] = {source: 0.0}
+        previous: Dict[str, NavigationEdge] = {}
+        queue: List[Tuple[float, str]] = [(0.0, source)]
+        while queue:
+            distance, state = heapq.heappop(queue)
+            if state == target:
+                break
+            if distance > best[state]:
+                continue
+            for edge in self._outgoing.get(state, ()):
+                if edge.key in exclude:
+                    continue
+                candidate = distance + max(0.0, cost_of(edge))
+                if candidate < best.get(edge.target, float("inf")):
+                    best[edge.target] = candidate
+                    previous[edge.target] = edge
+                    heapq.heappush(queue, (candidate, edge.target))
+        if target not in best:
+            raise NavigationError(target, source, f"导航图中没有从 {source} 出发、尚未失败的路径")
+        path = []
+        state = target
+        while state != source:
+            edge = previous[state]
+            path.append(edge)
+            state = edge.source
+        return path[::-1]
+
+
+class Navigator:
+    """界面导航类：从当前识别出的状态沿代价最小的路径到达目标状态"""
+
+    _logger = CustomLogger()
+    _metrics = MetricsRegistry()
+
+    def __init__(
+        self,
+        graph: Optional[NavigationGraph] = None,
+        page=None,
+        costs: Optional[EdgeCosts] = None
+    ):
+        """
+        Args:
+            graph: 导航图，None 表示默认导航图
+            page: 执行边上操作的页面对象，None 表示在第一次执行时创建 MainPage
+            costs: 边的实测代价，None 表示读取 NAVIGATION_COST_FILE
+        """
+        self.graph = graph or NavigationGraph()
+        self.costs = costs or EdgeCosts()
+        self._page = page
+
+    @property
+    def page(self):
+        if self._page is None:
+            from desktop_test.pages.main_page import MainPage
+            self._page = MainPage()
+        return self._page
+
+    @staticmethod
+    def can_recognize() -> bool:
+        """是否有参考截图可以识别界面状态"""
+        return bool(ScreenStateIndex.default().states)
+
+    @staticmethod
+    def current_state() -> Optional[str]:
+        """识别当前界面状态，未知状态时返回 None"""
+        return TestHelper.current_state().state
+
+    def wait_for_state(self, states: Optional[Sequence[str]], timeout: float) -> Optional[str]:
+        """等待界面进入指定状态之一
+
+        Args:
+            states: 期望的状态，None 表示任意已知状态
+            timeout: 超时时间（秒）
+
+        Returns:
+            Optional[str]: 到达的状态；超时时为最后一次识别出的状态
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.current_state()
+            if (state in states) if states is not None else state is not None:
+                return state
+            if time.monotonic() >= deadline:
+                return state
+            idle_sleep(NAVIGATION_POLL_INTERVAL, "Navigator.wait_for_state")
+
+    def _follow(self, edge: NavigationEdge, verify: bool) -> Optional[str]:
+        """执行一条边，返回执行后所在的状态"""
+        start = time.perf_counter()
+        with span("navigate", edge=edge.key):
+            try:
+                succeeded = getattr(self.page, edge.action)(*edge.args) is not False
+            except Exception as e:
+                self._logger.warning(f"导航操作失败 {edge.key}: {e}")
+                succeeded = False
+            if verify:
+                expected = None if edge.target is None else [edge.target]
+                state = self.wait_for_state(expected, edge.timeout if succeeded else 0)
+            elif succeeded:
+                state = edge.target
+            else:
+                raise NavigationError(edge.target, edge.source, f"操作失败: {edge.key}")
+        elapsed = time.perf_counter() - start
+        reached = state is not None and (edge.target is None or state == edge.target)
+        if edge.target is not None:
+            self.costs.record(edge, elapsed, reached)
+        self._metrics.observe("navigation.edge", elapsed, edge.key)
+        self._logger.log_step("导航: %s -> %s", "成功" if reached else "偏离",
+                              args=(edge.source, state or "未知"))
+        return state
+
+    def go_to(self, target: str, start: Optional[str] = None, max_steps: int = NAVIGATION_MAX_STEPS) -> int:
+        """导航到目标状态
+
+        Args:
+            target: 目标状态
+            start: 当前状态，None 表示识别当前屏幕；没有参考截图时必须指定，
+                此时不验证每一步到达的状态
+            max_steps: 最多执行的操作数
+
+        Returns:
+            int: 执行的操作数，已经在目标状态时为 0
+
+        Raises:
+            NavigationError: 没有路径、无法识别当前状态或超过最多操作数
+        """
+        verify = self.can_recognize()
+        if start is None and not verify:
+            raise NavigationError(target, None, "没有屏幕状态参考截图，无法识别当前状态")
+        begin = time.perf_counter()
+        state = start if start is not None else self.current_state()
+        steps = recoveries = 0
+        # 本次导航中执行后没有到达目标状态的边，重新规划时不再使用
+        failed = set()
+        try:
+            with span("navigate_to", target=target):
+                while state != target:
+                    if steps >= max_steps:
+                        raise NavigationError(target, state, f"超过最多操作数 {max_steps}")
+                    if state is None:
+                        if recoveries >= min(NAVIGATION_MAX_RECOVERY, max_steps) or not self.graph.recovery:
+                            raise NavigationError(target, None, "无法识别当前状态")
+                        edge = self.graph.recovery[recoveries % len(self.graph.recovery)]
+                        recoveries += 1
+                    else:
+                        edge = self.graph.plan(state, target, self.costs, failed)[0]
+                    reached = self._follow(edge, verify)
+                    if edge.target is not None and reached != edge.target:
+                        failed.add(edge.key)
+                    state = reached
+                    steps += 1
+        except NavigationError:
+            self._metrics.increment("navigation.failed", target)
+            raise
+        finally:
+            try:
+                self.costs.save()
+            except OSError as e:
+                self._logger.warning(f"保存导航代价失败: {e}")
+        self._metrics.observe("navigation.go_to", time.perf_counter() - begin, target)
+        return steps
@@ -0,0 +1,10 @@
+"""
+Virtual desktop simulator for desktop testing
+
+无显示器环境下代替真实应用：按声明的状态机渲染由模板组成的屏幕，响应点击、
+按键和滚动，并通过 ScreenCapture / InputDriver 接入现有的页面对象和测试流程。
+"""
+from desktop_test.simulator.virtual_desktop import VirtualDesktop
+from desktop_test.simulator.app_spec import default_application_spec
+
+__all__ = ['VirtualDesktop', 'default_application_spec']
@@ -0,0 +1,101 @@
+"""
+默认应用描述
+
+用 ImagePaths 和 TestFixtures 使用的模板组成一个代替采编王的模拟应用：
+桌面图标 -> 主窗口（菜单、工具栏、导入、关闭） -> 文件菜单 / OCR 页面 / 扫描页面 / 导入对话框 / 关闭确认框。
+"""
+import os
+from typing import Any, Dict
+
+from desktop_test.utils.config import TEST_DATA_DIR
+from desktop_test.utils.image_paths import ImagePaths
+
+
+def _image_paths() -> Dict[str, Dict[str, str]]:
+    """ImagePaths 中登记的模板路径"""
+    try:
+        return ImagePaths()._paths
+    except ValueError:
+        # 占位模板未通过校验时仍使用已登记的路径，模拟器会为其生成替身图像
+        return ImagePaths._paths
+
+
+def _common(name: str) -> str:
+    return os.path.join(TEST_DATA_DIR, 'common', name)
+
+
+def default_application_spec(
+    startup_delay: float = 0.5,
+    transition_delay: float = 0.1,
+    size=(1920, 1080)
+) -> Dict[str, Any]:
+    """生成默认的模拟应用描述
+
+    Args:
+        startup_delay: 双击图标到主窗口出现的时间（秒）
+        transition_delay: 其他界面切换的时间（秒）
+        size: 屏幕尺寸 (width, height)
+
+    Returns:
+        Dict[str, Any]: VirtualDesktop 使用的应用描述
+    """
+    paths = _image_paths()
+    main = paths.get('MAIN', {})
+    menus = ('file_menu', 'edit_menu', 'view_menu', 'tools_menu', 'help_menu')
+    toolbar = ('new_button', 'open_button', 'save_button', 'print_button',
+               'calculator_icon', 'ocr_button', 'scan_button')
+
+    main_elements = {'main_window': _common('main_window.png')}
+    main_elements.update({name: main[name] for name in menus if name in main})
+    main_elements.update({name: main[name] for name in toolbar if name in main})
+    main_elements['import_button'] = _common('import_button.png')
+    main_elements['close_button'] = _common('close_button.png')
+
+    def page(category: str) -> Dict[str, str]:
+        return {f"{category}.{name}": path for name, path in paths.get(category, {}).items()}
+
+    def back_to_main(state: str):
+        return [
+            {"from": state, "on": "key", "target": "escape", "to": "main", "delay": transition_delay},
+            {"from": state, "on": "click", "target": "main_window", "to": "main", "delay": transition_delay},
+        ]
+
+    transitions = [
+        {"from": "desktop", "on": "double_click", "target": "app_icon", "to": "main", "delay": startup_delay},
+        {"from": "main", "on": "click", "target": "file_menu", "to": "file_menu", "delay": transition_delay},
+        {"from": "main", "on": "click", "target": "ocr_button", "to": "ocr", "delay": transition_delay},
+        {"from": "main", "on": "click", "target": "scan_button", "to": "scan", "delay": transition_delay},
+        {"from": "main", "on": "click", "target": "import_button", "to": "import_menu", "delay": transition_delay},
+        {"from": "main", "on": "click", "target": "close_button", "to": "confirm_close", "delay": transition_delay},
+        {"from": "confirm_close", "on": "click", "target": "confirm_close", "to": "desktop", "delay": transition_delay},
+        {"from": "import_menu", "on": "click", "target": "import_file_button", "to": "import_dialog",
+         "delay": transition_delay},
+        {"from": "import_dialog", "on": "click", "target": "select_button", "to": "main", "delay": transition_delay},
+        {"from": "file_menu", "on": "click", "to": "main", "delay": transition_delay},
+        {"from": "ocr", "on": "click", "target": "OCR.stop_button", "to": "main", "delay": transition_delay},
+        {"from": "scan", "on": "click", "target": "SCAN.stop_button", "to": "main", "delay": transition_delay},
+    ]
+    for state in ("file_menu", "ocr", "scan", "import_menu", "import_dialog", "confirm_close"):
+        transitions.extend(back_to_main(state))
+
+    return {
+        "size": size,
+        "initial": "desktop",
+        "states": {
+            "desktop": {"elements": {"app_icon": _common('caibian_icon.png')}},
+            "main": {"elements": main_elements},
+            "file_menu": {"base": "main", "elements": page('FILE')},
+            "ocr": {"elements": dict({'main_window': main_elements['main_window']}, **page('OCR'))},
+            "scan": {"elements": dict({'main_window': main_elements['main_window']}, **page('SCAN'))},
+            "import_menu": {"base": "main", "elements": {'import_file_button': _common('import_file_button.png')}},
+            "confirm_close": {"base": "main", "elements": {
+                'confirm_close': {"image": _common('confirm_close.png'), "pos": (size[0] // 2 - 120, size[1] // 2 - 40)},
+            }},
+            "import_dialog": {"elements": {
+                'main_window': main_elements['main_window'],
+                'file_input': _common('file_input.png'),
+                'select_button': _common('select_button.png'),
+            }},
+        },
+        "transitions": transitions,
+    }
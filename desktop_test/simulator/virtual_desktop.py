@@ -0,0 +1,302 @@
+"""
+虚拟桌面
+
+根据声明式的应用描述（状态、每个状态显示的元素、事件触发的状态转换）渲染屏幕，
+同时实现 ScreenCapture 的帧来源接口（grab、size）和 InputDriver 的驱动接口。
+
+应用描述格式：
+    {
+        "size": (1920, 1080),
+        "initial": "desktop",
+        "states": {
+            "desktop": {"elements": {"app_icon": "common/caibian_icon.png"}},
+            "main": {"elements": {"title": {"image": "common/main_window.png", "pos": (20, 20)}}},
+            "file_menu": {"base": "main", "elements": {...}},   # base: 叠加在另一个状态之上
+        },
+        "transitions": [
+            {"from": "desktop", "on": "double_click", "target": "app_icon", "to": "main", "delay": 0.5},
+            {"from": "*", "on": "key", "target": "escape", "to": "main"},
+        ]
+    }
+
+事件类型：click、double_click、right_click、key、type、scroll（target 为 up/down）、
+drag（target 为按下鼠标时所在的元素）。target 省略时匹配任意目标。
+图片路径可以是绝对路径或相对 test_data 的路径；无法读取的占位模板会生成确定性的
+替身图像并登记到 TestHelper，使流程在占位资源下也能运行。
+"""
+import os
+import time
+import zlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from desktop_test.utils.config import TEST_DATA_DIR
+from desktop_test.utils.screen_capture import ScreenCapture
+from desktop_test.utils.input_driver import InputDriver
+from desktop_test.utils.test_helper import TestHelper
+from desktop_test.utils.screen_state import ScreenStateIndex
+
+Box = Tuple[int, int, int, int]
+
+_BACKGROUND = (235, 235, 235)
+_MARGIN = 20
+_SPACING = 16
+
+
+def _stand_in(image_path: str) -> np.ndarray:
+    """为无法读取的模板生成确定性的替身图像（颜色和文字由相对路径决定）"""
+    name = os.path.splitext(os.path.relpath(image_path, TEST_DATA_DIR))[0].replace(os.sep, "/")
+    seed = zlib.crc32(name.encode("utf-8"))
+    color = (60 + seed % 160, 60 + (seed >> 8) % 160, 60 + (seed >> 16) % 160)
+    (text_w, text_h), _ = cv2.getTextSize(name, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+    image = np.full((text_h + 20, text_w + 24, 3), color, dtype=np.uint8)
+    cv2.rectangle(image, (0, 0), (image.shape[1] - 1, image.shape[0] - 1), (30, 30, 30), 1)
+    cv2.putText(image, name, (12, text_h + 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+    return image
+
+
+class VirtualDesktop:
+    """状态机驱动的虚拟桌面"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.width, self.height = spec.get("size", (1920, 1080))
+        self._lock = threading.RLock()
+        self._images: Dict[str, np.ndarray] = {}
+        self._stand_ins: Dict[str, np.ndarray] = {}
+        self._layouts: Dict[str, List[Tuple[str, str, Box]]] = {}
+        self._frames: Dict[str, np.ndarray] = {}
+        self._state = spec["initial"]
+        self._pending: Optional[Tuple[str, float]] = None
+        self._mouse = (0, 0)
+        self._drag_from: Optional[str] = None
+        self.typed_text = ""
+        self.history: List[Dict[str, Any]] = []
+
+    # ---- 状态 ----
+
+    @property
+    def state(self) -> str:
+        """当前状态（延迟到期的转换在此时生效）"""
+        with self._lock:
+            if self._pending is not None and time.monotonic() >= self._pending[1]:
+                self._state = self._pending[0]
+                self._pending = None
+            return self._state
+
+    def reset(self, state: Optional[str] = None) -> None:
+        """回到初始状态（或指定状态），清空输入和历史"""
+        with self._lock:
+            self._state = state or self.spec["initial"]
+            self._pending = None
+            self._drag_from = None
+            self.typed_text = ""
+            self.history.clear()
+
+    def _resolve(self, image_path: str) -> str:
+        """相对 test_data 的路径转换为绝对路径"""
+        return image_path if os.path.isabs(image_path) else os.path.join(TEST_DATA_DIR, image_path)
+
+    def _image(self, image_path: str) -> np.ndarray:
+        """读取模板图像，无法读取时使用替身图像"""
+        image = self._images.get(image_path)
+        if image is None:
+            image = cv2.imread(image_path)
+            if image is None:
+                image = _stand_in(image_path)
+                self._stand_ins[image_path] = image
+            self._images[image_path] = image
+        return image
+
+    def _elements(self, state: str) -> List[Tuple[str, Any]]:
+        """状态显示的元素（包含 base 状态的元素）"""
+        definition = self.spec["states"][state]
+        elements = self._elements(definition["base"]) if definition.get("base") else []
+        return elements + list(definition.get("elements", {}).items())
+
+    def layout(self, state: Optional[str] = None) -> List[Tuple[str, str, Box]]:
+        """状态中各元素的位置：[(名称, 图片路径, (left, top, width, height))]"""
+        state = state or self.state
+        layout = self._layouts.get(state)
+        if layout is not None:
+            return layout
+        layout = []
+        x, y, row_height = _MARGIN, _MARGIN, 0
+        for name, element in self._elements(state):
+            if isinstance(element, str):
+                element = {"image": element}
+            path = self._resolve(element["image"])
+            if not os.path.exists(path):
+                continue
+            image = self._image(path)
+            h, w = image.shape[:2]
+            if "pos" in element:
+                left, top = element["pos"]
+            else:
+                # 从左到右依次排列，超出屏幕宽度时换行
+                if x + w > self.width - _MARGIN and x > _MARGIN:
+                    x, y, row_height = _MARGIN, y + row_height + _SPACING, 0
+                left, top = x, y
+                x += w + _SPACING
+                row_height = max(row_height, h)
+            layout.append((name, path, (left, top, w, h)))
+        self._layouts[state] = layout
+        return layout
+
+    def element_box(self, name: str, state: Optional[str] = None) -> Optional[Box]:
+        """元素在当前（或指定）状态中的位置"""
+        for element_name, _, box in self.layout(state):
+            if element_name == name:
+                return box
+        return None
+
+    def _render(self, state: str) -> np.ndarray:
+        """渲染状态对应的帧（按状态缓存）"""
+        frame = self._frames.get(state)
+        if frame is None:
+            frame = np.full((self.height, self.width, 3), _BACKGROUND, dtype=np.uint8)
+            for _, path, (left, top, w, h) in self.layout(state):
+                image = self._image(path)
+                visible = frame[top:top + h, left:left + w]
+                visible[:] = image[:visible.shape[0], :visible.shape[1]]
+            self._frames[state] = frame
+        return frame
+
+    def state_index(self) -> ScreenStateIndex:
+        """用每个状态渲染出的帧生成屏幕状态索引"""
+        index = ScreenStateIndex()
+        for state in self.spec["states"]:
+            index.add(state, self._render(state))
+        return index
+
+    # ---- 事件 ----
+
+    def _element_at(self, x: Optional[int], y: Optional[int]) -> Optional[str]:
+        """坐标处最上层的元素名称"""
+        if x is None or y is None:
+            x, y = self._mouse
+        for name, _, (left, top, w, h) in reversed(self.layout()):
+            if left <= x < left + w and top <= y < top + h:
+                return name
+        return None
+
+    def dispatch(self, event: str, target: Optional[str] = None) -> Optional[str]:
+        """处理一个事件
+
+        Args:
+            event: 事件类型
+            target: 事件目标（元素名称、按键名称或滚动方向）
+
+        Returns:
+            Optional[str]: 转换后的目标状态，无匹配的转换时返回 None
+        """
+        with self._lock:
+            state = self.state
+            next_state = None
+            for transition in self.spec.get("transitions", []):
+                if transition.get("from", "*") not in ("*", state) or transition["on"] != event:
+                    continue
+                if transition.get("target") not in (None, target):
+                    continue
+                next_state = transition["to"]
+                delay = transition.get("delay", 0.0)
+                if delay > 0:
+                    self._pending = (next_state, time.monotonic() + delay)
+                else:
+                    self._state = next_state
+                    self._pending = None
+                break
+            self.history.append({
+                "time": time.monotonic(), "state": state, "event": event, "target": target, "to": next_state
+            })
+            return next_state
+
+    # ---- ScreenCapture 帧来源接口 ----
+
+    def grab(self, region: Optional[Box] = None) -> np.ndarray:
+        """返回当前状态的整屏或区域图像（BGR）"""
+        frame = self._render(self.state)
+        if region is None:
+            return frame
+        left, top, width, height = region
+        return frame[max(0, top):top + height, max(0, left):left + width]
+
+    def size(self) -> Tuple[int, int]:
+        """屏幕尺寸 (width, height)"""
+        return self.width, self.height
+
+    # ---- InputDriver 驱动接口 ----
+
+    def click(self, x=None, y=None, clicks=1, interval=0.0, button='left') -> None:
+        if x is not None and y is not None:
+            self._mouse = (x, y)
+        target = self._element_at(x, y)
+        if button == 'right':
+            self.dispatch("right_click", target)
+        elif clicks >= 2:
+            self.dispatch("double_click", target)
+        else:
+            self.dispatch("click", target)
+
+    def double_click(self, x=None, y=None) -> None:
+        self.click(x, y, clicks=2)
+
+    def move_to(self, x, y, duration=0.0) -> None:
+        self._mouse = (x, y)
+
+    def mouse_down(self, button='left') -> None:
+        self._drag_from = self._element_at(*self._mouse)
+
+    def mouse_up(self, button='left') -> None:
+        source, self._drag_from = self._drag_from, None
+        if source is not None and source != self._element_at(*self._mouse):
+            self.dispatch("drag", source)
+        else:
+            self.dispatch("click", self._element_at(*self._mouse))
+
+    def write(self, text, interval=0.0) -> None:
+        self.typed_text += text
+        self.dispatch("type", None)
+
+    def press(self, key, presses=1, interval=0.0) -> None:
+        for _ in range(presses):
+            self.dispatch("key", key)
+
+    def key_down(self, key) -> None:
+        self.dispatch("key", key)
+
+    def key_up(self, key) -> None:
+        pass
+
+    def scroll(self, amount, x=None, y=None) -> None:
+        self.dispatch("scroll", "up" if amount > 0 else "down")
+
+    # ---- 安装 ----
+
+    @contextmanager
+    def installed(self):
+        """在上下文中把虚拟桌面设为帧来源和输入驱动
+
+        占位模板的替身图像会登记到 TestHelper，各状态渲染出的帧作为屏幕状态索引，
+        退出时恢复原来的帧来源和驱动。
+        """
+        for state in self.spec["states"]:
+            self.layout(state)
+        previous_source, previous_driver = ScreenCapture.get_source(), InputDriver.get_driver()
+        TestHelper.clear_image_cache()
+        for path, image in self._stand_ins.items():
+            TestHelper.register_template(path, image)
+        ScreenCapture.set_source(self)
+        InputDriver.set_driver(self)
+        ScreenStateIndex.set_default(self.state_index())
+        try:
+            yield self
+        finally:
+            ScreenCapture.set_source(previous_source)
+            InputDriver.set_driver(previous_driver)
+            ScreenStateIndex.set_default(None)
+            TestHelper.clear_image_cache()
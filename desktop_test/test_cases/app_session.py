@@ -0,0 +1,194 @@
+"""
+应用会话
+
+整个测试会话只启动一次采编王，每个测试开始前把应用恢复到 APP_HOME_STATE 并验证，
+只有在以下情况才重新启动应用：
+    - 恢复失败（导航失败，或恢复后识别出的状态不是 APP_HOME_STATE）
+    - 同一个应用实例运行的测试数超过 APP_MAX_TESTS_PER_LAUNCH
+    - 同一个应用实例的运行时间超过 APP_MAX_UPTIME
+有屏幕状态参考截图时由 Navigator 沿导航图恢复，并用状态识别验证；没有参考截图时按 Esc 后等待主窗口出现。
+APP_LIFECYCLE 为 test 时退回到每个测试启动和关闭一次应用。
+"""
+import os
+import time
+from typing import Dict, Optional
+
+from desktop_test.test_cases.test_fixtures import TestFixtures
+from desktop_test.utils.config import (
+    TEST_DATA_DIR,
+    APP_LIFECYCLE,
+    APP_HOME_STATE,
+    APP_RESET_TIMEOUT,
+    APP_MAX_TESTS_PER_LAUNCH,
+    APP_MAX_UPTIME,
+    APP_MAX_START_FAILURES
+)
+from desktop_test.utils.custom_logger import CustomLogger
+from desktop_test.utils.exceptions import DesktopTestError
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.test_helper import TestHelper
+from desktop_test.utils.tracing import span
+
+
+class ApplicationSession:
+    """会话级的应用生命周期管理类"""
+
+    _logger = CustomLogger()
+    _metrics = MetricsRegistry()
+
+    def __init__(self, lifecycle: str = APP_LIFECYCLE, home: str = APP_HOME_STATE):
+        """
+        Args:
+            lifecycle: session 表示整个会话复用一个应用实例，test 表示每个测试启动和关闭一次
+            home: 每个测试开始前恢复到的界面状态
+        """
+        if lifecycle not in ("session", "test"):
+            raise ValueError(f"不支持的应用生命周期: {lifecycle}")
+        self.lifecycle = lifecycle
+        self.home = home
+        self.running = False
+        self.launched_at: Optional[float] = None
+        self.tests_since_launch = 0
+        self.start_failures = 0
+        self.stats: Dict[str, object] = {"tests": 0, "starts": 0, "reuses": 0, "restarts": {}}
+
+    @property
+    def navigator(self):
+        return TestFixtures.navigator()
+
+    def _detect_running(self) -> bool:
+        """应用是否已经在运行（例如上一次会话没有关闭）"""
+        try:
+            if self.navigator.can_recognize():
+                return self.navigator.current_state() not in (None, "desktop")
+            return TestHelper.element_exists(os.path.join(TEST_DATA_DIR, 'common/main_window.png'))
+        except Exception:
+            return False
+
+    def start(self) -> None:
+        """启动应用
+
+        Raises:
+            DesktopTestError: 启动失败，或连续启动失败次数达到 APP_MAX_START_FAILURES
+        """
+        if self.start_failures >= APP_MAX_START_FAILURES:
+            raise DesktopTestError("应用程序启动失败次数过多，不再尝试启动", {"连续失败次数": self.start_failures})
+        start = time.perf_counter()
+        with span("app_start"):
+            started = TestFixtures.setup_application()
+        if not started:
+            self.start_failures += 1
+            self._metrics.increment("app.start.failed")
+            raise DesktopTestError("应用程序启动失败", {"连续失败次数": self.start_failures})
+        self._metrics.observe("app.start", time.perf_counter() - start)
+        self.start_failures = 0
+        self.stats["starts"] += 1
+        self._launched()
+
+    def _launched(self) -> None:
+        self.running = True
+        self.launched_at = time.monotonic()
+        self.tests_since_launch = 0
+
+    def stop(self) -> None:
+        """关闭应用（关闭失败时只记录日志）"""
+        if not self.running:
+            return
+        self.running = False
+        with span("app_stop"):
+            # 能识别界面状态时沿导航图关闭（先关闭菜单和对话框，再点击关闭和确认）
+            try:
+                if self.navigator.can_recognize():
+                    self.navigator.go_to("desktop")
+                    return
+            except Exception as e:
+                self._logger.warning(f"导航到桌面失败: {e}")
+            if not TestFixtures.teardown_application():
+                self._logger.warning("关闭应用失败，下次启动前可能需要手动关闭")
+
+    def restart(self, reason: str) -> None:
+        """重新启动应用"""
+        self._logger.log_step("重新启动应用: %s", args=(reason,))
+        self._metrics.increment("app.restart", reason)
+        restarts = self.stats["restarts"]
+        restarts[reason] = restarts.get(reason, 0) + 1
+        self.stop()
+        self.start()
+
+    def reset(self) -> bool:
+        """把应用恢复到 home 状态并验证
+
+        Returns:
+            bool: 恢复后是否确认处于 home 状态
+        """
+        start = time.perf_counter()
+        with span("app_reset", home=self.home):
+            try:
+                navigator = self.navigator
+                if navigator.can_recognize():
+                    navigator.go_to(self.home)
+                    verified = navigator.current_state() == self.home
+                else:
+                    TestHelper.press_key("escape")
+                    verified = TestHelper.wait_for_element(
+                        os.path.join(TEST_DATA_DIR, 'common/main_window.png'), timeout=APP_RESET_TIMEOUT
+                    )
+            except Exception as e:
+                self._logger.warning(f"恢复到 {self.home} 失败: {e}")
+                verified = False
+        self._metrics.observe("app.reset", time.perf_counter() - start, "verified" if verified else "failed")
+        return bool(verified)
+
+    def _budget_exceeded(self) -> Optional[str]:
+        """超出的重启预算，没有超出时返回 None"""
+        if APP_MAX_TESTS_PER_LAUNCH and self.tests_since_launch >= APP_MAX_TESTS_PER_LAUNCH:
+            return "max_tests"
+        if APP_MAX_UPTIME and self.launched_at is not None and time.monotonic() - self.launched_at >= APP_MAX_UPTIME:
+            return "max_uptime"
+        return None
+
+    def acquire(self, test_name: Optional[str] = None) -> None:
+        """测试开始前：保证应用已启动并处于 home 状态
+
+        Args:
+            test_name: 测试名称（只用于日志）
+
+        Raises:
+            DesktopTestError: 应用无法启动
+        """
+        with span("app_acquire"):
+            if not self.running:
+                if self.lifecycle == "session" and self._detect_running():
+                    self._logger.log_step("复用已经运行的应用")
+                    self._launched()
+                    if not self.reset():
+                        self.restart("reset_failed")
+                else:
+                    self.start()
+            else:
+                reason = self._budget_exceeded()
+                if reason is not None:
+                    self.restart(reason)
+                elif self.reset():
+                    self.stats["reuses"] += 1
+                else:
+                    self.restart("reset_failed")
+        self.tests_since_launch += 1
+        self.stats["tests"] += 1
+        self._logger.log_hot_step("应用已就绪: %s (本次启动后第 %d 个测试)", test_name, self.tests_since_launch)
+
+    def release(self) -> None:
+        """测试结束后：lifecycle 为 test 时关闭应用，否则保留给下一个测试"""
+        if self.lifecycle == "test":
+            self.stop()
+
+    def close(self) -> None:
+        """会话结束时关闭应用"""
+        self.stop()
+
+    def summary(self) -> str:
+        """会话统计（用于终端汇总）"""
+        restarts = self.stats["restarts"]
+        detail = ", ".join(f"{reason} {count}" for reason, count in restarts.items()) or "无"
+        return (f"测试 {self.stats['tests']} 个, 启动 {self.stats['starts']} 次, "
+                f"复用 {self.stats['reuses']} 次, 重启: {detail}")
@@ -1,9 +1,12 @@
 import os
-import hashlib
-import magic  # 用于文件类型检测
 from desktop_test.utils.test_helper import TestHelper
+from desktop_test.utils.file_verifier import FileVerifier
+from desktop_test.utils.file_watcher import FileWatcher
+from desktop_test.utils.text_compare import compare_text_file, compare_text_files
+from desktop_test.utils.exceptions import TimeoutError
 from desktop_test.utils.custom_logger import CustomLogger
 from desktop_test.utils.config import *
+from desktop_test.utils.mime_detector import MimeDetector
 
 class BaseTest:
     _logger = CustomLogger()
@@ -98,13 +101,17 @@ class BaseTest:
             )
             raise AssertionError(message)
 
-    def assert_file_exists(self, file_path, message="文件不存在"):
+    def assert_file_exists(self, file_path, message="文件不存在", timeout=0):
         """断言文件存在
         
         Args:
             file_path: 文件路径
             message: 断言失败时的错误信息
+            timeout: 文件尚未生成时最多等待的时间（秒），0 表示不等待
         """
+        if timeout > 0:
+            self.assert_file_created(file_path, timeout=timeout, message=message)
+            return
         if not os.path.exists(file_path):
             self._logger.log_test_error(
                 f"{self.__class__.__name__}.{self._testMethodName}",
@@ -113,6 +120,77 @@ class BaseTest:
             )
             raise AssertionError(message)
 
+    def assert_file_created(self, file_path, timeout=FILE_WAIT_TIMEOUT, message="文件未生成"):
+        """断言文件在超时前生成（文件出现即返回，不等待写入完成）
+        
+        Args:
+            file_path: 文件路径
+            timeout: 超时时间（秒）
+            message: 断言失败时的错误信息
+            
+        Returns:
+            FileReady: 文件就绪的结果
+        """
+        return self._wait_for_file(file_path, message, "文件未生成", "文件生成", timeout=timeout, complete=False)
+
+    def assert_file_complete(self, file_path, timeout=FILE_WAIT_TIMEOUT, stable_window=FILE_STABLE_WINDOW,
+                             min_size=1, message="文件未写入完成"):
+        """断言文件在超时前生成并写入完成
+        
+        写入后关闭文件、由临时文件重命名而来，或文件大小在 stable_window 内不再变化时视为写入完成。
+        
+        Args:
+            file_path: 文件路径
+            timeout: 超时时间（秒）
+            stable_window: 文件大小稳定时间（秒）
+            min_size: 最小文件大小（字节）
+            message: 断言失败时的错误信息
+            
+        Returns:
+            FileReady: 文件就绪的结果
+        """
+        return self._wait_for_file(file_path, message, "文件未写入完成", "文件写入完成", timeout=timeout,
+                                   stable_window=stable_window, min_size=min_size)
+
+    def assert_file_not_empty(self, file_path, timeout=FILE_WAIT_TIMEOUT, message="文件为空"):
+        """断言文件写入完成且不为空
+        
+        空文件写入完成（关闭或大小稳定）后立即失败，不会等到超时。
+        
+        Args:
+            file_path: 文件路径
+            timeout: 超时时间（秒）
+            message: 断言失败时的错误信息
+        """
+        ready = self.assert_file_complete(file_path, timeout=timeout, min_size=0, message=message)
+        if ready.size == 0:
+            self._logger.log_test_error(
+                f"{self.__class__.__name__}.{self._testMethodName}",
+                message,
+                "文件为空"
+            )
+            raise AssertionError(message)
+        return ready
+
+    def _wait_for_file(self, file_path, message, error_type, assertion_type, **kwargs):
+        """等待文件就绪，超时时记录错误并抛出 AssertionError"""
+        try:
+            ready = FileWatcher.wait_for_file(file_path, **kwargs)
+        except TimeoutError as e:
+            self._logger.log_test_error(
+                f"{self.__class__.__name__}.{self._testMethodName}",
+                f"{message}: {file_path} ({e})",
+                error_type
+            )
+            raise AssertionError(f"{message}: {file_path}") from e
+        self._logger.log_assertion(
+            assertion_type,
+            file_path,
+            ready.reason,
+            details={"size": ready.size, "waited": round(ready.waited, 3)}
+        )
+        return ready
+
     def assert_file_type(self, file_path, expected_type, message="文件类型不匹配"):
         """断言文件类型
         
@@ -122,20 +200,8 @@ class BaseTest:
             message: 断言失败时的错误信息
         """
         try:
-            mime = magic.Magic(mime=True)
-            file_type = mime.from_file(file_path)
-            
-            # 文件类型映射
-            type_mapping = {
-                'PDF': 'application/pdf',
-                'DOC': 'application/msword',
-                'DOCX': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'OFD': 'application/ofd',
-                'TXT': 'text/plain'
-            }
-            
-            expected_mime = type_mapping.get(expected_type.upper())
-            if not expected_mime or file_type != expected_mime:
+            matched, file_type = MimeDetector.matches(file_path, expected_type)
+            if not matched:
                 self._logger.log_test_error(
                     f"{self.__class__.__name__}.{self._testMethodName}",
                     f"文件类型不匹配: 期望 {expected_type}, 实际 {file_type}",
@@ -151,31 +217,46 @@ class BaseTest:
             )
             raise
 
+    def assert_directory_file_types(self, directory, expected_type, pattern="*", message="文件类型不匹配"):
+        """断言目录中所有匹配的文件都是指定类型（并行检测，一次报告全部不匹配的文件）
+        
+        Args:
+            directory: 目录路径
+            expected_type: 期望的文件类型（如 'PDF', 'DOC', 'OFD', 'TXT'）
+            pattern: 文件名匹配模式
+            message: 断言失败时的错误信息
+        """
+        expected_mime = MimeDetector.expected_mime(expected_type)
+        types = MimeDetector.classify_directory(directory, pattern)
+        mismatches = {path: mime for path, mime in types.items() if mime != expected_mime}
+        if not types or mismatches:
+            details = "\n".join(f"  {path}: {mime}" for path, mime in mismatches.items()) or "  没有匹配的文件"
+            self._logger.log_test_error(
+                f"{self.__class__.__name__}.{self._testMethodName}",
+                f"期望 {expected_type}，{len(mismatches)}/{len(types)} 个文件不匹配:\n{details}",
+                message
+            )
+            raise AssertionError(f"{message}（期望 {expected_type}）:\n{details}")
+
     def assert_files_equal(self, file1_path, file2_path, message="文件内容不匹配"):
         """断言两个文件内容相同
         
+        先比较文件大小，大小相同时再比较内容哈希（哈希按路径、大小、mtime 缓存）。
+        
         Args:
             file1_path: 第一个文件路径
             file2_path: 第二个文件路径
             message: 断言失败时的错误信息
         """
         try:
-            # 计算文件的MD5哈希值
-            def get_file_hash(file_path):
-                hash_md5 = hashlib.md5()
-                with open(file_path, "rb") as f:
-                    for chunk in iter(lambda: f.read(4096), b""):
-                        hash_md5.update(chunk)
-                return hash_md5.hexdigest()
-            
-            # 比较文件哈希值
-            if get_file_hash(file1_path) != get_file_hash(file2_path):
+            result = FileVerifier.files_equal(file1_path, file2_path)
+            if not result.equal:
                 self._logger.log_test_error(
                     f"{self.__class__.__name__}.{self._testMethodName}",
-                    "文件内容不匹配",
+                    result.reason,
                     message
                 )
-                raise AssertionError(message)
+                raise AssertionError(f"{message}: {result.reason}")
                 
         except Exception as e:
             self._logger.log_test_error(
@@ -185,25 +266,46 @@ class BaseTest:
             )
             raise
 
-    def assert_text_content(self, file_path, expected_text, message="文本内容不匹配"):
+    def assert_files_equal_batch(self, file_pairs, message="文件内容不匹配"):
+        """断言多对文件内容相同（并行比较，一次报告全部不匹配的文件）
+        
+        Args:
+            file_pairs: (期望文件路径, 实际文件路径) 列表
+            message: 断言失败时的错误信息
+        """
+        results = FileVerifier.verify_many(file_pairs)
+        mismatches = [result for result in results if not result.equal]
+        if mismatches:
+            details = "\n".join(
+                f"  {result.expected} <-> {result.actual}: {result.reason}" for result in mismatches
+            )
+            self._logger.log_test_error(
+                f"{self.__class__.__name__}.{self._testMethodName}",
+                f"{len(mismatches)}/{len(results)} 对文件不匹配:\n{details}",
+                message
+            )
+            raise AssertionError(f"{message}（{len(mismatches)}/{len(results)}）:\n{details}")
+
+    def assert_text_content(self, file_path, expected_text, message="文本内容不匹配", similarity=False):
         """断言文本文件内容
         
+        流式比较（忽略开头和结尾的空白），失败时报告第一处差异的行号、列号和前后文。
+        
         Args:
             file_path: 文本文件路径
             expected_text: 期望的文本内容
             message: 断言失败时的错误信息
+            similarity: 不匹配时是否计算相似度（需要读完整个文件）
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                actual_text = f.read()
-            
-            if actual_text.strip() != expected_text.strip():
+            diff = compare_text_file(file_path, expected_text, similarity=similarity)
+            if not diff.equal:
                 self._logger.log_test_error(
                     f"{self.__class__.__name__}.{self._testMethodName}",
-                    "文本内容不匹配",
+                    f"文本内容不匹配: {file_path}\n{diff.describe()}",
                     message
                 )
-                raise AssertionError(message)
+                raise AssertionError(f"{message}: {file_path}\n{diff.describe()}")
                 
         except Exception as e:
             self._logger.log_test_error(
@@ -211,4 +313,22 @@ class BaseTest:
                 str(e),
                 "文本内容检查失败"
             )
-            raise 
\ No newline at end of file
+            raise
+
+    def assert_text_files_equal(self, actual_path, expected_path, message="文本内容不匹配", similarity=False):
+        """断言两个文本文件内容相同（例如 OCR 导出结果与基准文本）
+        
+        Args:
+            actual_path: 实际输出的文本文件路径
+            expected_path: 期望的文本文件路径
+            message: 断言失败时的错误信息
+            similarity: 不匹配时是否计算相似度（需要读完两个文件）
+        """
+        diff = compare_text_files(actual_path, expected_path, similarity=similarity)
+        if not diff.equal:
+            self._logger.log_test_error(
+                f"{self.__class__.__name__}.{self._testMethodName}",
+                f"文本内容不匹配: {actual_path} <-> {expected_path}\n{diff.describe()}",
+                message
+            )
+            raise AssertionError(f"{message}: {actual_path}\n{diff.describe()}")
@@ -1,14 +1,15 @@
 import os
-import time
 from desktop_test.utils.test_helper import TestHelper
 from desktop_test.utils.config import *
 from desktop_test.utils.custom_logger import CustomLogger
+from desktop_test.utils.idle import idle_sleep
 
 class TestFixtures:
     """测试夹具类，提供通用的前置和后置操作"""
     
     _logger = CustomLogger()
     _test_helper = TestHelper()
+    _navigator = None
     
     @classmethod
     def setup_application(cls):
@@ -50,7 +51,7 @@ class TestFixtures:
                 TestHelper.click_element(os.path.join(TEST_DATA_DIR, 'common/confirm_close.png'))
             
             # 等待窗口关闭
-            time.sleep(2)
+            idle_sleep(2, "TestFixtures.teardown_application")
             
             return True
         except Exception as e:
@@ -61,6 +62,46 @@ class TestFixtures:
             )
             return False
 
+    @classmethod
+    def navigator(cls):
+        """共享的界面导航器（导航边的实测耗时在测试之间累积）"""
+        if cls._navigator is None:
+            from desktop_test.pages.navigation import Navigator
+            cls._navigator = Navigator()
+        return cls._navigator
+
+    @classmethod
+    def navigate_to(cls, state):
+        """进入指定界面状态的通用前置操作
+
+        应用已经运行时从当前识别出的状态沿导航图走过去，不再重新启动应用；
+        没有屏幕状态参考截图时无法识别当前状态：先按 Esc 关闭子界面、菜单和对话框并等待主窗口出现
+        （与 ApplicationSession.reset 相同），看不到主窗口才冷启动应用，再从主窗口走过去。
+
+        Args:
+            state: 目标状态（main、ocr、scan、file_menu 等）
+        """
+        try:
+            navigator = cls.navigator()
+            cls._logger.log_step("进入界面状态: %s", args=(state,))
+            if navigator.can_recognize():
+                navigator.go_to(state)
+            else:
+                main_window = os.path.join(TEST_DATA_DIR, 'common/main_window.png')
+                TestHelper.press_key("escape")
+                if not TestHelper.wait_for_element(main_window, timeout=APP_RESET_TIMEOUT):
+                    if not cls.setup_application():
+                        raise Exception("应用程序启动失败")
+                navigator.go_to(state, start="main")
+            return True
+        except Exception as e:
+            cls._logger.log_test_error(
+                "TestFixtures.navigate_to",
+                str(e),
+                f"进入{state}失败"
+            )
+            return False
+
     @classmethod
     def import_test_files(cls, file_paths, text):
         """导入测试文件夹的通用操作
@@ -88,7 +129,7 @@ class TestFixtures:
             cls._logger.log_step("确认选择导入")
             TestHelper.click_element(os.path.join(TEST_DATA_DIR, 'common/select_button.png'))
 
-            time.sleep(2)
+            idle_sleep(2, "TestFixtures.import_test_files")
 
             return True
         except Exception as e:
@@ -103,8 +144,8 @@ class TestFixtures:
     def setup_batch_operation(cls):
         """批量操作的通用前置设置"""
         try:
-            if not cls.setup_application():
-                raise Exception("应用程序启动失败")
+            if not cls.navigate_to("main"):
+                raise Exception("进入主窗口失败")
             cls.import_test_files([
                 os.path.join(TEST_DATA_DIR, 'batch/test_image1.png'),
                 os.path.join(TEST_DATA_DIR, 'batch/test_image2.png'),
@@ -123,8 +164,8 @@ class TestFixtures:
     def setup_document_operation(cls):
         """文档处理的通用前置设置"""
         try:
-            if not cls.setup_application():
-                raise Exception("应用程序启动失败")
+            if not cls.navigate_to("main"):
+                raise Exception("进入主窗口失败")
             # 根据测试类型导入不同的测试文件
             cls.import_test_files([os.path.join(TEST_DATA_DIR, 'document/test_doc.pdf')])
             return True
@@ -140,7 +181,8 @@ class TestFixtures:
     def setup_toolbar_operation(cls):
         """工具栏操作的通用前置设置"""
         try:
-            cls.setup_application()
+            if not cls.navigate_to("main"):
+                raise Exception("进入主窗口失败")
             cls.import_test_files([os.path.join(TEST_DATA_DIR, 'toolbar/test_image.png')])
         except Exception as e:
             cls._logger.log_test_error(
@@ -154,10 +196,10 @@ class TestFixtures:
     def setup_scan_operation(cls):
         """扫描操作的通用前置设置"""
         try:
-            cls.setup_application()
             # 切换到扫描页面
             cls._logger.log_step("切换到扫描页面")
-            TestHelper.click_element(os.path.join(TEST_DATA_DIR, 'scan/scan_tab.png'))
+            if not cls.navigate_to("scan"):
+                raise Exception("进入扫描页面失败")
         except Exception as e:
             cls._logger.log_test_error(
                 "TestFixtures.setup_scan_operation",
@@ -167,7 +209,7 @@ class TestFixtures:
             raise
 
     @classmethod
-    def _wait_for_window_appear(cls, timeout=10):
+    def _wait_for_window_appear(cls, timeout=APP_STARTUP_TIMEOUT):
         """等待采编王窗口出现"""
         return TestHelper.wait_for_element(
             os.path.join(TEST_DATA_DIR, 'common/main_window.png'),
@@ -0,0 +1,158 @@
+"""
+性能基线
+
+把每次运行中各测试、各操作（定位、点击、等待、整条流程等）的耗时中位数记录到
+基线 JSON 文件中，每个指标保留最近 BASELINE_HISTORY 次运行。之后的运行与基线比较：
+当前中位数超过 "基线中位数 + K * 1.4826 * MAD" 且超过相对容差和绝对容差时判定为退化。
+"""
+import os
+import json
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from desktop_test.utils.config import (
+    BASELINE_FILE,
+    BASELINE_METRICS,
+    BASELINE_HISTORY,
+    BASELINE_MIN_RUNS,
+    BASELINE_MAD_K,
+    BASELINE_TOLERANCE,
+    BASELINE_MIN_DELTA
+)
+from desktop_test.utils.metrics import MetricsRegistry
+
+# MAD 转换为正态分布标准差的系数
+_MAD_SCALE = 1.4826
+
+
+def _median(values: List[float]) -> float:
+    """中位数"""
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _mad(values: List[float], median: float) -> float:
+    """中位数绝对偏差"""
+    return _median([abs(value - median) for value in values])
+
+
+def git_revision() -> Optional[str]:
+    """当前代码的 git 版本（不在 git 仓库中时返回 None）"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class PerformanceBaseline:
+    """性能基线文件的读写与比较"""
+
+    def __init__(self, filepath: str = BASELINE_FILE):
+        self.filepath = filepath
+        self.data: Dict[str, Any] = {"metrics": {}}
+        if os.path.exists(filepath):
+            with open(filepath, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    @staticmethod
+    def key(name: str, label: Optional[str]) -> str:
+        """指标在基线中的键"""
+        return f"{name}|{label}" if label else name
+
+    @classmethod
+    def collect(cls, registry: Optional[MetricsRegistry] = None) -> Dict[str, Dict[str, float]]:
+        """从指标注册表收集本次运行的耗时中位数
+
+        Returns:
+            Dict[str, Dict[str, float]]: 键 -> {"median", "count"}
+        """
+        registry = registry or MetricsRegistry()
+        current = {}
+        for (name, label), histogram in registry.histograms():
+            if name in BASELINE_METRICS and histogram.count:
+                current[cls.key(name, label)] = {
+                    "median": histogram.quantile(0.5),
+                    "count": histogram.count
+                }
+        return current
+
+    def compare(self, current: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
+        """与基线比较
+
+        Args:
+            current: collect() 的结果
+
+        Returns:
+            List[Dict[str, Any]]: 退化的指标（按超出比例降序）
+        """
+        regressions = []
+        metrics = self.data.get("metrics", {})
+        for key, item in current.items():
+            entry = metrics.get(key)
+            if not entry or len(entry.get("runs", [])) < BASELINE_MIN_RUNS:
+                continue
+            runs = entry["runs"]
+            median = _median(runs)
+            mad = _mad(runs, median)
+            bound = max(
+                median + BASELINE_MAD_K * _MAD_SCALE * mad,
+                median * (1 + BASELINE_TOLERANCE),
+                median + BASELINE_MIN_DELTA
+            )
+            value = item["median"]
+            if value > bound:
+                regressions.append({
+                    "metric": key,
+                    "current": value,
+                    "baseline": median,
+                    "mad": mad,
+                    "bound": bound,
+                    "ratio": value / median if median else float("inf"),
+                    "runs": len(runs)
+                })
+        regressions.sort(key=lambda r: -r["ratio"])
+        return regressions
+
+    def update(self, current: Dict[str, Dict[str, float]], revision: Optional[str] = None) -> None:
+        """把本次运行追加到基线（每个指标保留最近 BASELINE_HISTORY 次）"""
+        metrics = self.data.setdefault("metrics", {})
+        for key, item in current.items():
+            entry = metrics.setdefault(key, {"runs": []})
+            entry["runs"] = (entry["runs"] + [item["median"]])[-BASELINE_HISTORY:]
+            entry["median"] = _median(entry["runs"])
+            entry["mad"] = _mad(entry["runs"], entry["median"])
+        self.data["updated_at"] = datetime.now().isoformat()
+        if revision:
+            self.data["revision"] = revision
+
+    def save(self) -> str:
+        """写回基线文件
+
+        Returns:
+            str: 基线文件路径
+        """
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        tmp_path = self.filepath + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.filepath)
+        return self.filepath
+
+    @staticmethod
+    def format_regressions(regressions: List[Dict[str, Any]]) -> List[str]:
+        """生成文本格式的退化列表（毫秒）"""
+        lines = [f"{'metric':<60} {'baseline':>9} {'current':>9} {'bound':>9} {'ratio':>6}"]
+        for r in regressions:
+            lines.append(
+                f"{r['metric']:<60.60} {r['baseline'] * 1000:>9.1f} {r['current'] * 1000:>9.1f} "
+                f"{r['bound'] * 1000:>9.1f} {r['ratio']:>6.2f}"
+            )
+        return lines
@@ -9,6 +9,7 @@ TEST_DATA_DIR = os.path.join(ROOT_DIR, 'desktop_test', 'test_data')
 SCREENSHOTS_DIR = os.path.join(ROOT_DIR, 'desktop_test', 'screenshots')
 LOGS_DIR = os.path.join(ROOT_DIR, 'desktop_test', 'logs')
 REPORTS_DIR = os.path.join(ROOT_DIR, 'desktop_test', 'reports')
+CACHE_DIR = os.path.join(ROOT_DIR, 'desktop_test', '.cache')  # 可随时删除的缓存文件目录
 
 # 测试报告配置
 REPORT_TITLE = "桌面应用自动化测试报告"
@@ -23,4 +24,158 @@ SCREENSHOT_DELAY = 0.5  # 截图前等待时间
 
 # 日志配置
 LOG_FORMAT = "{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
-LOG_FILENAME = os.path.join(LOGS_DIR, f"test_log_{datetime.now().strftime('%Y%m%d')}.log") 
\ No newline at end of file
+LOG_FILENAME = os.path.join(LOGS_DIR, f"test_log_{datetime.now().strftime('%Y%m%d')}.log") 
+LOG_LEVEL = "DEBUG"  # 日志记录级别
+HOT_PATH_LOG_LEVEL = "DEBUG"  # 查找、点击、按键等高频步骤的日志级别
+LOG_SAMPLE_EVERY = 25  # 轮询等高频事件每隔多少次迭代记录一次
+
+# 结构化事件日志配置
+EVENT_LOG_BUFFER_SIZE = 256 * 1024  # 事件日志写缓冲区大小（字节）
+EVENT_LOG_FLUSH_INTERVAL = 1.0  # 事件日志最长刷新间隔（秒）
+
+# 日志轮转与保留配置
+LOG_MAX_BYTES = 50 * 1024 * 1024  # 单个日志/事件文件的最大大小（字节），0 表示不按大小轮转
+LOG_MAX_AGE_HOURS = 24  # 单个日志文件的最长写入时长（小时），0 表示不按时长轮转
+LOG_BACKUP_COUNT = 10  # 每个日志流保留的轮转文件数量
+LOG_RETENTION_DAYS = 7  # 日志目录中文件的最长保留天数
+LOG_RETENTION_MAX_BYTES = 1024 * 1024 * 1024  # 日志目录总大小上限（字节）
+LOG_COMPRESSION = "gzip"  # 轮转文件的压缩方式：'gzip'、'zstd' 或 None
+
+# 耗时追踪配置
+TRACE_ENABLED = False  # 是否开启 span 追踪（也可通过 pytest --dt-trace 开启）
+TRACE_BUFFER_SIZE = 100000  # 每个线程环形缓冲区保存的 span 数量
+TRACES_DIR = os.path.join(REPORTS_DIR, 'traces')  # Chrome Trace 文件输出目录
+
+# 指标配置
+METRICS_DIR = os.path.join(REPORTS_DIR, 'metrics')  # 指标 JSON 输出目录
+METRICS_SUMMARY = True  # 是否在 pytest 结束时打印指标汇总表
+
+# 模板排行榜配置
+LEADERBOARD_DIR = os.path.join(REPORTS_DIR, 'leaderboard')  # 每个会话的排行榜报告目录
+LEADERBOARD_CUMULATIVE_FILE = os.path.join(LEADERBOARD_DIR, 'template_leaderboard_cumulative.json')  # 跨会话累计文件
+AMBIGUITY_MARGIN = 0.05  # 次高匹配得分与最高得分相差不超过该值时视为近似重复匹配
+
+# 采样分析配置
+PROFILE_INTERVAL = 0.005  # 栈采样间隔（秒）
+PROFILE_MAX_DEPTH = 128  # 每个样本保留的最大栈深度
+PROFILES_DIR = os.path.join(REPORTS_DIR, 'profiles')  # 折叠栈（flamegraph）输出目录
+
+# 性能基线配置
+BASELINE_FILE = os.path.join(REPORTS_DIR, 'baseline', 'performance_baseline.json')  # 基线文件
+BASELINE_METRICS = ("locate.latency", "click.latency", "wait.latency", "test.call", "performance")  # 参与比较的指标
+BASELINE_HISTORY = 20  # 每个指标在基线中保留的运行次数
+BASELINE_MIN_RUNS = 3  # 基线中至少有多少次运行才参与比较
+BASELINE_MAD_K = 3.0  # 上界 = 中位数 + K * 1.4826 * MAD
+BASELINE_TOLERANCE = 0.2  # 相对容差，上界至少为中位数 * (1 + 容差)
+BASELINE_MIN_DELTA = 0.05  # 绝对容差（秒），低于该增量的变化忽略
+BASELINE_MODE = "warn"  # 发现退化时的处理：'off'、'warn' 或 'fail'
+
+# 金字塔匹配配置
+PYRAMID_SCALE = 0.5  # 粗匹配层的缩放比例
+PYRAMID_MIN_TEMPLATE = 12  # 缩放后模板最短边小于该值（像素）时退化为全分辨率匹配
+PYRAMID_COARSE_MARGIN = 0.3  # 粗匹配得分允许低于置信度的幅度
+PYRAMID_CANDIDATES = 8  # 粗匹配层保留的候选数量，逐一在原分辨率下精确匹配
+
+# 基准测试配置
+BENCHMARKS_DIR = os.path.join(REPORTS_DIR, 'benchmarks')  # 基准测试结果输出目录
+
+# 导入耗时配置
+IMPORT_TIME_BUDGETS = {  # 模块 -> 导入耗时预算（毫秒，在新的解释器中测量，包含依赖）
+    "desktop_test": 100,
+    "desktop_test.utils.test_helper": 300,
+    "desktop_test.pages.main_page": 300,
+    "desktop_test.test_cases.base_test": 300,
+    "desktop_test.conftest": 800,  # 包含 pytest 本身的导入
+}
+IMPORT_HEAVY_MODULES = ("cv2", "numpy", "pyautogui", "pytesseract", "pyperclip", "PIL", "magic")  # 导入框架时不应加载的重型依赖
+
+# 模板校验配置
+TEMPLATE_MANIFEST_FILE = os.path.join(CACHE_DIR, 'template_manifest.json')  # 模板校验结果清单（按路径、大小、mtime、内容哈希缓存）
+TEMPLATE_VALIDATION_WORKERS = 8  # 并行校验模板的线程数
+
+# 文件校验配置
+FILE_READ_BUFFER = 1024 * 1024  # 计算文件哈希时每次读取的字节数
+FILE_MMAP_THRESHOLD = 8 * 1024 * 1024  # 超过该大小的文件使用 mmap 读取
+FILE_DIGEST_CACHE_SIZE = 4096  # 按 (路径, 大小, mtime) 缓存的文件哈希数量
+FILE_VERIFY_WORKERS = 8  # 批量比较文件时的线程数
+
+# 输出文件监视配置
+FILE_WAIT_TIMEOUT = 60  # 等待输出文件生成并写入完成的默认超时时间（秒）
+FILE_STABLE_WINDOW = 0.5  # 文件大小在该时间内不再变化时视为写入完成（秒）
+FILE_POLL_INTERVAL = 0.1  # 无法使用 inotify 时的轮询间隔（秒）
+
+# 文本比较配置
+TEXT_COMPARE_CHUNK = 64 * 1024  # 流式比较文本时每次读取的字符数
+TEXT_DIFF_CONTEXT = 40  # 报告第一处差异时前后各显示的字符数
+
+# 文件类型检测配置
+MIME_SNIFF_BYTES = 8 * 1024  # 检测文件类型时读取的文件头字节数
+MIME_CACHE_SIZE = 4096  # 按 (路径, 大小, mtime) 缓存的检测结果数量
+MIME_CLASSIFY_WORKERS = 8  # 并行分类目录中文件时的线程数
+
+# OCR 配置
+OCR_BACKEND = "auto"  # OCR 引擎：'auto'（优先 tesserocr）、'tesserocr' 或 'tesseract'（命令行批量识别）
+OCR_LANG = "chi_sim+eng"  # 识别语言
+OCR_PSM = 6  # Tesseract 页面分割模式（6：单个文本块，7：单行文本）
+OCR_LAYOUT_PSM = 11  # 版面识别（按文字定位）的页面分割模式（11：稀疏文本，适合界面上分散的标签）
+OCR_WORKERS = min(4, os.cpu_count() or 1)  # 并行识别的线程数（每个线程一个常驻的 tesserocr 实例或一个 tesseract 进程）
+OCR_TESSERACT_CMD = "tesseract"  # tesseract 可执行文件
+OCR_TESSDATA_DIR = None  # 语言数据目录，None 表示使用默认目录
+OCR_CACHE_MAX_BYTES = 16 * 1024 * 1024  # 内存中识别结果缓存的字节预算（按像素哈希缓存，LRU 淘汰）
+OCR_DISK_CACHE = True  # 是否启用跨运行共享的磁盘缓存
+OCR_CACHE_DIR = os.path.join(CACHE_DIR, 'ocr')  # 识别结果磁盘缓存目录
+OCR_DISK_CACHE_MAX_AGE_DAYS = 30  # 磁盘缓存条目最长保留天数（按最后一次命中计算），0 表示不按天数清理
+OCR_DISK_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 磁盘缓存总大小上限（字节），超出时删除最久未命中的条目，0 表示不限制
+OCR_PREPROCESS = True  # 识别前是否预处理区域图像
+OCR_PREPROCESS_STEPS = ("trim", "scale", "binarize", "deskew")  # 预处理步骤（灰度化总是执行）
+OCR_TARGET_X_HEIGHT = 20  # 缩放后的目标字高（像素），Tesseract 在字高 20 像素以上时准确率较高
+OCR_BINARIZE_BLOCK = 31  # 自适应二值化的邻域大小（奇数，像素）
+OCR_BINARIZE_C = 10  # 自适应二值化从邻域均值中减去的常数
+OCR_MAX_SKEW = 10.0  # 纠正倾斜的最大角度（度），超过时视为版面本身的角度，不纠正
+OCR_TRIM_MARGIN = 4  # 裁边时在文字四周保留的边距（像素）
+OCR_INK_CONTRAST = 40  # 与背景灰度相差超过该值的像素视为文字
+
+# 文字定位配置
+TEXT_TILE_SIZE = (640, 160)  # 版面识别的分块大小 (width, height)，只重新识别像素变化了的分块
+TEXT_TILE_OVERLAP = 48  # 分块向四周扩展的像素，跨越分块边界的词在扩展区域内仍能完整识别
+TEXT_INDEX_CELL = 64  # 词空间索引的网格边长（像素）
+TEXT_MIN_CONFIDENCE = 40  # 按文字定位时词的最低置信度（0~100）
+TEXT_LINE_GAP = 1.0  # 同一行相邻两个词的最大间距（相对于词高的倍数），超过时视为不同的标签
+
+# 进度条监视配置
+PROGRESS_SAMPLE_INTERVAL = 0.1  # 进度条区域的采样间隔（秒）
+PROGRESS_TIMEOUT = 600  # 等待进度完成的超时时间（秒）
+PROGRESS_STALL_TIMEOUT = 30  # 进度超过该时间没有前进时视为停滞（秒）
+PROGRESS_COMPLETE_FRACTION = 0.995  # 视为完成的进度
+PROGRESS_MIN_DELTA = 0.005  # 视为前进、触发进度回调的最小进度变化
+PROGRESS_MIN_CONTRAST = 30  # 填充色与底色的最小颜色距离（BGR 欧氏距离）
+PROGRESS_RATE_WINDOW = 10.0  # 估计进度速度和剩余时间的时间窗口（秒）
+PROGRESS_MAX_INSET = 0.05  # 估计进度时两端最多去掉的对称边框和空白（相对于进度条宽度的比例）
+
+# 屏幕状态识别配置
+SCREEN_STATE_DIR = os.path.join(TEST_DATA_DIR, 'states')  # 参考截图目录：<状态>.png 或 <状态>/*.png
+SCREEN_STATE_INDEX_FILE = os.path.join(CACHE_DIR, 'screen_states.npz')  # 参考截图指纹索引的缓存
+SCREEN_STATE_SIZE = (48, 27)  # 粗指纹缩略图尺寸 (width, height)
+SCREEN_STATE_FINE_SIZE = (192, 108)  # 区分得分接近的状态时使用的精细缩略图尺寸 (width, height)
+SCREEN_STATE_MIN_CONFIDENCE = 0.9  # 识别为已知状态的最低相关系数
+SCREEN_STATE_MIN_MARGIN = 0.02  # 与其他状态的相关系数相差小于该值时做精细比较，精细比较后仍小于该值时标记为不确定
+
+# 界面导航配置
+APP_STARTUP_TIMEOUT = 10  # 启动应用后等待主窗口出现的时间（秒）
+NAVIGATION_STEP_TIMEOUT = 5  # 执行一步导航操作后等待到达目标状态的时间（秒）
+NAVIGATION_POLL_INTERVAL = 0.1  # 等待界面状态时的识别间隔（秒）
+NAVIGATION_MAX_STEPS = 10  # 一次导航最多执行的操作数（包括偏离路径后重新规划的操作）
+NAVIGATION_MAX_RECOVERY = 3  # 无法识别当前状态时最多尝试的恢复操作次数
+NAVIGATION_COST_FILE = os.path.join(CACHE_DIR, 'navigation_costs.json')  # 实测的导航操作耗时
+NAVIGATION_COST_SMOOTHING = 0.3  # 新测得的耗时在滑动平均中的权重
+NAVIGATION_FAILURE_PENALTY = 5.0  # 操作后没有到达目标状态时给该操作增加的代价（秒）
+NAVIGATION_PENALTY_MAX = 30.0  # 一条边累计的失败惩罚上限（秒）
+NAVIGATION_PENALTY_HALF_LIFE = 3600  # 失败惩罚的半衰期（秒），惩罚衰减后该边会重新被尝试和测量
+
+# 应用生命周期配置
+APP_LIFECYCLE = "session"  # session：整个会话复用一个应用实例，每个测试前恢复到 APP_HOME_STATE；test：每个测试重新启动和关闭
+APP_HOME_STATE = "main"  # 每个测试开始前恢复到的界面状态
+APP_RESET_TIMEOUT = 5  # 没有参考截图时，恢复后等待主窗口出现的时间（秒）
+APP_MAX_TESTS_PER_LAUNCH = 100  # 同一个应用实例最多运行的测试数，超过后重新启动（0 表示不限制）
+APP_MAX_UPTIME = 3600  # 同一个应用实例的最长运行时间，超过后重新启动（秒，0 表示不限制）
+APP_MAX_START_FAILURES = 3  # 连续启动失败达到该次数后不再尝试启动，后续测试直接报错
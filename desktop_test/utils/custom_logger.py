@@ -2,13 +2,25 @@ import os
 import sys
 import json
 import logging
+import atexit
 import traceback
-import pyautogui
 import time
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any, Union
 from desktop_test.utils.config import *
 from desktop_test.utils.exceptions import ValidationError
+from desktop_test.utils.event_stream import EventWriter
+from desktop_test.utils.screen_capture import ScreenCapture
+from desktop_test.utils.tracing import span
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.idle import idle_sleep
+from desktop_test.utils.log_rotation import (
+    LogRotator,
+    RotatingLogHandler,
+    schedule_sweep,
+    drain_background_tasks
+)
 
 class LogLevel:
     """日志级别常量"""
@@ -18,11 +30,52 @@ class LogLevel:
     ERROR = "ERROR"
     CRITICAL = "CRITICAL"
 
+def _to_level(level: Union[int, str]) -> int:
+    """将日志级别名称转换为数值
+    
+    Raises:
+        ValueError: 未知的日志级别名称（例如 LOG_LEVEL 或 HOT_PATH_LOG_LEVEL 拼写错误）
+    """
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"未知的日志级别: {level!r}（可选: DEBUG、INFO、WARNING、ERROR、CRITICAL）")
+    return value
+
+class _DeferredSetup(logging.Handler):
+    """占位处理器：第一条日志记录到达时才创建日志文件处理器，再把这条记录交给它们"""
+    
+    def __init__(self, owner: "CustomLogger"):
+        super().__init__()
+        self.owner = owner
+    
+    def handle(self, record) -> bool:
+        for handler in self.owner._setup_handlers():
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+    
+    def emit(self, record):
+        pass
+
+class _LazyJSON:
+    """延迟序列化的JSON参数，只有日志真正输出时才执行 json.dumps"""
+    
+    __slots__ = ("data",)
+    
+    def __init__(self, data: Any):
+        self.data = data
+    
+    def __str__(self) -> str:
+        return json.dumps(self.data, ensure_ascii=False, indent=2, default=str)
+
 class CustomLogger:
     """自定义日志类，提供测试过程中的日志记录功能"""
     
     _instance = None
     _test_context: Dict[str, Any] = {}
+    _setup_lock = threading.Lock()
     
     def __new__(cls, name: str = None):
         if cls._instance is None:
@@ -31,19 +84,43 @@ class CustomLogger:
         return cls._instance
     
     def _initialize_logger(self, name: str):
-        """初始化日志配置"""
+        """初始化日志配置
+        
+        日志目录、日志文件、事件流和过期日志清理都推迟到第一次记录日志时才创建，
+        只导入使用 CustomLogger 的模块不会产生文件或后台线程。
+        """
         try:
-            # 确保日志目录存在
-            os.makedirs(LOGS_DIR, exist_ok=True)
-            os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
-            
             # 创建logger实例
             self.logger = logging.getLogger(name)
-            self.logger.setLevel(logging.DEBUG)
+            self.logger.setLevel(_to_level(LOG_LEVEL))
+            self.hot_path_level = _to_level(HOT_PATH_LOG_LEVEL)
+            self.sample_every = max(1, LOG_SAMPLE_EVERY)
+            
+            # 日志轮转策略（压缩和清理在后台线程执行）
+            self.rotator = LogRotator()
+            self._event_writer = None
+            atexit.register(self._shutdown)
             
             # 如果已经有处理器，不重复添加
-            if self.logger.handlers:
-                return
+            if not self.logger.handlers:
+                self.logger.addHandler(_DeferredSetup(self))
+            
+        except Exception as e:
+            print(f"初始化日志系统失败: {e}")
+            raise
+    
+    def _setup_handlers(self) -> list:
+        """创建控制台和文件处理器，替换占位处理器（只执行一次）
+        
+        Returns:
+            list: 当前的处理器
+        """
+        with self._setup_lock:
+            handlers = self.logger.handlers
+            if not any(isinstance(handler, _DeferredSetup) for handler in handlers):
+                return handlers
+            
+            os.makedirs(LOGS_DIR, exist_ok=True)
             
             # 设置日志格式
             formatter = logging.Formatter(
@@ -55,34 +132,37 @@ class CustomLogger:
             console_handler = logging.StreamHandler(sys.stdout)
             console_handler.setLevel(logging.INFO)
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
             
             # 添加普通日志文件
             log_file = os.path.join(LOGS_DIR, f"test_{datetime.now():%Y-%m-%d}.log")
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler = RotatingLogHandler(log_file, self.rotator)
             file_handler.setLevel(logging.DEBUG)
             file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
             
             # 添加错误日志文件
             error_file = os.path.join(LOGS_DIR, f"error_{datetime.now():%Y-%m-%d}.log")
-            error_handler = logging.FileHandler(error_file, encoding='utf-8')
+            error_handler = RotatingLogHandler(error_file, self.rotator)
             error_handler.setLevel(logging.ERROR)
             error_handler.setFormatter(formatter)
-            self.logger.addHandler(error_handler)
             
-            # 添加JSON格式日志文件
-            json_file = os.path.join(LOGS_DIR, f"test_{datetime.now():%Y-%m-%d}.json")
-            json_handler = logging.FileHandler(json_file, encoding='utf-8')
-            json_handler.setLevel(logging.DEBUG)
-            json_handler.setFormatter(
-                logging.Formatter('%(asctime)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-            )
-            self.logger.addHandler(json_handler)
+            # 替换为新的列表：正在分发记录的 callHandlers 仍遍历原来的列表，不会重复输出
+            handlers = [handler for handler in handlers if not isinstance(handler, _DeferredSetup)]
+            self.logger.handlers = handlers + [console_handler, file_handler, error_handler]
             
-        except Exception as e:
-            print(f"初始化日志系统失败: {e}")
-            raise
+            # 后台清理过期日志
+            schedule_sweep(LOGS_DIR)
+            return self.logger.handlers
+    
+    @property
+    def event_writer(self) -> EventWriter:
+        """结构化事件流（JSON Lines），第一次写入事件时才创建文件"""
+        if self._event_writer is None:
+            with self._setup_lock:
+                if self._event_writer is None:
+                    os.makedirs(LOGS_DIR, exist_ok=True)
+                    events_file = os.path.join(LOGS_DIR, f"test_{datetime.now():%Y-%m-%d}.jsonl")
+                    self._event_writer = EventWriter(events_file, rotator=self.rotator)
+        return self._event_writer
     
     def set_test_context(self, **kwargs):
         """设置测试上下文信息
@@ -107,11 +187,34 @@ class CustomLogger:
         """
         formatted_data = {
             "timestamp": datetime.now().isoformat(),
+            "ts": time.time(),
             "context": self._test_context.copy()
         }
         formatted_data.update(data)
         return formatted_data
     
+    def _emit_event(self, log_data: Dict[str, Any]):
+        """将格式化后的日志数据写入结构化事件流
+        
+        Args:
+            log_data: 经 _format_log_data 格式化的日志数据
+        """
+        try:
+            self.event_writer.write(log_data)
+        except Exception as e:
+            self.logger.error(f"写入事件日志失败: {e}")
+    
+    def flush_events(self):
+        """刷新结构化事件流缓冲区"""
+        if self._event_writer is not None:
+            self._event_writer.flush()
+    
+    def _shutdown(self):
+        """进程退出时关闭事件流，并等待后台压缩任务完成"""
+        if self._event_writer is not None:
+            self._event_writer.close()
+        drain_background_tasks()
+    
     def _save_screenshot(self, name: str) -> Optional[str]:
         """保存屏幕截图
         
@@ -122,18 +225,29 @@ class CustomLogger:
             Optional[str]: 截图文件路径
         """
         try:
-            time.sleep(SCREENSHOT_DELAY)
+            idle_sleep(SCREENSHOT_DELAY, "CustomLogger._save_screenshot")
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"{name}_{timestamp}.png"
             filepath = os.path.join(SCREENSHOTS_DIR, filename)
             
-            screenshot = pyautogui.screenshot()
-            screenshot.save(filepath)
+            os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+            ScreenCapture.save(filepath)
             return filepath
         except Exception as e:
             self.logger.error(f"保存截图失败: {e}")
             return None
     
+    def is_enabled_for(self, level: Union[int, str]) -> bool:
+        """检查指定级别的日志是否会被记录
+        
+        Args:
+            level: 日志级别
+            
+        Returns:
+            bool: 是否启用
+        """
+        return self.logger.isEnabledFor(_to_level(level))
+    
     def debug(self, msg, *args, **kwargs):
         """记录调试级别日志"""
         self.logger.debug(msg, *args, **kwargs)
@@ -173,6 +287,8 @@ class CustomLogger:
         screenshot_path = self._save_screenshot(f"test_start_{test_name}")
         if screenshot_path:
             self.debug(f"测试开始截图: {screenshot_path}")
+            log_data["screenshot"] = screenshot_path
+        self._emit_event(log_data)
     
     def log_test_end(self, test_name: str, status: str = "通过", **kwargs):
         """记录测试结束
@@ -194,6 +310,8 @@ class CustomLogger:
         screenshot_path = self._save_screenshot(f"test_end_{test_name}")
         if screenshot_path:
             self.debug(f"测试结束截图: {screenshot_path}")
+            log_data["screenshot"] = screenshot_path
+        self._emit_event(log_data)
         
         self.clear_test_context()
     
@@ -236,7 +354,8 @@ class CustomLogger:
             screenshot_path = self._save_screenshot(f"error_{test_name}")
             if screenshot_path:
                 self.error(f"错误截图已保存: {screenshot_path}")
-                error_info["screenshot"] = screenshot_path
+                log_data["screenshot"] = screenshot_path
+        self._emit_event(log_data)
     
     def log_element_not_found(
         self,
@@ -264,6 +383,7 @@ class CustomLogger:
             if screenshot_path:
                 self.error(f"元素未找到截图已保存: {screenshot_path}")
                 log_data["screenshot"] = screenshot_path
+        self._emit_event(log_data)
     
     def log_image_mismatch(
         self,
@@ -296,37 +416,95 @@ class CustomLogger:
             f"相似度: {similarity:.4f}\n"
             f"阈值: {threshold:.4f}"
         )
+        self._emit_event(log_data)
     
     def log_step(
         self,
         step_name: str,
         status: str = "成功",
         details: Optional[Dict[str, Any]] = None,
-        save_screenshot: bool = False
+        save_screenshot: bool = False,
+        level: Union[int, str] = logging.INFO,
+        args: tuple = ()
     ):
         """记录测试步骤
         
         Args:
-            step_name: 步骤名称
+            step_name: 步骤名称，可包含 %s 占位符
             status: 步骤状态
             details: 步骤详情
             save_screenshot: 是否保存截图
+            level: 日志级别，未启用该级别时不做任何格式化
+            args: 步骤名称的格式化参数，延迟到确认需要记录时才格式化
         """
+        level = _to_level(level)
+        if not save_screenshot and not self.logger.isEnabledFor(level):
+            return
+        with span("log"):
+            self._log_step(step_name, status, details, save_screenshot, level, args)
+    
+    def _log_step(self, step_name, status, details, save_screenshot, level, args):
+        """log_step 的实际记录逻辑（已确认需要记录）"""
+        if args:
+            step_name = step_name % args
         log_data = self._format_log_data({
             "event": "test_step",
+            "level": logging.getLevelName(level),
             "step_name": step_name,
             "status": status,
             "details": details or {}
         })
-        self.info(f"执行步骤: {step_name} - {status}")
+        self.logger.log(level, "执行步骤: %s - %s", step_name, status)
         
         if details:
-            self.debug("步骤详情:\n{}", json.dumps(details, ensure_ascii=False, indent=2))
+            self.debug("步骤详情:\n%s", _LazyJSON(details))
         
         if save_screenshot:
             screenshot_path = self._save_screenshot(f"step_{step_name}")
             if screenshot_path:
                 self.debug(f"步骤截图: {screenshot_path}")
+                log_data["screenshot"] = screenshot_path
+        self._emit_event(log_data)
+    
+    def log_hot_step(self, step_name: str, *args, status: str = "成功"):
+        """记录高频路径上的步骤（查找、点击、按键等）
+        
+        使用 HOT_PATH_LOG_LEVEL 级别，级别未启用时直接返回，不构造任何字符串。
+        
+        Args:
+            step_name: 步骤名称模板（%s 占位符）
+            *args: 格式化参数
+            status: 步骤状态
+        """
+        if self.logger.isEnabledFor(self.hot_path_level):
+            self.log_step(step_name, status, level=self.hot_path_level, args=args)
+    
+    def log_sampled(
+        self,
+        msg: str,
+        *args,
+        iteration: int,
+        every: Optional[int] = None,
+        level: Union[int, str] = logging.DEBUG
+    ):
+        """按采样率记录高频事件（如轮询迭代）
+        
+        只记录第 1 次及之后每 every 次迭代，其余迭代仅做一次级别判断和取模运算。
+        
+        Args:
+            msg: 日志消息模板（%s 占位符）
+            *args: 格式化参数
+            iteration: 当前迭代序号（从 1 开始）
+            every: 采样间隔，默认使用 LOG_SAMPLE_EVERY
+            level: 日志级别
+        """
+        every = every or self.sample_every
+        if (iteration - 1) % every:
+            return
+        level = _to_level(level)
+        if not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(level, msg + " (第%d次, 采样1/%d)", *args, iteration, every)
     
     def log_assertion(
         self,
@@ -352,12 +530,13 @@ class CustomLogger:
         })
         
         if actual is None:
-            self.info(f"断言: {assertion_type} - 期望值: {expected}")
+            self.info("断言: %s - 期望值: %s", assertion_type, expected)
         else:
-            self.info(f"断言: {assertion_type} - 期望值: {expected}, 实际值: {actual}")
+            self.info("断言: %s - 期望值: %s, 实际值: %s", assertion_type, expected, actual)
             
         if details:
-            self.debug("断言详情:\n{}", json.dumps(details, ensure_ascii=False, indent=2))
+            self.debug("断言详情:\n%s", _LazyJSON(details))
+        self._emit_event(log_data)
     
     def log_performance(
         self,
@@ -372,6 +551,7 @@ class CustomLogger:
             duration: 执行时间（秒）
             threshold: 阈值（秒）
         """
+        MetricsRegistry().observe("performance", duration, operation)
         log_data = self._format_log_data({
             "event": "performance",
             "operation": operation,
@@ -386,6 +566,7 @@ class CustomLogger:
             )
         else:
             self.info(f"性能指标: {operation} - 执行时间: {duration:.3f}秒")
+        self._emit_event(log_data)
 
 def setup_logger(log_file):
     """设置日志记录器
@@ -411,8 +592,8 @@ def setup_logger(log_file):
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
-    # 添加文件处理器
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    # 添加文件处理器（按大小和时长轮转）
+    file_handler = RotatingLogHandler(log_file)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
     logger.addHandler(file_handler)
@@ -423,4 +604,7 @@ def setup_logger(log_file):
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
     
+    # 后台清理过期的会话日志
+    schedule_sweep(log_dir)
+    
     return logger
\ No newline at end of file
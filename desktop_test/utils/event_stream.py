@@ -0,0 +1,240 @@
+"""
+结构化事件流（JSON Lines）
+
+每条事件序列化为一行 JSON，写入带缓冲的文件。安装了 orjson 时使用其快速序列化，
+否则回退到标准库 json。读取端以流式方式逐行解析，可以处理数 GB 的事件日志而无需
+一次性加载到内存。
+"""
+import os
+import io
+import json
+import time
+import glob
+import gzip
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Union
+
+from desktop_test.utils.config import EVENT_LOG_BUFFER_SIZE, EVENT_LOG_FLUSH_INTERVAL
+from desktop_test.utils.log_rotation import LogRotator, register_active_path, zstandard
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """序列化不支持的对象时的兜底处理"""
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', 'replace')
+    if hasattr(obj, 'tolist'):  # numpy 数组及标量
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_event(event: Dict[str, Any]) -> bytes:
+        """将事件序列化为一行 JSON（含换行符）"""
+        return orjson.dumps(event, default=_default, option=_ORJSON_OPTIONS) + b"\n"
+
+    loads_event = orjson.loads
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default)
+
+    def dumps_event(event: Dict[str, Any]) -> bytes:
+        """将事件序列化为一行 JSON（含换行符）"""
+        return (_encoder.encode(event) + "\n").encode('utf-8')
+
+    loads_event = json.loads
+
+
+class EventWriter:
+    """线程安全的 JSON Lines 事件写入器，支持按大小和时长轮转"""
+
+    def __init__(
+        self,
+        path: str,
+        buffer_size: int = EVENT_LOG_BUFFER_SIZE,
+        flush_interval: float = EVENT_LOG_FLUSH_INTERVAL,
+        rotator: Optional[LogRotator] = None
+    ):
+        """
+        Args:
+            path: 事件日志文件路径
+            buffer_size: 写缓冲区大小（字节）
+            flush_interval: 最长刷新间隔（秒），0 表示只在缓冲区满或关闭时刷新
+            rotator: 轮转策略，None 表示不轮转
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.rotator = rotator
+        self._lock = threading.Lock()
+        self._open()
+        self._last_flush = time.monotonic()
+        register_active_path(path)
+
+    def _open(self) -> None:
+        """打开（或重新打开）事件日志文件"""
+        self._file = open(self.path, 'ab', buffering=self.buffer_size)
+        self._size = self._file.tell()
+        self._opened_at = time.time()
+
+    def write(self, event: Dict[str, Any]) -> None:
+        """写入一条事件
+
+        Args:
+            event: 事件数据
+        """
+        data = dumps_event(event)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(data)
+            self._size += len(data)
+            if self.rotator is not None and self.rotator.should_rotate(self._size, self._opened_at):
+                self._file.close()
+                self.rotator.rotate(self.path)
+                self._open()
+                return
+            if self.flush_interval:
+                now = time.monotonic()
+                if now - self._last_flush >= self.flush_interval:
+                    self._file.flush()
+                    self._last_flush = now
+
+    def flush(self) -> None:
+        """刷新缓冲区"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """关闭写入器"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @property
+    def closed(self) -> bool:
+        """写入器是否已关闭"""
+        return self._file is None
+
+
+def _expand_paths(paths: Union[str, Iterable[str]]) -> Iterator[str]:
+    """展开文件路径、目录或通配符"""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        path = os.fspath(path)
+        if os.path.isdir(path):
+            # 轮转文件按修改时间排序，保证事件按时间先后读出
+            yield from sorted(glob.glob(os.path.join(path, '*.jsonl*')), key=os.path.getmtime)
+        elif glob.has_magic(path):
+            yield from sorted(glob.glob(path), key=os.path.getmtime)
+        else:
+            yield path
+
+
+@contextmanager
+def _open_event_file(path: str):
+    """以二进制方式打开事件日志文件，自动识别 gzip/zstd 压缩的轮转文件"""
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rb') as f:
+            yield f
+    elif path.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError(f"读取 zstd 压缩的事件日志需要安装 zstandard: {path}")
+        with open(path, 'rb') as raw:
+            reader = zstandard.ZstdDecompressor().stream_reader(raw)
+            with io.BufferedReader(reader, buffer_size=1024 * 1024) as f:
+                yield f
+    else:
+        with open(path, 'rb') as f:
+            yield f
+
+
+def iter_events(
+    paths: Union[str, Iterable[str]],
+    events: Optional[Union[str, Iterable[str]]] = None,
+    where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    skip_invalid: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """流式读取事件日志
+
+    Args:
+        paths: 文件路径、目录、通配符或它们的列表
+        events: 只返回指定类型的事件（如 'performance'）
+        where: 额外的过滤函数
+        skip_invalid: 是否跳过无法解析的行（例如进程中断时写了一半的行）
+
+    Yields:
+        Dict[str, Any]: 事件数据
+    """
+    if isinstance(events, str):
+        events = {events}
+    elif events is not None:
+        events = set(events)
+
+    for path in _expand_paths(paths):
+        with _open_event_file(path) as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = loads_event(line)
+                except ValueError:
+                    if skip_invalid:
+                        continue
+                    raise ValueError(f"事件日志格式错误: {path}:{line_no}")
+                if events is not None and record.get('event') not in events:
+                    continue
+                if where is not None and not where(record):
+                    continue
+                yield record
+
+
+def summarize_durations(
+    paths: Union[str, Iterable[str]],
+    event: str = 'performance',
+    key: str = 'operation',
+    value: str = 'duration'
+) -> Dict[str, Dict[str, float]]:
+    """流式汇总事件中的耗时信息
+
+    Args:
+        paths: 事件日志路径
+        event: 事件类型
+        key: 分组字段
+        value: 耗时字段
+
+    Returns:
+        Dict[str, Dict[str, float]]: 每个分组的 count/total/min/max/mean
+    """
+    summary: Dict[str, Dict[str, float]] = {}
+    for record in iter_events(paths, events=event):
+        duration = record.get(value)
+        if not isinstance(duration, (int, float)):
+            continue
+        stats = summary.get(record.get(key))
+        if stats is None:
+            stats = summary[record.get(key)] = {
+                'count': 0, 'total': 0.0, 'min': duration, 'max': duration
+            }
+        stats['count'] += 1
+        stats['total'] += duration
+        stats['min'] = min(stats['min'], duration)
+        stats['max'] = max(stats['max'], duration)
+    for stats in summary.values():
+        stats['mean'] = stats['total'] / stats['count']
+    return summary
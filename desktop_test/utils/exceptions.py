@@ -87,4 +87,15 @@ class ValidationError(DesktopTestError):
             "验证类型": validation_type,
             "验证值": value
         }
-        super().__init__(message, details) 
\ No newline at end of file
+        super().__init__(message, details) 
+
+class NavigationError(DesktopTestError):
+    """界面导航异常"""
+    def __init__(self, target, current, error_msg):
+        message = f"导航到 {target} 失败: {error_msg}"
+        details = {
+            "目标状态": target,
+            "当前状态": current or "未知",
+            "错误信息": error_msg
+        }
+        super().__init__(message, details)
@@ -1,19 +1,10 @@
 import os
-import magic
 from desktop_test.utils.exceptions import ValidationError
+from desktop_test.utils.mime_detector import MimeDetector
 
 class FileValidator:
     """文件验证器类"""
     
-    _mime = None  # 缓存magic实例
-    
-    @classmethod
-    def _get_mime(cls):
-        """获取magic实例（单例模式）"""
-        if cls._mime is None:
-            cls._mime = magic.Magic(mime=True)
-        return cls._mime
-    
     @classmethod
     def validate_file_exists(cls, file_path):
         """验证文件是否存在"""
@@ -62,18 +53,35 @@ class FileValidator:
         try:
             cls.validate_file_exists(file_path)
             cls.validate_file_readable(file_path)
-            file_type = cls._get_mime().from_file(file_path)
+            file_type = MimeDetector.detect(file_path)
             return file_type.startswith('image/')
         except Exception:
             return False
     
+    @classmethod
+    def sniff_image_type(cls, header):
+        """根据文件头判断图片类型，不调用 libmagic
+        
+        Args:
+            header: 文件开头的字节（至少 12 字节）
+            
+        Returns:
+            Optional[str]: 图片的 MIME 类型，无法识别时返回 None
+        """
+        return MimeDetector.sniff_image(header)
+    
+    @classmethod
+    def detect_mime(cls, file_path):
+        """检测文件的 MIME 类型（共享的 MimeDetector，结果按路径、大小、mtime 缓存）"""
+        return MimeDetector.detect(file_path)
+    
     @classmethod
     def is_valid_text(cls, file_path):
         """验证是否为有效的文本文件"""
         try:
             cls.validate_file_exists(file_path)
             cls.validate_file_readable(file_path)
-            file_type = cls._get_mime().from_file(file_path)
+            file_type = MimeDetector.detect(file_path)
             return file_type.startswith('text/')
         except Exception:
             return False
@@ -84,7 +92,7 @@ class FileValidator:
         try:
             cls.validate_file_exists(file_path)
             cls.validate_file_readable(file_path)
-            file_type = cls._get_mime().from_file(file_path)
+            file_type = MimeDetector.detect(file_path)
             return file_type == 'application/pdf'
         except Exception:
             return False
@@ -0,0 +1,178 @@
+"""
+文件校验引擎
+
+比较两个文件内容是否相同：
+    - 先比较文件大小，大小不同直接判定不相同，不读取内容
+    - 计算哈希时使用大缓冲区读取，大文件使用 mmap
+    - 安装了 xxhash 时使用 xxh3_128，否则使用 BLAKE2b
+    - 哈希按 (路径, 大小, mtime) 缓存，同一个基准文件在多个测试中只计算一次
+    - verify_many 在线程池中批量比较（hashlib/xxhash 计算大块数据时释放 GIL）
+"""
+import os
+import mmap
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from desktop_test.utils.config import (
+    FILE_READ_BUFFER,
+    FILE_MMAP_THRESHOLD,
+    FILE_DIGEST_CACHE_SIZE,
+    FILE_VERIFY_WORKERS
+)
+from desktop_test.utils.metrics import MetricsRegistry
+
+try:
+    import xxhash
+except ImportError:  # xxhash 为可选依赖
+    xxhash = None
+
+
+def _new_hash():
+    """创建哈希对象"""
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+HASH_ALGORITHM = "xxh3_128" if xxhash is not None else "blake2b"
+
+
+class VerifyResult(NamedTuple):
+    """一对文件的比较结果"""
+    expected: str  # 期望（基准）文件路径
+    actual: str  # 实际输出文件路径
+    equal: bool  # 内容是否相同
+    reason: Optional[str] = None  # 不相同时的原因
+
+
+class FileVerifier:
+    """文件校验类"""
+
+    _metrics = MetricsRegistry()
+    _lock = threading.Lock()
+    _digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()  # (路径, 大小, mtime) -> 哈希
+    _hits = 0
+    _misses = 0
+
+    @classmethod
+    def _hash_file(cls, path: str, size: int) -> str:
+        """计算文件哈希"""
+        digest = _new_hash()
+        with open(path, "rb", buffering=0) as f:
+            if size >= FILE_MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, size, FILE_READ_BUFFER):
+                            digest.update(view[offset:offset + FILE_READ_BUFFER])
+                    finally:
+                        view.release()
+            else:
+                buffer = bytearray(FILE_READ_BUFFER)
+                view = memoryview(buffer)
+                while True:
+                    count = f.readinto(buffer)
+                    if not count:
+                        break
+                    digest.update(view[:count])
+        return digest.hexdigest()
+
+    @classmethod
+    def digest(cls, path: str) -> str:
+        """获取文件哈希（按路径、大小、mtime 缓存）
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            str: 文件内容的十六进制哈希
+        """
+        stat = os.stat(path)
+        key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+        with cls._lock:
+            cached = cls._digests.get(key)
+            if cached is not None:
+                cls._digests.move_to_end(key)
+                cls._hits += 1
+                return cached
+            cls._misses += 1
+
+        start = time.perf_counter()
+        value = cls._hash_file(path, stat.st_size)
+        cls._metrics.observe("verify.hash.latency", time.perf_counter() - start)
+
+        with cls._lock:
+            cls._digests[key] = value
+            while len(cls._digests) > FILE_DIGEST_CACHE_SIZE:
+                cls._digests.popitem(last=False)
+        return value
+
+    @classmethod
+    def files_equal(cls, expected: str, actual: str) -> VerifyResult:
+        """比较两个文件内容是否相同
+
+        Args:
+            expected: 期望（基准）文件路径
+            actual: 实际输出文件路径
+
+        Returns:
+            VerifyResult: 比较结果
+        """
+        try:
+            expected_size = os.path.getsize(expected)
+        except OSError:
+            return VerifyResult(expected, actual, False, f"期望文件不存在: {expected}")
+        try:
+            actual_size = os.path.getsize(actual)
+        except OSError:
+            return VerifyResult(expected, actual, False, f"实际文件不存在: {actual}")
+        if expected_size != actual_size:
+            cls._metrics.increment("verify.size_mismatch")
+            return VerifyResult(expected, actual, False, f"文件大小不同: {expected_size} != {actual_size} 字节")
+        if os.path.samefile(expected, actual):
+            return VerifyResult(expected, actual, True)
+        if cls.digest(expected) != cls.digest(actual):
+            return VerifyResult(expected, actual, False, f"文件内容不同（{HASH_ALGORITHM} 哈希不一致）")
+        return VerifyResult(expected, actual, True)
+
+    @classmethod
+    def verify_many(
+        cls,
+        pairs: Iterable[Tuple[str, str]],
+        workers: int = FILE_VERIFY_WORKERS
+    ) -> List[VerifyResult]:
+        """批量比较文件
+
+        Args:
+            pairs: (期望文件, 实际文件) 列表
+            workers: 线程数
+
+        Returns:
+            List[VerifyResult]: 与输入顺序一致的比较结果
+        """
+        pairs = list(pairs)
+        if not pairs:
+            return []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pairs)))) as pool:
+            results = list(pool.map(lambda pair: cls.files_equal(*pair), pairs))
+        cls._metrics.observe("verify.batch.latency", time.perf_counter() - start)
+        return results
+
+    @classmethod
+    def cache_info(cls) -> dict:
+        """哈希缓存统计"""
+        with cls._lock:
+            return {"entries": len(cls._digests), "hits": cls._hits, "misses": cls._misses}
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """清空哈希缓存"""
+        with cls._lock:
+            cls._digests.clear()
+            cls._hits = 0
+            cls._misses = 0
@@ -0,0 +1,229 @@
+"""
+输出文件监视
+
+等待被测应用导出的文件（OCR 结果、扫描 PDF 等）生成并写入完成，文件就绪后立即返回，
+不再固定等待最坏情况的时间：
+    - Linux 上通过 inotify 监视所在目录，文件创建、写入、关闭时立即唤醒
+    - 其他平台或 inotify 不可用时退化为轮询
+写入完成的判定（满足任意一个）：
+    - 写入后关闭文件（IN_CLOSE_WRITE）或由临时文件重命名而来（IN_MOVED_TO）
+    - 文件大小在 stable_window 时间内不再变化
+"""
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from typing import List, NamedTuple, Optional, Tuple
+
+from desktop_test.utils.config import FILE_WAIT_TIMEOUT, FILE_STABLE_WINDOW, FILE_POLL_INTERVAL
+from desktop_test.utils.exceptions import TimeoutError
+from desktop_test.utils.idle import IdleClock, idle_sleep
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.tracing import span
+
+# inotify 事件掩码（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+_EVENT_HEADER = struct.Struct("iIII")
+
+_WAIT_SITE = "FileWatcher.wait_for_file"
+
+_libc = None
+_libc_loaded = False
+
+
+def _load_libc():
+    """加载支持 inotify 的 libc，不可用时返回 None"""
+    global _libc, _libc_loaded
+    if not _libc_loaded:
+        _libc_loaded = True
+        if sys.platform.startswith("linux"):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                if hasattr(libc, "inotify_init1") and hasattr(libc, "inotify_add_watch"):
+                    _libc = libc
+            except OSError:
+                _libc = None
+    return _libc
+
+
+class FileReady(NamedTuple):
+    """文件就绪的结果"""
+    path: str  # 文件路径
+    size: int  # 文件大小（字节）
+    waited: float  # 等待时间（秒）
+    reason: str  # 判定依据：created、close_write、moved、stable
+
+
+class _Inotify:
+    """对一个目录的 inotify 监视"""
+
+    def __init__(self, libc, directory: str):
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, os.strerror(error), directory)
+
+    def read(self, timeout: float) -> List[Tuple[int, str]]:
+        """等待事件，最多等待 timeout 秒
+
+        Returns:
+            List[Tuple[int, str]]: [(事件掩码, 文件名)]
+        """
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """输出文件监视类"""
+
+    _metrics = MetricsRegistry()
+
+    @staticmethod
+    def inotify_available() -> bool:
+        """当前平台是否可以使用 inotify"""
+        return _load_libc() is not None
+
+    @staticmethod
+    def _open(directory: str) -> Optional[_Inotify]:
+        """监视目录，目录不存在或 inotify 不可用时返回 None（使用轮询）"""
+        libc = _load_libc()
+        if libc is None or not os.path.isdir(directory):
+            return None
+        try:
+            return _Inotify(libc, directory)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _stat(path: str) -> Optional[os.stat_result]:
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    @classmethod
+    def wait_for_file(
+        cls,
+        path: str,
+        timeout: float = FILE_WAIT_TIMEOUT,
+        complete: bool = True,
+        stable_window: float = FILE_STABLE_WINDOW,
+        min_size: int = 1,
+        poll_interval: float = FILE_POLL_INTERVAL
+    ) -> FileReady:
+        """等待文件生成（并写入完成）
+
+        Args:
+            path: 文件路径
+            timeout: 超时时间（秒）
+            complete: 是否等待写入完成，False 时文件出现即返回
+            stable_window: 文件大小在该时间内不再变化时视为写入完成（秒）
+            min_size: 视为写入完成的最小文件大小（字节）
+            poll_interval: 无法使用 inotify 时的轮询间隔（秒）
+
+        Returns:
+            FileReady: 文件就绪的结果
+
+        Raises:
+            TimeoutError: 超时前文件未生成或未写入完成
+        """
+        path = os.path.abspath(path)
+        name = os.path.basename(path)
+        start = time.monotonic()
+        deadline = start + timeout
+        with span("wait_for_file", file=name):
+            # 先建立监视再检查文件，避免检查之后、监视之前生成的文件被漏掉
+            watcher = cls._open(os.path.dirname(path))
+            try:
+                last_size = None
+                last_change = start
+                while True:
+                    now = time.monotonic()
+                    stat = cls._stat(path)
+                    if stat is not None:
+                        if not complete:
+                            return cls._ready(path, stat, start, "created")
+                        if stat.st_size != last_size:
+                            last_size = stat.st_size
+                            last_change = now
+                        elif stat.st_size >= min_size and now - last_change >= stable_window:
+                            return cls._ready(path, stat, start, "stable")
+                    else:
+                        last_size = None
+                    if now >= deadline:
+                        cls._metrics.increment("file.wait.timeout")
+                        raise TimeoutError(f"等待文件 {path}", timeout)
+
+                    # 文件已达到 min_size 时最多等到大小稳定窗口结束；不存在或还小于 min_size 时
+                    # 等到下一个文件事件或超时（轮询模式按 poll_interval），不能以 0 秒超时空转
+                    wait = deadline - now
+                    if stat is not None and stat.st_size >= min_size:
+                        wait = min(wait, max(0.0, stable_window - (now - last_change)))
+                    if watcher is None:
+                        idle_sleep(min(wait, poll_interval), _WAIT_SITE)
+                        continue
+
+                    wait_start = time.perf_counter()
+                    events = watcher.read(wait)
+                    IdleClock.record(time.perf_counter() - wait_start, _WAIT_SITE)
+                    for mask, event_name in events:
+                        if event_name != name:
+                            continue
+                        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                            stat = cls._stat(path)
+                            if stat is not None and (not complete or stat.st_size >= min_size):
+                                reason = "close_write" if mask & IN_CLOSE_WRITE else "moved"
+                                return cls._ready(path, stat, start, reason if complete else "created")
+                        if mask & (IN_MODIFY | IN_CREATE):
+                            last_change = time.monotonic()
+            finally:
+                if watcher is not None:
+                    watcher.close()
+
+    @classmethod
+    def _ready(cls, path: str, stat: os.stat_result, start: float, reason: str) -> FileReady:
+        """记录等待耗时并返回结果"""
+        waited = time.monotonic() - start
+        cls._metrics.observe("file.wait.latency", waited, reason)
+        return FileReady(path, stat.st_size, waited, reason)
+
+
+def wait_for_file(path: str, timeout: float = FILE_WAIT_TIMEOUT, **kwargs) -> FileReady:
+    """等待文件生成并写入完成，参数见 FileWatcher.wait_for_file"""
+    return FileWatcher.wait_for_file(path, timeout, **kwargs)
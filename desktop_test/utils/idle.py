@@ -0,0 +1,85 @@
+"""
+空闲时间统计
+
+框架内所有的 time.sleep（轮询间隔、重试间隔、截图前等待、拖拽停顿等）都通过
+idle_sleep 执行，按调用位置累计当前测试的空闲秒数，同时写入 "sleep" 直方图和
+追踪 span，用于判断哪些位置值得改为界面稳定检测或自适应轮询。
+"""
+import time
+import threading
+from typing import Dict
+
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.tracing import span
+
+
+class IdleClock:
+    """按调用位置累计空闲时间（每个测试开始时清零）"""
+
+    _sites: Dict[str, float] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def sleep(cls, seconds: float, site: str) -> float:
+        """执行一次计入统计的等待
+
+        Args:
+            seconds: 等待时间（秒）
+            site: 调用位置（如 TestHelper.wait_for_element）
+
+        Returns:
+            float: 实际等待时间（秒）
+        """
+        if seconds <= 0:
+            return 0.0
+        start = time.perf_counter()
+        with span("sleep", site=site):
+            time.sleep(seconds)
+        return cls.record(time.perf_counter() - start, site)
+
+    @classmethod
+    def record(cls, elapsed: float, site: str) -> float:
+        """记录一段已经发生的等待（例如阻塞在 select 上等待文件事件）
+
+        Args:
+            elapsed: 等待时间（秒）
+            site: 调用位置
+
+        Returns:
+            float: 等待时间（秒）
+        """
+        with cls._lock:
+            cls._sites[site] = cls._sites.get(site, 0.0) + elapsed
+        MetricsRegistry().observe("sleep", elapsed, site)
+        return elapsed
+
+    @classmethod
+    def reset(cls) -> None:
+        """清零当前测试的统计"""
+        with cls._lock:
+            cls._sites.clear()
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        """当前测试按调用位置的空闲秒数（降序）"""
+        with cls._lock:
+            return dict(sorted(cls._sites.items(), key=lambda item: -item[1]))
+
+    @classmethod
+    def total(cls) -> float:
+        """当前测试的空闲总秒数"""
+        with cls._lock:
+            return sum(cls._sites.values())
+
+
+def idle_sleep(seconds: float, site: str) -> float:
+    """计入空闲统计的 time.sleep
+
+    Args:
+        seconds: 等待时间（秒）
+        site: 调用位置
+
+    Returns:
+        float: 实际等待时间（秒）
+    """
+    return IdleClock.sleep(seconds, site)
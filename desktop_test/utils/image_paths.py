@@ -1,6 +1,6 @@
 import os
 from desktop_test.utils.config import TEST_DATA_DIR
-from desktop_test.utils.file_validator import FileValidator
+from desktop_test.utils.template_manifest import TemplateManifest
 
 class ImagePaths:
     """图像路径管理类"""
@@ -27,6 +27,7 @@ class ImagePaths:
             'open_button': self._get_toolbar_path('open_button.png'),
             'save_button': self._get_toolbar_path('save_button.png'),
             'print_button': self._get_toolbar_path('print_button.png'),
+            'calculator_icon': self._get_toolbar_path('calculator_icon.png'),
             'ocr_button': self._get_toolbar_path('ocr_button.png'),
             'scan_button': self._get_toolbar_path('scan_button.png')
         }
@@ -91,11 +92,23 @@ class ImagePaths:
         self._validate_paths()
     
     def _validate_paths(self):
-        """验证所有图片路径"""
-        for category, paths in self._paths.items():
-            for name, path in paths.items():
-                if not FileValidator.is_valid_image(path):
-                    raise ValueError(f"无效的图片路径: {category}.{name} -> {path}")
+        """验证所有图片路径
+        
+        校验结果按文件的大小、mtime 和内容哈希缓存在清单中，未变化的文件不再重复校验。
+        
+        Raises:
+            ValueError: 存在无效的图片，错误信息列出全部无效的图片
+        """
+        paths = {
+            f"{category}.{name}": path
+            for category, category_paths in self._paths.items()
+            for name, path in category_paths.items()
+        }
+        failures = TemplateManifest().validate(paths)
+        if failures:
+            raise ValueError(
+                f"无效的图片路径（{len(failures)}/{len(paths)}）:\n{TemplateManifest.format_failures(failures)}"
+            )
     
     def _get_common_path(self, filename):
         """获取通用图片路径"""
@@ -1,39 +1,59 @@
 import os
+from typing import List
 from desktop_test.utils.config import *
 
-def init_project_structure():
-    """初始化项目目录结构"""
-    # 创建主要目录
+def _project_directories() -> List[str]:
+    """项目需要的目录"""
+    # 主要目录
     directories = [
         TEST_DATA_DIR,
         SCREENSHOTS_DIR,
         LOGS_DIR,
         REPORTS_DIR
     ]
-    
-    # 创建测试数据子目录
+
+    # 测试数据子目录
     test_data_subdirs = [
         os.path.join(TEST_DATA_DIR, 'common'),
         os.path.join(TEST_DATA_DIR, 'toolbar'),
         os.path.join(TEST_DATA_DIR, 'file_list'),
         os.path.join(TEST_DATA_DIR, 'ocr'),
-        os.path.join(TEST_DATA_DIR, 'scan')
+        os.path.join(TEST_DATA_DIR, 'scan'),
+        os.path.join(TEST_DATA_DIR, 'states')
     ]
-    
-    # 创建所有目录
-    all_directories = directories + test_data_subdirs
-    
-    for directory in all_directories:
-        os.makedirs(directory, exist_ok=True)
-        print(f"已创建目录: {directory}")
-
-    # 创建 .gitkeep 文件以保持目录结构
-    for directory in all_directories:
+
+    return directories + test_data_subdirs
+
+def init_project_structure(verbose: bool = False) -> List[str]:
+    """初始化项目目录结构
+
+    只创建缺失的目录和 .gitkeep 文件，重复调用不会产生额外的文件操作或输出。
+    导入 desktop_test 不再自动调用，由 pytest_configure 或命令行
+    `python -m desktop_test.utils.init_project` 显式调用。
+
+    Args:
+        verbose: 是否打印创建的目录和文件
+
+    Returns:
+        List[str]: 本次新创建的目录和文件
+    """
+    created = []
+    for directory in _project_directories():
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            created.append(directory)
+            if verbose:
+                print(f"已创建目录: {directory}")
+
+        # 创建 .gitkeep 文件以保持目录结构
         gitkeep_file = os.path.join(directory, '.gitkeep')
         if not os.path.exists(gitkeep_file):
             with open(gitkeep_file, 'w') as f:
                 pass
-            print(f"已创建 .gitkeep 文件: {gitkeep_file}")
+            created.append(gitkeep_file)
+            if verbose:
+                print(f"已创建 .gitkeep 文件: {gitkeep_file}")
+    return created
 
 if __name__ == '__main__':
-    init_project_structure() 
\ No newline at end of file
+    init_project_structure(verbose=True)
@@ -0,0 +1,120 @@
+"""
+输入驱动层
+
+所有鼠标、键盘操作都通过 InputDriver 发出，默认使用 pyautogui 操作真实桌面，
+也可以替换为其他驱动（例如虚拟桌面模拟器），与 ScreenCapture 的帧来源配合使用。
+"""
+from typing import Optional
+
+from desktop_test.utils.lazy_import import lazy_import
+
+pyautogui = lazy_import("pyautogui")
+
+
+class InputDriver:
+    """输入驱动类
+
+    可替换的驱动对象需提供与本类同名的方法：click、double_click、move_to、
+    mouse_down、mouse_up、write、press、key_down、key_up、scroll。
+    """
+
+    _driver = None  # 可替换的输入驱动，None 表示使用 pyautogui
+
+    @classmethod
+    def set_driver(cls, driver) -> None:
+        """设置输入驱动
+
+        Args:
+            driver: 驱动对象，None 表示恢复为 pyautogui
+        """
+        cls._driver = driver
+
+    @classmethod
+    def get_driver(cls):
+        """获取当前输入驱动（None 表示 pyautogui）"""
+        return cls._driver
+
+    @classmethod
+    def click(
+        cls,
+        x: Optional[int] = None,
+        y: Optional[int] = None,
+        clicks: int = 1,
+        interval: float = 0.0,
+        button: str = 'left'
+    ) -> None:
+        """鼠标点击
+
+        Args:
+            x: 横坐标，None 表示当前位置
+            y: 纵坐标
+            clicks: 点击次数
+            interval: 点击间隔
+            button: 鼠标按键 ('left', 'right', 'middle')
+        """
+        if cls._driver is not None:
+            return cls._driver.click(x, y, clicks=clicks, interval=interval, button=button)
+        pyautogui.click(x, y, clicks=clicks, interval=interval, button=button)
+
+    @classmethod
+    def double_click(cls, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        """鼠标双击"""
+        if cls._driver is not None:
+            return cls._driver.double_click(x, y)
+        pyautogui.doubleClick(x, y)
+
+    @classmethod
+    def move_to(cls, x: int, y: int, duration: float = 0.0) -> None:
+        """移动鼠标"""
+        if cls._driver is not None:
+            return cls._driver.move_to(x, y, duration=duration)
+        pyautogui.moveTo(x, y, duration=duration)
+
+    @classmethod
+    def mouse_down(cls, button: str = 'left') -> None:
+        """按下鼠标按键"""
+        if cls._driver is not None:
+            return cls._driver.mouse_down(button=button)
+        pyautogui.mouseDown(button=button)
+
+    @classmethod
+    def mouse_up(cls, button: str = 'left') -> None:
+        """释放鼠标按键"""
+        if cls._driver is not None:
+            return cls._driver.mouse_up(button=button)
+        pyautogui.mouseUp(button=button)
+
+    @classmethod
+    def write(cls, text: str, interval: float = 0.0) -> None:
+        """输入文本"""
+        if cls._driver is not None:
+            return cls._driver.write(text, interval=interval)
+        pyautogui.write(text, interval=interval)
+
+    @classmethod
+    def press(cls, key: str, presses: int = 1, interval: float = 0.0) -> None:
+        """按键"""
+        if cls._driver is not None:
+            return cls._driver.press(key, presses=presses, interval=interval)
+        pyautogui.press(key, presses=presses, interval=interval)
+
+    @classmethod
+    def key_down(cls, key: str) -> None:
+        """按下按键"""
+        if cls._driver is not None:
+            return cls._driver.key_down(key)
+        pyautogui.keyDown(key)
+
+    @classmethod
+    def key_up(cls, key: str) -> None:
+        """释放按键"""
+        if cls._driver is not None:
+            return cls._driver.key_up(key)
+        pyautogui.keyUp(key)
+
+    @classmethod
+    def scroll(cls, amount: int, x: Optional[int] = None, y: Optional[int] = None) -> None:
+        """滚动鼠标滚轮（正数向上，负数向下）"""
+        if cls._driver is not None:
+            return cls._driver.scroll(amount, x, y)
+        pyautogui.scroll(amount, x, y)
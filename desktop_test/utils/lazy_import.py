@@ -0,0 +1,68 @@
+"""
+延迟导入
+
+cv2、numpy、pyautogui、magic 等依赖导入耗时较长，并且 pyautogui 在没有显示器的环境中
+导入就会失败。模块级使用 lazy_import 代替 import，第一次访问属性时才真正导入：
+    cv2 = lazy_import("cv2")
+    np = lazy_import("numpy")
+
+使用延迟模块做类型注解的文件需要 `from __future__ import annotations`，
+否则定义函数时求值注解就会触发导入。
+"""
+import sys
+import types
+import importlib
+import threading
+from typing import Any
+
+
+class LazyModule(types.ModuleType):
+    """第一次访问属性时才导入的模块代理"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        """导入真正的模块（线程安全，只导入一次）"""
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """返回延迟导入的模块
+
+    模块已经导入过时直接返回已导入的模块。
+
+    Args:
+        name: 模块名称
+
+    Returns:
+        types.ModuleType: 模块或延迟模块代理
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_loaded(name: str) -> bool:
+    """模块是否已经真正导入"""
+    return name in sys.modules
@@ -0,0 +1,308 @@
+"""
+日志轮转与保留
+
+按大小和写入时长轮转日志文件和事件流文件。被轮转下来的文件交给后台线程压缩
+（gzip，安装了 zstandard 时可选 zstd），并在后台线程中按数量、天数和目录总大小
+清理旧文件，写日志的线程不会因压缩或清理而阻塞。
+"""
+import os
+import gzip
+import time
+import queue
+import shutil
+import logging
+import threading
+import logging.handlers
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from desktop_test.utils.config import (
+    LOG_MAX_BYTES,
+    LOG_MAX_AGE_HOURS,
+    LOG_BACKUP_COUNT,
+    LOG_RETENTION_DAYS,
+    LOG_RETENTION_MAX_BYTES,
+    LOG_COMPRESSION
+)
+
+try:
+    import zstandard
+except ImportError:  # zstandard 为可选依赖
+    zstandard = None
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+# 正在写入的日志文件，清理时跳过
+_active_paths = set()
+# 已轮转但尚未压缩完成的文件，保留策略不处理
+_pending_paths = set()
+
+
+def register_active_path(path: str) -> None:
+    """登记正在写入的日志文件，避免被目录清理删除"""
+    _active_paths.add(os.path.abspath(path))
+
+
+def _compress_file(path: str, method: Optional[str]) -> str:
+    """压缩文件并删除原文件
+
+    Args:
+        path: 待压缩文件路径
+        method: 压缩方式（'gzip'、'zstd' 或 None）
+
+    Returns:
+        str: 压缩后的文件路径
+    """
+    if not method:
+        return path
+    if method == 'zstd' and zstandard is not None:
+        target = path + '.zst'
+        with open(path, 'rb') as src, open(target, 'wb') as dst:
+            zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+    else:
+        target = path + '.gz'
+        with open(path, 'rb') as src, gzip.open(target, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(path)
+    return target
+
+
+class _BackgroundWorker:
+    """执行压缩和清理任务的后台线程（单例）"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="log-rotation-worker", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def instance(cls) -> "_BackgroundWorker":
+        """获取单例实例"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def submit(self, func, *args) -> None:
+        """提交后台任务"""
+        self._queue.put((func, args))
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """等待已提交的任务执行完毕
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 是否全部完成
+        """
+        done = threading.Event()
+        self.submit(done.set)
+        return done.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            func, args = self._queue.get()
+            try:
+                func(*args)
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"日志后台任务失败: {e}")
+            finally:
+                self._queue.task_done()
+
+
+class LogRotator:
+    """日志轮转策略：决定何时轮转、如何命名、压缩和保留"""
+
+    def __init__(
+        self,
+        max_bytes: int = LOG_MAX_BYTES,
+        max_age_hours: float = LOG_MAX_AGE_HOURS,
+        backup_count: int = LOG_BACKUP_COUNT,
+        compression: Optional[str] = LOG_COMPRESSION
+    ):
+        """
+        Args:
+            max_bytes: 单个文件最大字节数，0 表示不按大小轮转
+            max_age_hours: 单个文件最长写入时长（小时），0 表示不按时长轮转
+            backup_count: 每个日志流保留的轮转文件数量，0 表示不限制
+            compression: 轮转文件压缩方式
+        """
+        self.max_bytes = max_bytes
+        self.max_age = max_age_hours * 3600 if max_age_hours else 0
+        self.backup_count = backup_count
+        self.compression = compression
+
+    def should_rotate(self, size: int, opened_at: float) -> bool:
+        """判断是否需要轮转
+
+        Args:
+            size: 当前文件大小（字节）
+            opened_at: 文件打开时间（time.time()）
+        """
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        if self.max_age and time.time() - opened_at >= self.max_age:
+            return True
+        return False
+
+    def rotate(self, path: str) -> Optional[str]:
+        """将当前文件改名为轮转文件，并在后台压缩和清理
+
+        调用方负责在调用前关闭文件、调用后重新打开。
+
+        Args:
+            path: 当前日志文件路径
+
+        Returns:
+            Optional[str]: 轮转文件路径（压缩前）
+        """
+        try:
+            if os.path.getsize(path) == 0:
+                return None
+        except OSError:
+            return None
+        target = self._rotated_name(path)
+        os.replace(path, target)
+        _pending_paths.add(target)
+        _BackgroundWorker.instance().submit(self._finish_rotation, path, target)
+        return target
+
+    def _finish_rotation(self, path: str, rotated: str) -> None:
+        """后台线程中执行：压缩轮转文件并清理多余的备份"""
+        try:
+            _compress_file(rotated, self.compression)
+        finally:
+            _pending_paths.discard(rotated)
+        self.apply_retention(path)
+
+    def _rotated_name(self, path: str) -> str:
+        """生成不冲突的轮转文件名"""
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        target = f"{path}.{stamp}"
+        index = 1
+        while any(os.path.exists(target + suffix) for suffix in ('',) + COMPRESSED_SUFFIXES):
+            target = f"{path}.{stamp}_{index}"
+            index += 1
+        return target
+
+    @staticmethod
+    def list_backups(path: str) -> List[str]:
+        """列出某个日志流的轮转文件（按修改时间从旧到新）"""
+        directory, name = os.path.split(path)
+        prefix = name + '.'
+        try:
+            entries = [
+                os.path.join(directory, entry) for entry in os.listdir(directory or '.')
+                if entry.startswith(prefix)
+                and os.path.join(directory, entry) not in _pending_paths
+            ]
+        except OSError:
+            return []
+        return sorted(entries, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+
+    def apply_retention(self, path: str) -> None:
+        """只保留最新的 backup_count 个轮转文件"""
+        if not self.backup_count:
+            return
+        backups = self.list_backups(path)
+        for old in backups[:-self.backup_count]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def sweep_directory(
+    directory: str,
+    retention_days: float = LOG_RETENTION_DAYS,
+    max_total_bytes: int = LOG_RETENTION_MAX_BYTES,
+    active_paths: Iterable[str] = ()
+) -> List[str]:
+    """清理日志目录中过期或超出总大小限制的文件
+
+    Args:
+        directory: 日志目录
+        retention_days: 最长保留天数，0 表示不按天数清理
+        max_total_bytes: 目录总大小上限，0 表示不限制
+        active_paths: 正在写入、不可删除的文件
+
+    Returns:
+        List[str]: 被删除的文件
+    """
+    active = {os.path.abspath(p) for p in active_paths} | _active_paths
+    files = []
+    for entry in os.scandir(directory):
+        if not entry.is_file() or entry.name.startswith('.'):
+            continue
+        if os.path.abspath(entry.path) in active or entry.path in _pending_paths:
+            continue
+        stat = entry.stat()
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+
+    removed = []
+    now = time.time()
+    if retention_days:
+        cutoff = now - retention_days * 86400
+        for item in [f for f in files if f[0] < cutoff]:
+            files.remove(item)
+            removed.append(item[2])
+    if max_total_bytes:
+        total = sum(f[1] for f in files)
+        while files and total > max_total_bytes:
+            mtime, size, path = files.pop(0)
+            total -= size
+            removed.append(path)
+    for path in removed:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return removed
+
+
+def schedule_sweep(directory: str) -> None:
+    """在后台线程中清理日志目录"""
+    _BackgroundWorker.instance().submit(sweep_directory, directory)
+
+
+def drain_background_tasks(timeout: Optional[float] = 10) -> bool:
+    """等待后台压缩和清理任务完成"""
+    if _BackgroundWorker._instance is None:
+        return True
+    return _BackgroundWorker._instance.drain(timeout)
+
+
+class RotatingLogHandler(logging.handlers.RotatingFileHandler):
+    """按大小和写入时长轮转的文件日志处理器，压缩在后台线程完成"""
+
+    def __init__(self, filename: str, rotator: Optional[LogRotator] = None, encoding: str = 'utf-8'):
+        self.rotator = rotator or LogRotator()
+        super().__init__(
+            filename,
+            maxBytes=self.rotator.max_bytes,
+            backupCount=0,
+            encoding=encoding
+        )
+        self._opened_at = time.time()
+        register_active_path(self.baseFilename)
+
+    def shouldRollover(self, record) -> bool:
+        if self.rotator.max_age and time.time() - self._opened_at >= self.rotator.max_age:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.rotator.rotate(self.baseFilename)
+        self.stream = self._open()
+        self._opened_at = time.time()
@@ -0,0 +1,276 @@
+"""
+指标注册表
+
+提供计数器和 HDR 风格（对数-线性分桶）的延迟直方图。直方图以微秒为单位记录，
+每个 2 的幂区间再细分为 64 个子桶，相对误差小于 1%，内存占用与样本数量无关，
+可以序列化、合并，用于会话汇总、跨会话累计和看板。
+"""
+import os
+import json
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from desktop_test.utils.config import TEST_DATA_DIR
+
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS  # 128
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1  # 64
+
+
+def _bucket_index(value: int) -> int:
+    """计算数值所在的桶序号"""
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS
+    return _SUB_BUCKET_COUNT + (shift - 1) * _SUB_BUCKET_HALF + ((value >> shift) - _SUB_BUCKET_HALF)
+
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    """计算桶的取值范围 [lower, upper]"""
+    if index < _SUB_BUCKET_COUNT:
+        return index, index
+    shift = (index - _SUB_BUCKET_COUNT) // _SUB_BUCKET_HALF + 1
+    mantissa = (index - _SUB_BUCKET_COUNT) % _SUB_BUCKET_HALF + _SUB_BUCKET_HALF
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+@lru_cache(maxsize=1024)
+def template_label(image_path: str) -> str:
+    """将模板路径转换为简短标签（相对 test_data 的路径）"""
+    try:
+        label = os.path.relpath(image_path, TEST_DATA_DIR)
+    except ValueError:
+        return image_path
+    return image_path if label.startswith('..') else label.replace(os.sep, '/')
+
+
+class Counter:
+    """线程安全的计数器"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def increment(self, value: int = 1) -> None:
+        """增加计数"""
+        with self._lock:
+            self._value += value
+
+    @property
+    def value(self) -> int:
+        """当前计数"""
+        return self._value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化"""
+        return {"value": self._value}
+
+
+class Histogram:
+    """HDR 风格的延迟直方图，记录单位为秒，内部以微秒分桶"""
+
+    def __init__(self):
+        self._buckets: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def record(self, seconds: float) -> None:
+        """记录一个耗时样本
+
+        Args:
+            seconds: 耗时（秒）
+        """
+        index = _bucket_index(max(0, int(seconds * 1_000_000)))
+        with self._lock:
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.total += seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if self.max is None or seconds > self.max:
+                self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        """平均值（秒）"""
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """估算分位数
+
+        Args:
+            q: 分位（0~1）
+
+        Returns:
+            float: 分位数估计值（秒）
+        """
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = max(1, int(round(q * self.count)))
+            seen = 0
+            for index in sorted(self._buckets):
+                seen += self._buckets[index]
+                if seen >= target:
+                    lower, upper = _bucket_bounds(index)
+                    value = (lower + upper) / 2 / 1_000_000
+                    return min(max(value, self.min), self.max)
+            return self.max
+
+    def merge(self, other: "Histogram") -> None:
+        """合并另一个直方图"""
+        with self._lock:
+            for index, count in other._buckets.items():
+                self._buckets[index] = self._buckets.get(index, 0) + count
+            self.count += other.count
+            self.total += other.total
+            if other.min is not None and (self.min is None or other.min < self.min):
+                self.min = other.min
+            if other.max is not None and (self.max is None or other.max > self.max):
+                self.max = other.max
+
+    def summary(self) -> Dict[str, float]:
+        """统计摘要（秒）"""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "min": self.min or 0.0,
+            "p50": self.quantile(0.50),
+            "p90": self.quantile(0.90),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max or 0.0
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化（包含分桶数据，可用 from_dict 还原）"""
+        data = self.summary()
+        with self._lock:
+            data["buckets"] = {str(k): v for k, v in sorted(self._buckets.items())}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Histogram":
+        """从序列化数据还原"""
+        histogram = cls()
+        histogram._buckets = {int(k): v for k, v in data.get("buckets", {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("total", 0.0)
+        if histogram.count:
+            histogram.min = data.get("min")
+            histogram.max = data.get("max")
+        return histogram
+
+
+class MetricsRegistry:
+    """指标注册表（单例），按 (名称, 标签) 管理计数器和直方图"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(MetricsRegistry, cls).__new__(cls)
+            cls._instance._counters = {}
+            cls._instance._histograms = {}
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def counter(self, name: str, label: Optional[str] = None) -> Counter:
+        """获取（或创建）计数器"""
+        key = (name, label)
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def histogram(self, name: str, label: Optional[str] = None) -> Histogram:
+        """获取（或创建）直方图"""
+        key = (name, label)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def increment(self, name: str, label: Optional[str] = None, value: int = 1) -> None:
+        """计数器加值"""
+        self.counter(name, label).increment(value)
+
+    def observe(self, name: str, seconds: float, label: Optional[str] = None) -> None:
+        """记录一个耗时样本"""
+        self.histogram(name, label).record(seconds)
+
+    def histograms(self, name: Optional[str] = None) -> Iterable[Tuple[Tuple[str, Optional[str]], Histogram]]:
+        """遍历直方图（可按名称过滤）"""
+        return [(k, h) for k, h in sorted(self._histograms.items(), key=lambda i: (i[0][0], i[0][1] or ''))
+                if name is None or k[0] == name]
+
+    def counters(self, name: Optional[str] = None) -> Iterable[Tuple[Tuple[str, Optional[str]], Counter]]:
+        """遍历计数器（可按名称过滤）"""
+        return [(k, c) for k, c in sorted(self._counters.items(), key=lambda i: (i[0][0], i[0][1] or ''))
+                if name is None or k[0] == name]
+
+    def reset(self) -> None:
+        """清空所有指标"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出全部指标"""
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "counters": [
+                {"name": name, "label": label, "value": counter.value}
+                for (name, label), counter in self.counters()
+            ],
+            "histograms": [
+                dict(histogram.to_dict(), name=name, label=label, unit="seconds")
+                for (name, label), histogram in self.histograms()
+            ]
+        }
+
+    def dump_json(self, filepath: str) -> str:
+        """将全部指标写入 JSON 文件
+
+        Args:
+            filepath: 输出文件路径
+
+        Returns:
+            str: 输出文件路径
+        """
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return filepath
+
+    def format_summary(self) -> List[str]:
+        """生成文本格式的汇总表（毫秒）"""
+        lines = []
+        histograms = self.histograms()
+        if histograms:
+            # 表头使用 ASCII，避免中文宽字符导致列无法对齐
+            header = f"{'metric':<24} {'label':<36} {'count':>7} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}"
+            lines.append(header)
+            for (name, label), histogram in histograms:
+                s = histogram.summary()
+                lines.append(
+                    f"{name:<24} {(label or '-'):<36.36} {s['count']:>7} "
+                    f"{s['mean'] * 1000:>9.1f} {s['p50'] * 1000:>9.1f} {s['p90'] * 1000:>9.1f} "
+                    f"{s['p99'] * 1000:>9.1f} {s['max'] * 1000:>9.1f}"
+                )
+        counters = self.counters()
+        if counters:
+            if lines:
+                lines.append("")
+            lines.append(f"{'counter':<24} {'label':<36} {'value':>7}")
+            for (name, label), counter in counters:
+                lines.append(f"{name:<24} {(label or '-'):<36.36} {counter.value:>7}")
+        return lines
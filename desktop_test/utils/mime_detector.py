@@ -0,0 +1,225 @@
+"""
+文件类型检测服务
+
+BaseTest 和 FileValidator 共用的 MIME 类型检测：
+    - 只读取文件头（MIME_SNIFF_BYTES 字节）
+    - 已知格式（PDF、DOC、DOCX、OFD、TXT、PNG 等图片）先按魔数判断，无法识别时再交给 libmagic
+    - zip/OLE2 容器的文件头不足以区分时由 libmagic 读取整个文件（DOCX 的 [Content_Types].xml 可能超出文件头）
+    - libmagic 实例全进程共享，只加载一次数据库
+    - 结果按 (路径, 大小, mtime) 缓存
+    - classify_directory 在线程池中并行分类目录中的输出文件
+"""
+import os
+import glob
+import codecs
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from desktop_test.utils.config import MIME_SNIFF_BYTES, MIME_CACHE_SIZE, MIME_CLASSIFY_WORKERS
+from desktop_test.utils.lazy_import import lazy_import
+from desktop_test.utils.metrics import MetricsRegistry
+
+magic = lazy_import("magic")
+
+# 复合文档（OLE2）文件头，DOC/XLS/PPT 共用
+_OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+_ZIP_SIGNATURE = b'PK\x03\x04'
+
+
+class MimeDetector:
+    """文件类型检测类"""
+
+    # 文件类型 -> MIME 类型
+    TYPE_MAPPING = {
+        'PDF': 'application/pdf',
+        'DOC': 'application/msword',
+        'DOCX': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'OFD': 'application/ofd',
+        'TXT': 'text/plain',
+        'PNG': 'image/png'
+    }
+
+    # 图片文件头（魔数） -> MIME 类型
+    IMAGE_SIGNATURES = (
+        (b'\x89PNG\r\n\x1a\n', 'image/png'),
+        (b'\xff\xd8\xff', 'image/jpeg'),
+        (b'GIF87a', 'image/gif'),
+        (b'GIF89a', 'image/gif'),
+        (b'BM', 'image/bmp'),
+        (b'II*\x00', 'image/tiff'),
+        (b'MM\x00*', 'image/tiff'),
+    )
+
+    _metrics = MetricsRegistry()
+    _magic = None  # 共享的 libmagic 实例
+    _magic_lock = threading.Lock()
+    _lock = threading.Lock()
+    _cache: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()  # (路径, 大小, mtime) -> MIME 类型
+
+    @classmethod
+    def _get_magic(cls):
+        """获取共享的 libmagic 实例"""
+        if cls._magic is None:
+            with cls._magic_lock:
+                if cls._magic is None:
+                    cls._magic = magic.Magic(mime=True)
+        return cls._magic
+
+    @classmethod
+    def sniff_image(cls, header: bytes) -> Optional[str]:
+        """根据文件头判断图片类型"""
+        if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+            return 'image/webp'
+        for signature, mime_type in cls.IMAGE_SIGNATURES:
+            if header.startswith(signature):
+                return mime_type
+        return None
+
+    @classmethod
+    def sniff(cls, header: bytes) -> Optional[str]:
+        """根据文件头判断已知格式，无法确定时返回 None
+
+        Args:
+            header: 文件开头的字节
+
+        Returns:
+            Optional[str]: MIME 类型
+        """
+        if not header:
+            return 'inode/x-empty'
+        if header.startswith(b'%PDF-'):
+            return 'application/pdf'
+        if header.startswith(_ZIP_SIGNATURE):
+            # OOXML 和 OFD 都是 zip 包，按包内的文件名区分
+            if b'OFD.xml' in header:
+                return 'application/ofd'
+            if b'word/' in header:
+                return cls.TYPE_MAPPING['DOCX']
+            return None
+        if header.startswith(_OLE2_SIGNATURE):
+            # 目录项名称为 UTF-16LE，包含 WordDocument 流的是 Word 文档
+            if 'WordDocument'.encode('utf-16-le') in header:
+                return 'application/msword'
+            return None
+        image = cls.sniff_image(header)
+        if image is not None:
+            return image
+        # 纯文本：没有 NUL 字节且是合法的 UTF-8；HTML/XML、JSON、脚本、PostScript（%!PS）等交给 libmagic
+        if b'\x00' in header or header.lstrip()[:1] in (b'<', b'{', b'[', b'#', b'%'):
+            return None
+        try:
+            # 文件头可能截断在多字节字符中间
+            codecs.getincrementaldecoder('utf-8')().decode(header, final=len(header) < MIME_SNIFF_BYTES)
+        except UnicodeDecodeError:
+            return None
+        return 'text/plain'
+
+    @staticmethod
+    def _is_container(header: bytes) -> bool:
+        """是否为 zip 或 OLE2 容器（包内的文件名可能不在文件头中）"""
+        return header.startswith(_ZIP_SIGNATURE) or header.startswith(_OLE2_SIGNATURE)
+
+    @staticmethod
+    def _read_header(file_path: str) -> bytes:
+        with open(file_path, 'rb') as f:
+            return f.read(MIME_SNIFF_BYTES)
+
+    @classmethod
+    def detect(cls, file_path: str) -> str:
+        """检测文件的 MIME 类型
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            str: MIME 类型
+
+        Raises:
+            OSError: 文件不存在或不可读
+        """
+        stat = os.stat(file_path)
+        key = (os.path.realpath(file_path), stat.st_size, stat.st_mtime_ns)
+        with cls._lock:
+            cached = cls._cache.get(key)
+            if cached is not None:
+                cls._cache.move_to_end(key)
+                return cached
+
+        header = cls._read_header(file_path)
+        mime_type = cls.sniff(header)
+        if mime_type is None:
+            cls._metrics.increment("mime.libmagic")
+            if cls._is_container(header):
+                mime_type = cls._get_magic().from_file(file_path)
+            else:
+                mime_type = cls._get_magic().from_buffer(header)
+        else:
+            cls._metrics.increment("mime.signature")
+
+        with cls._lock:
+            cls._cache[key] = mime_type
+            while len(cls._cache) > MIME_CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return mime_type
+
+    @classmethod
+    def expected_mime(cls, file_type: str) -> Optional[str]:
+        """文件类型（如 'PDF'）对应的 MIME 类型"""
+        return cls.TYPE_MAPPING.get(file_type.upper())
+
+    @classmethod
+    def matches(cls, file_path: str, file_type: str) -> Tuple[bool, str]:
+        """文件是否为指定类型
+
+        Args:
+            file_path: 文件路径
+            file_type: 文件类型（如 'PDF', 'DOC', 'DOCX', 'OFD', 'TXT', 'PNG'）
+
+        Returns:
+            Tuple[bool, str]: (是否匹配, 实际的 MIME 类型)
+        """
+        actual = cls.detect(file_path)
+        expected = cls.expected_mime(file_type)
+        return expected is not None and actual == expected, actual
+
+    @classmethod
+    def classify_directory(
+        cls,
+        directory: str,
+        pattern: str = "*",
+        recursive: bool = False,
+        workers: int = MIME_CLASSIFY_WORKERS
+    ) -> Dict[str, str]:
+        """并行检测目录中文件的 MIME 类型
+
+        Args:
+            directory: 目录路径
+            pattern: 文件名匹配模式
+            recursive: 是否包含子目录
+            workers: 线程数
+
+        Returns:
+            Dict[str, str]: 文件路径 -> MIME 类型（无法读取的文件不包含在内）
+        """
+        search = os.path.join(directory, "**", pattern) if recursive else os.path.join(directory, pattern)
+        paths = sorted(path for path in glob.glob(search, recursive=recursive) if os.path.isfile(path))
+        if not paths:
+            return {}
+
+        def detect(path: str) -> Optional[str]:
+            try:
+                return cls.detect(path)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+            results = list(pool.map(detect, paths))
+        return {path: mime_type for path, mime_type in zip(paths, results) if mime_type is not None}
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """清空检测结果缓存"""
+        with cls._lock:
+            cls._cache.clear()
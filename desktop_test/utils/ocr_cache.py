@@ -0,0 +1,207 @@
+"""
+OCR 结果缓存
+
+按预处理后区域像素的哈希（加上语言、页面分割模式和识别引擎）缓存识别结果，
+轮询等待文本变化时，只有像素真的变化了才需要重新识别：
+    - 内存层：LRU，按文本和键的字节数计入预算，超出 OCR_CACHE_MAX_BYTES 时淘汰最久未用的条目
+    - 磁盘层（可选）：OCR_CACHE_DIR 下每个键一个 JSON 文件，跨运行、跨进程共享，
+      写入时先写临时文件再原子替换；命中时刷新 mtime，创建缓存时删除超过
+      OCR_DISK_CACHE_MAX_AGE_DAYS 未命中的条目，并按 OCR_DISK_CACHE_MAX_BYTES 删除最久未命中的条目
+键中的识别引擎部分由调用方提供，应包含引擎版本和语言数据指纹，升级 Tesseract 或更换语言数据后不会命中旧结果。
+"""
+import os
+import json
+import shutil
+import hashlib
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from desktop_test.utils.config import (
+    OCR_CACHE_MAX_BYTES,
+    OCR_DISK_CACHE,
+    OCR_CACHE_DIR,
+    OCR_DISK_CACHE_MAX_AGE_DAYS,
+    OCR_DISK_CACHE_MAX_BYTES
+)
+from desktop_test.utils.metrics import MetricsRegistry
+
+# 每个条目除文本外的固定开销估计（字节）
+_ENTRY_OVERHEAD = 96
+
+
+def region_key(gray, lang: str, psm: int, backend: str) -> str:
+    """预处理后区域像素的缓存键
+
+    Args:
+        gray: 单通道 uint8 图像（连续内存）
+        lang: 识别语言
+        psm: 页面分割模式
+        backend: 识别引擎（名称、版本、语言数据指纹和预处理签名）
+
+    Returns:
+        str: 十六进制哈希
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{backend}|{lang}|{psm}|{gray.shape[0]}x{gray.shape[1]}|".encode("utf-8"))
+    digest.update(gray.data)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """OCR 结果缓存类"""
+
+    def __init__(
+        self,
+        max_bytes: int = OCR_CACHE_MAX_BYTES,
+        directory: Optional[str] = OCR_CACHE_DIR if OCR_DISK_CACHE else None
+    ):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = MetricsRegistry()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_pruned": 0}
+        if self.directory:
+            self.prune()
+
+    @staticmethod
+    def _cost(key: str, text: str) -> int:
+        return len(key) + len(text.encode("utf-8")) + _ENTRY_OVERHEAD
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        """查找缓存（先内存后磁盘）
+
+        Returns:
+            Optional[Tuple[str, Optional[float]]]: (文本, 置信度)，未命中时为 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                self._metrics.increment("ocr.cache.hit", "memory")
+                return entry
+        if self.directory:
+            path = self._disk_path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                entry = (data["text"], data.get("confidence"))
+            except (OSError, ValueError, KeyError):
+                entry = None
+            if entry is not None:
+                try:
+                    os.utime(path)  # 按最后一次命中时间清理
+                except OSError:
+                    pass
+                self._put_memory(key, entry)
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                self._metrics.increment("ocr.cache.hit", "disk")
+                return entry
+        with self._lock:
+            self._stats["misses"] += 1
+        self._metrics.increment("ocr.cache.miss")
+        return None
+
+    def put(self, key: str, text: str, confidence: Optional[float] = None) -> None:
+        """写入缓存（内存和磁盘）"""
+        self._put_memory(key, (text, confidence))
+        if self.directory:
+            self._put_disk(key, text, confidence)
+
+    def _put_memory(self, key: str, entry: Tuple[str, Optional[float]]) -> None:
+        cost = self._cost(key, entry[0])
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._cost(key, previous[0])
+            self._entries[key] = entry
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self._bytes -= self._cost(old_key, old_entry[0])
+                self._stats["evictions"] += 1
+
+    def _put_disk(self, key: str, text: str, confidence: Optional[float]) -> None:
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"text": text, "confidence": confidence}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # 磁盘缓存写入失败不影响识别
+
+    def prune(
+        self,
+        max_age_days: float = OCR_DISK_CACHE_MAX_AGE_DAYS,
+        max_bytes: int = OCR_DISK_CACHE_MAX_BYTES
+    ) -> List[str]:
+        """清理磁盘缓存中过期或超出总大小限制的条目
+
+        Args:
+            max_age_days: 最长保留天数（按最后一次命中计算），0 表示不按天数清理
+            max_bytes: 总大小上限（字节），0 表示不限制
+
+        Returns:
+            List[str]: 被删除的文件
+        """
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        removed = []
+        if max_age_days:
+            cutoff = time.time() - max_age_days * 86400
+            while files and files[0][0] < cutoff:
+                removed.append(files.pop(0)[2])
+        if max_bytes:
+            total = sum(size for _, size, _ in files)
+            while files and total > max_bytes:
+                _, size, path = files.pop(0)
+                total -= size
+                removed.append(path)
+        for path in removed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._stats["disk_pruned"] += len(removed)
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+
+    def clear(self, disk: bool = False) -> None:
+        """清空内存缓存（disk 为 True 时同时删除磁盘缓存）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if disk and self.directory and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,496 @@
+"""
+OCR 引擎
+
+常驻的文字识别引擎，避免每次识别都启动一次 tesseract 进程并写临时文件：
+    - 安装了 tesserocr 时，每个工作线程持有一个常驻的 PyTessBaseAPI（进程内识别，
+      识别期间释放 GIL，多个区域可以并行识别）
+    - 否则使用 tesseract 命令行的批量模式：一批区域写入列表文件，由一个 tesseract
+      进程依次识别，按页分隔符拆分结果；一个批次按工作线程数拆分后并行识别
+调用方可以一次提交同一帧上的多个区域：
+    OCREngine().recognize_regions(frame, [(left, top, width, height), ...])
+识别前按 OCR_PREPROCESS_STEPS 预处理每个区域（见 ocr_preprocess）；识别结果按预处理前的
+区域像素哈希缓存（见 ocr_cache），像素未变化的区域不会重复预处理和识别；缓存键包含引擎版本和
+语言数据文件的大小与 mtime，升级 Tesseract 或更换语言数据后不会命中旧结果。
+recognize_words 做版面识别，返回每个词的文本、位置和置信度（供 text_locator 使用）。
+"""
+import os
+import re
+import time
+import atexit
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from desktop_test.utils.config import (
+    OCR_BACKEND,
+    OCR_LANG,
+    OCR_PSM,
+    OCR_LAYOUT_PSM,
+    OCR_WORKERS,
+    OCR_TESSERACT_CMD,
+    OCR_TESSDATA_DIR,
+    OCR_PREPROCESS
+)
+from desktop_test.utils.custom_logger import CustomLogger
+from desktop_test.utils.exceptions import OCRError
+from desktop_test.utils.lazy_import import lazy_import
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.ocr_cache import OCRCache, region_key
+from desktop_test.utils.ocr_preprocess import OCRPreprocessor
+from desktop_test.utils.tracing import span
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+Region = Tuple[int, int, int, int]
+
+# tesseract 命令行在每页文本之后输出的分隔符（page_separator 的默认值）
+_PAGE_SEPARATOR = "\f"
+
+
+class OCRResult(NamedTuple):
+    """一个区域的识别结果"""
+    text: str  # 识别出的文本（已去掉首尾空白）
+    confidence: Optional[float] = None  # 平均置信度（0~100），命令行模式下为 None
+    region: Optional[Region] = None  # 区域 (left, top, width, height)
+
+
+class OCRWord(NamedTuple):
+    """版面识别出的一个词"""
+    text: str  # 词文本
+    box: Region  # 词在图片中的位置 (left, top, width, height)
+    confidence: float  # 置信度（0~100）
+
+
+def _to_gray(image) -> "np.ndarray":
+    """转换为连续内存的单通道灰度图"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return np.ascontiguousarray(image, dtype=np.uint8)
+
+
+def _tessdata_fingerprint(directory: Optional[str], lang: str) -> str:
+    """语言数据文件的指纹（每种语言的 traineddata 大小和 mtime）"""
+    parts = []
+    for name in lang.split("+"):
+        try:
+            stat = os.stat(os.path.join(directory or "", f"{name}.traineddata"))
+            parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{name}:?")
+    return f"{directory}|{','.join(parts)}"
+
+
+class _TesserocrBackend:
+    """进程内识别：每个线程一个常驻的 tesserocr.PyTessBaseAPI"""
+
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self.version = tesserocr.tesseract_version().splitlines()[0].strip()
+        # get_languages 的 path 参数不接受 None，未配置目录时使用默认目录
+        self.tessdata = (tesserocr.get_languages(OCR_TESSDATA_DIR) if OCR_TESSDATA_DIR else tesserocr.get_languages())[0]
+        self._local = threading.local()
+        self._apis = []
+        self._lock = threading.Lock()
+        # 立即创建一个实例，语言数据缺失等问题在选择引擎时就暴露出来
+        self._api(OCR_LANG)
+
+    def _api(self, lang: str):
+        """当前线程的识别实例（按语言缓存）"""
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get(lang)
+        if api is None:
+            kwargs = {"lang": lang}
+            if OCR_TESSDATA_DIR:
+                kwargs["path"] = OCR_TESSDATA_DIR
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            apis[lang] = api
+            with self._lock:
+                self._apis.append(api)
+        return api
+
+    def recognize(self, image, lang: str, psm: int) -> OCRResult:
+        api = self._api(lang)
+        gray = _to_gray(image)
+        height, width = gray.shape
+        api.SetPageSegMode(psm)
+        api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+        text = api.GetUTF8Text()
+        return OCRResult(text.strip(), float(api.MeanTextConf()))
+
+    def recognize_many(self, images: Sequence, lang: str, psm: int, executor: ThreadPoolExecutor) -> List[OCRResult]:
+        if len(images) == 1:
+            return [self.recognize(images[0], lang, psm)]
+        return list(executor.map(lambda image: self.recognize(image, lang, psm), images))
+
+    def words(self, image, lang: str, psm: int) -> List[OCRWord]:
+        api = self._api(lang)
+        gray = _to_gray(image)
+        height, width = gray.shape
+        api.SetPageSegMode(psm)
+        api.SetImageBytes(gray.tobytes(), width, height, 1, width)
+        api.Recognize()
+        iterator = api.GetIterator()
+        if iterator is None:
+            return []
+        level = self._tesserocr.RIL.WORD
+        words = []
+        for item in self._tesserocr.iterate_level(iterator, level):
+            text = item.GetUTF8Text(level)
+            box = item.BoundingBox(level)
+            if not text or not text.strip() or box is None:
+                continue
+            left, top, right, bottom = box
+            words.append(OCRWord(text.strip(), (left, top, right - left, bottom - top), float(item.Confidence(level))))
+        return words
+
+    def words_many(self, images: Sequence, lang: str, psm: int, executor: ThreadPoolExecutor) -> List[List[OCRWord]]:
+        if len(images) == 1:
+            return [self.words(images[0], lang, psm)]
+        return list(executor.map(lambda image: self.words(image, lang, psm), images))
+
+    def close(self) -> None:
+        with self._lock:
+            for api in self._apis:
+                api.End()
+            self._apis.clear()
+
+
+class _CliBackend:
+    """命令行批量识别：一个 tesseract 进程识别列表文件中的全部图片"""
+
+    name = "tesseract"
+
+    def __init__(self):
+        try:
+            process = subprocess.run([OCR_TESSERACT_CMD, "--version"], capture_output=True, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise OCRError("初始化", f"找不到 tesseract: {e}")
+        # 旧版本的 tesseract 把版本信息输出到 stderr
+        output = (process.stdout or process.stderr).decode("utf-8", "replace").strip()
+        self.version = output.splitlines()[0].strip() if output else "unknown"
+        self.tessdata = OCR_TESSDATA_DIR or self._default_tessdata()
+
+    @staticmethod
+    def _default_tessdata() -> Optional[str]:
+        """tesseract 默认的语言数据目录（--list-langs 输出的 List of available languages in "..."）"""
+        if os.environ.get("TESSDATA_PREFIX"):
+            return os.environ["TESSDATA_PREFIX"]
+        try:
+            process = subprocess.run([OCR_TESSERACT_CMD, "--list-langs"], capture_output=True, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        match = re.search(r'languages in "([^"]+)"', (process.stdout + process.stderr).decode("utf-8", "replace"))
+        return match.group(1) if match else None
+
+    def _run(self, images: Sequence, lang: str, psm: int, *configs: str) -> str:
+        """用一个 tesseract 进程识别一批图片，返回标准输出"""
+        with tempfile.TemporaryDirectory(prefix="ocr_") as directory:
+            paths = []
+            for index, image in enumerate(images):
+                path = os.path.join(directory, f"{index:05d}.png")
+                cv2.imwrite(path, _to_gray(image))
+                paths.append(path)
+            list_file = os.path.join(directory, "images.txt")
+            with open(list_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(paths) + "\n")
+            command = [OCR_TESSERACT_CMD, list_file, "stdout", "-l", lang, "--psm", str(psm)]
+            if OCR_TESSDATA_DIR:
+                command += ["--tessdata-dir", OCR_TESSDATA_DIR]
+            process = subprocess.run(command + list(configs), capture_output=True)
+        if process.returncode != 0:
+            raise OCRError("识别", process.stderr.decode("utf-8", "replace").strip())
+        return process.stdout.decode("utf-8", "replace")
+
+    def _texts(self, images: Sequence, lang: str, psm: int) -> List[OCRResult]:
+        pages = self._run(images, lang, psm).split(_PAGE_SEPARATOR)
+        if len(pages) < len(images):
+            raise OCRError("识别", f"识别结果数量不符: {len(pages)} < {len(images)}")
+        return [OCRResult(page.strip()) for page in pages[:len(images)]]
+
+    def _words(self, images: Sequence, lang: str, psm: int) -> List[List[OCRWord]]:
+        """tsv 输出：每行一个版面元素，level 为 5 的是词，page_num 对应列表文件中的第几张图片"""
+        pages: List[List[OCRWord]] = [[] for _ in images]
+        lines = self._run(images, lang, psm, "tsv").splitlines()
+        for line in lines[1:]:
+            fields = line.split("\t")
+            if len(fields) < 12 or fields[0] != "5":
+                continue
+            text = fields[11].strip()
+            page = int(fields[1]) - 1
+            if not text or not 0 <= page < len(pages):
+                continue
+            left, top, width, height = (int(value) for value in fields[6:10])
+            pages[page].append(OCRWord(text, (left, top, width, height), float(fields[10])))
+        return pages
+
+    @staticmethod
+    def _batched(run, images: Sequence, lang: str, psm: int, executor: ThreadPoolExecutor) -> list:
+        """按工作线程数拆成连续的批次，每个批次只启动一次 tesseract"""
+        workers = max(1, min(OCR_WORKERS, len(images)))
+        size = -(-len(images) // workers)
+        batches = [images[start:start + size] for start in range(0, len(images), size)]
+        if len(batches) == 1:
+            return run(batches[0], lang, psm)
+        results = []
+        for batch in executor.map(lambda batch: run(batch, lang, psm), batches):
+            results.extend(batch)
+        return results
+
+    def recognize_many(self, images: Sequence, lang: str, psm: int, executor: ThreadPoolExecutor) -> List[OCRResult]:
+        return self._batched(self._texts, images, lang, psm, executor)
+
+    def words_many(self, images: Sequence, lang: str, psm: int, executor: ThreadPoolExecutor) -> List[List[OCRWord]]:
+        return self._batched(self._words, images, lang, psm, executor)
+
+    def close(self) -> None:
+        pass
+
+
+_BACKENDS = {"tesserocr": _TesserocrBackend, "tesseract": _CliBackend}
+
+
+class OCREngine:
+    """OCR 引擎（单例）"""
+
+    _instance = None
+    _lock = threading.Lock()
+    _logger = CustomLogger()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super(OCREngine, cls).__new__(cls)
+                    instance._initialize()
+                    cls._instance = instance
+        return cls._instance
+
+    def _initialize(self):
+        """初始化工作线程池（识别引擎在第一次识别时创建）"""
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+        self._metrics = MetricsRegistry()
+        self._cache = OCRCache()
+        self._preprocessor = OCRPreprocessor()
+        self._variants: Dict[Tuple[str, str], str] = {}
+        atexit.register(self.shutdown)
+
+    @property
+    def backend(self):
+        """当前使用的识别引擎"""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = self._create_backend()
+        return self._backend
+
+    @staticmethod
+    def _create_backend():
+        """按配置创建识别引擎，'auto' 时优先 tesserocr（回退到下一个引擎时记录前一个引擎的错误）"""
+        names = ("tesserocr", "tesseract") if OCR_BACKEND == "auto" else (OCR_BACKEND,)
+        errors = []
+        for name in names:
+            try:
+                backend = _BACKENDS[name]()
+            except Exception as e:
+                errors.append(f"{name}: {type(e).__name__}: {e}")
+                continue
+            if errors:
+                OCREngine._logger.warning(f"OCR 引擎初始化失败，改用 {name}: {'; '.join(errors)}")
+            return backend
+        raise OCRError("初始化", "; ".join(errors))
+
+    def _variant(self, backend, lang: str, preprocess: bool) -> str:
+        """缓存键中的识别引擎部分：名称、版本、语言数据指纹（按语言缓存）和预处理签名"""
+        key = (backend.name, lang)
+        engine = self._variants.get(key)
+        if engine is None:
+            fingerprint = _tessdata_fingerprint(backend.tessdata, lang)
+            engine = self._variants[key] = f"{backend.name}|{backend.version}|{fingerprint}"
+        return f"{engine}|{self._preprocessor.signature}" if preprocess else engine
+
+    @property
+    def cache(self) -> OCRCache:
+        """识别结果缓存"""
+        return self._cache
+
+    @property
+    def preprocessor(self) -> OCRPreprocessor:
+        """识别前的预处理流水线"""
+        return self._preprocessor
+
+    def _preprocess(self, grays: Sequence, steps: Optional[Sequence[str]] = None) -> list:
+        """并行预处理一批区域（每个线程复用自己的缓冲区）"""
+        if len(grays) == 1:
+            return [self._preprocessor.apply(grays[0], steps)]
+        return list(self._executor.map(lambda gray: self._preprocessor.apply(gray, steps), grays))
+
+    def recognize(
+        self,
+        image,
+        lang: Optional[str] = None,
+        psm: Optional[int] = None,
+        use_cache: bool = True,
+        preprocess: Optional[bool] = None
+    ) -> OCRResult:
+        """识别一张图片
+
+        Args:
+            image: BGR 或灰度图像
+            lang: 识别语言，None 表示 OCR_LANG
+            psm: 页面分割模式，None 表示 OCR_PSM
+            use_cache: 是否使用识别结果缓存
+            preprocess: 是否预处理，None 表示 OCR_PREPROCESS
+
+        Returns:
+            OCRResult: 识别结果
+        """
+        return self.recognize_images([image], lang, psm, use_cache, preprocess)[0]
+
+    def recognize_images(
+        self,
+        images: Sequence,
+        lang: Optional[str] = None,
+        psm: Optional[int] = None,
+        use_cache: bool = True,
+        preprocess: Optional[bool] = None
+    ) -> List[OCRResult]:
+        """批量识别多张图片（并行）
+
+        像素、语言和页面分割模式都相同的图片直接使用缓存的结果，同一批中的重复图片只预处理和识别一次。
+
+        Args:
+            images: BGR 或灰度图像列表
+            lang: 识别语言，None 表示 OCR_LANG
+            psm: 页面分割模式，None 表示 OCR_PSM
+            use_cache: 是否使用识别结果缓存
+            preprocess: 是否预处理，None 表示 OCR_PREPROCESS
+
+        Returns:
+            List[OCRResult]: 与输入顺序一致的识别结果
+        """
+        if not images:
+            return []
+        backend = self.backend
+        lang = lang or OCR_LANG
+        psm = OCR_PSM if psm is None else psm
+        preprocess = OCR_PREPROCESS if preprocess is None else preprocess
+        variant = self._variant(backend, lang, preprocess)
+        grays = [_to_gray(image) for image in images]
+        results: List[Optional[OCRResult]] = [None] * len(grays)
+
+        # 按像素哈希查找缓存，未命中的图片按键去重后再识别
+        pending: Dict[str, List[int]] = {}
+        for index, gray in enumerate(grays):
+            key = region_key(gray, lang, psm, variant) if use_cache else str(index)
+            cached = self._cache.get(key) if use_cache and key not in pending else None
+            if cached is not None:
+                results[index] = OCRResult(*cached)
+            else:
+                pending.setdefault(key, []).append(index)
+
+        if pending:
+            keys = list(pending)
+            inputs = [grays[pending[key][0]] for key in keys]
+            start = time.perf_counter()
+            with span("ocr", backend=backend.name, images=len(keys)):
+                if preprocess:
+                    inputs = [prepared.image for prepared in self._preprocess(inputs)]
+                recognized = backend.recognize_many(inputs, lang, psm, self._executor)
+            self._metrics.observe("ocr.batch.latency", time.perf_counter() - start, backend.name)
+            self._metrics.increment("ocr.regions", backend.name, len(keys))
+            for key, result in zip(keys, recognized):
+                if use_cache:
+                    self._cache.put(key, result.text, result.confidence)
+                for index in pending[key]:
+                    results[index] = result
+        return results
+
+    def recognize_regions(
+        self,
+        frame,
+        regions: Sequence[Region],
+        lang: Optional[str] = None,
+        psm: Optional[int] = None,
+        use_cache: bool = True,
+        preprocess: Optional[bool] = None
+    ) -> List[OCRResult]:
+        """批量识别同一帧上的多个区域（只预处理区域本身，不处理整帧）
+
+        Args:
+            frame: 屏幕帧（BGR）
+            regions: 区域列表 (left, top, width, height)
+            lang: 识别语言
+            psm: 页面分割模式
+            use_cache: 是否使用识别结果缓存
+            preprocess: 是否预处理，None 表示 OCR_PREPROCESS
+
+        Returns:
+            List[OCRResult]: 与区域顺序一致的识别结果
+        """
+        crops = []
+        for left, top, width, height in regions:
+            crop = frame[max(0, top):top + height, max(0, left):left + width]
+            if crop.size == 0:
+                raise OCRError("识别", f"区域超出屏幕范围: {(left, top, width, height)}")
+            crops.append(crop)
+        results = self.recognize_images(crops, lang, psm, use_cache, preprocess)
+        return [result._replace(region=tuple(region)) for result, region in zip(results, regions)]
+
+    def recognize_words(
+        self,
+        images: Sequence,
+        lang: Optional[str] = None,
+        psm: Optional[int] = None,
+        preprocess: Optional[bool] = None
+    ) -> List[List[OCRWord]]:
+        """批量版面识别（并行），返回每张图片中的词
+
+        预处理时不做纠偏旋转，词的位置按裁边和缩放换算回原图坐标。
+
+        Args:
+            images: BGR 或灰度图像列表
+            lang: 识别语言，None 表示 OCR_LANG
+            psm: 页面分割模式，None 表示 OCR_LAYOUT_PSM
+            preprocess: 是否预处理，None 表示 OCR_PREPROCESS
+
+        Returns:
+            List[List[OCRWord]]: 与输入顺序一致的词列表，坐标相对于各自的图片
+        """
+        if not images:
+            return []
+        backend = self.backend
+        lang = lang or OCR_LANG
+        psm = OCR_LAYOUT_PSM if psm is None else psm
+        preprocess = OCR_PREPROCESS if preprocess is None else preprocess
+        start = time.perf_counter()
+        with span("ocr_layout", backend=backend.name, images=len(images)):
+            grays = [_to_gray(image) for image in images]
+            if not preprocess:
+                words = backend.words_many(grays, lang, psm, self._executor)
+            else:
+                steps = [step for step in self._preprocessor.steps if step != "deskew"]
+                prepared = self._preprocess(grays, steps)
+                words = backend.words_many([item.image for item in prepared], lang, psm, self._executor)
+                words = [[word._replace(box=item.to_source(word.box)) for word in page]
+                         for item, page in zip(prepared, words)]
+        self._metrics.observe("ocr.layout.latency", time.perf_counter() - start, backend.name)
+        self._metrics.increment("ocr.layout.images", backend.name, len(images))
+        return words
+
+    def shutdown(self) -> None:
+        """释放识别引擎和工作线程"""
+        self._executor.shutdown(wait=False)
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+            self._variants.clear()
@@ -0,0 +1,205 @@
+"""
+OCR 预处理
+
+识别前对区域图像做预处理，只处理调用方提交的区域，不处理整帧屏幕：
+    - grayscale：转换为灰度，并统一为白底黑字（深色主题的区域会被反相）
+    - trim：裁掉四周没有文字的边框
+    - scale：按连通域高度估计字高，缩放到 OCR_TARGET_X_HEIGHT
+    - binarize：自适应阈值二值化
+    - deskew：按文字像素的最小外接矩形纠正倾斜
+全部步骤由 cv2/numpy 的整幅运算完成；中间结果写入每个线程复用的缓冲区，
+只有最终结果会分配新的数组。
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+from desktop_test.utils.config import (
+    OCR_PREPROCESS_STEPS,
+    OCR_TARGET_X_HEIGHT,
+    OCR_BINARIZE_BLOCK,
+    OCR_BINARIZE_C,
+    OCR_MAX_SKEW,
+    OCR_TRIM_MARGIN,
+    OCR_INK_CONTRAST
+)
+from desktop_test.utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+# 可选的步骤（grayscale 总是执行），按此顺序执行
+STEPS = ("trim", "scale", "binarize", "deskew")
+
+# 缩放比例的范围，以及视为不需要缩放的偏差
+_SCALE_RANGE = (0.5, 4.0)
+_SCALE_TOLERANCE = 0.1
+# 小于该角度（度）的倾斜不纠正
+_MIN_SKEW = 0.3
+# 估计字高时忽略的噪点面积（像素）
+_MIN_COMPONENT_AREA = 4
+
+
+class Preprocessed(NamedTuple):
+    """预处理结果"""
+    image: np.ndarray  # 白底黑字的单通道图像
+    scale: float = 1.0  # 相对于原图的缩放比例
+    offset: Tuple[int, int] = (0, 0)  # 裁边后左上角在原图中的位置 (x, y)
+    angle: float = 0.0  # 纠偏旋转的角度（度）
+
+    def to_source(self, box: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        """把预处理后图像中的矩形换算回原图坐标（忽略纠偏旋转）"""
+        left, top, width, height = box
+        return (int(round(left / self.scale)) + self.offset[0], int(round(top / self.scale)) + self.offset[1],
+                max(1, int(round(width / self.scale))), max(1, int(round(height / self.scale))))
+
+
+class OCRPreprocessor:
+    """OCR 预处理流水线类"""
+
+    def __init__(
+        self,
+        steps: Sequence[str] = OCR_PREPROCESS_STEPS,
+        x_height: int = OCR_TARGET_X_HEIGHT,
+        block_size: int = OCR_BINARIZE_BLOCK,
+        threshold_offset: int = OCR_BINARIZE_C,
+        max_skew: float = OCR_MAX_SKEW,
+        margin: int = OCR_TRIM_MARGIN,
+        ink_contrast: int = OCR_INK_CONTRAST
+    ):
+        unknown = set(steps) - set(STEPS)
+        if unknown:
+            raise ValueError(f"未知的预处理步骤: {', '.join(sorted(unknown))}")
+        self.steps = tuple(step for step in STEPS if step in steps)
+        self.x_height = x_height
+        self.block_size = block_size | 1
+        self.threshold_offset = threshold_offset
+        self.max_skew = max_skew
+        self.margin = margin
+        self.ink_contrast = ink_contrast
+        self._local = threading.local()
+
+    @property
+    def signature(self) -> str:
+        """预处理参数的签名（作为识别结果缓存键的一部分）"""
+        return (f"{','.join(self.steps)}|x{self.x_height}|b{self.block_size}|c{self.threshold_offset}"
+                f"|s{self.max_skew}|m{self.margin}|i{self.ink_contrast}")
+
+    def _buffer(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """当前线程复用的缓冲区（容量不足时才重新分配）"""
+        buffers: Optional[Dict[str, np.ndarray]] = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        size = int(np.prod(shape))
+        buffer = buffers.get(name)
+        if buffer is None or buffer.size < size:
+            buffer = buffers[name] = np.empty(size, dtype=np.uint8)
+        return buffer[:size].reshape(shape)
+
+    def _grayscale(self, image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """转换为白底黑字的灰度图
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (灰度图, 文字像素掩码)
+        """
+        if image.ndim == 3:
+            code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            gray = cv2.cvtColor(image, code, dst=self._buffer("gray", image.shape[:2]))
+        else:
+            gray = image
+        # 边框像素的中位数作为背景色，背景较暗时反相
+        border = np.concatenate((gray[0], gray[-1], gray[:, 0], gray[:, -1]))
+        background = int(np.median(border))
+        if background < 128:
+            gray = cv2.bitwise_not(gray, dst=self._buffer("gray", gray.shape))
+            background = 255 - background
+        # 常数以同尺寸的数组传入：元素数不超过 4 的极小区域（如 1×1、4×1）会被 OpenCV 与标量混淆而报错
+        level = self._buffer("level", gray.shape)
+        level.fill(background)
+        difference = cv2.absdiff(gray, level, dst=self._buffer("difference", gray.shape))
+        level.fill(min(self.ink_contrast, 255))
+        mask = cv2.compare(difference, level, cv2.CMP_GT, dst=self._buffer("mask", gray.shape))
+        return gray, mask
+
+    def _trim(self, gray: np.ndarray, mask: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """文字像素的外接矩形（加上边距），没有文字时返回 None"""
+        rows = np.flatnonzero(mask.any(axis=1))
+        if rows.size == 0:
+            return None
+        columns = np.flatnonzero(mask.any(axis=0))
+        height, width = gray.shape
+        top, bottom = max(0, rows[0] - self.margin), min(height, rows[-1] + 1 + self.margin)
+        left, right = max(0, columns[0] - self.margin), min(width, columns[-1] + 1 + self.margin)
+        return int(left), int(top), int(right - left), int(bottom - top)
+
+    def _estimate_scale(self, mask: np.ndarray) -> float:
+        """按连通域高度的中位数估计字高，返回缩放到目标字高的比例"""
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        stats = stats[1:count]
+        heights = stats[stats[:, cv2.CC_STAT_AREA] >= _MIN_COMPONENT_AREA, cv2.CC_STAT_HEIGHT]
+        if heights.size == 0:
+            return 1.0
+        scale = self.x_height / float(np.median(heights))
+        scale = min(max(scale, _SCALE_RANGE[0]), _SCALE_RANGE[1])
+        return 1.0 if abs(scale - 1.0) < _SCALE_TOLERANCE else scale
+
+    def _deskew(self, binary: np.ndarray) -> Tuple[np.ndarray, float]:
+        """按文字像素的最小外接矩形纠正倾斜"""
+        ink = cv2.bitwise_not(binary, dst=self._buffer("ink", binary.shape))
+        points = cv2.findNonZero(ink)
+        if points is None or len(points) < 2:
+            return binary, 0.0
+        (_, _), (width, height), angle = cv2.minAreaRect(points)
+        # 统一为相对于水平方向的角度 (-45, 45]
+        if width < height:
+            angle -= 90
+        while angle <= -45:
+            angle += 90
+        while angle > 45:
+            angle -= 90
+        if not _MIN_SKEW <= abs(angle) <= self.max_skew:
+            return binary, 0.0
+        rows, columns = binary.shape
+        matrix = cv2.getRotationMatrix2D((columns / 2, rows / 2), angle, 1.0)
+        rotated = cv2.warpAffine(binary, matrix, (columns, rows), dst=self._buffer("rotated", binary.shape),
+                                 flags=cv2.INTER_NEAREST, borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+        return rotated, float(angle)
+
+    def apply(self, image: np.ndarray, steps: Optional[Sequence[str]] = None) -> Preprocessed:
+        """预处理一个区域
+
+        Args:
+            image: BGR、BGRA 或灰度图像（只包含要识别的区域）
+            steps: 执行的步骤，None 表示构造时配置的步骤
+
+        Returns:
+            Preprocessed: 预处理结果，image 为新分配的数组
+        """
+        steps = self.steps if steps is None else steps
+        gray, mask = self._grayscale(image)
+        offset = (0, 0)
+        if "trim" in steps:
+            box = self._trim(gray, mask)
+            if box is None:
+                # 没有文字，后续步骤没有意义
+                return Preprocessed(gray.copy())
+            left, top, width, height = box
+            gray, mask = gray[top:top + height, left:left + width], mask[top:top + height, left:left + width]
+            offset = (left, top)
+
+        scale = self._estimate_scale(mask) if "scale" in steps else 1.0
+        if scale != 1.0:
+            height, width = gray.shape
+            size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            gray = cv2.resize(gray, size, dst=self._buffer("scaled", (size[1], size[0])),
+                              interpolation=cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA)
+
+        angle = 0.0
+        if "binarize" in steps:
+            gray = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                         self.block_size, self.threshold_offset,
+                                         dst=self._buffer("binary", gray.shape))
+            if "deskew" in steps:
+                gray, angle = self._deskew(gray)
+        return Preprocessed(gray.copy(), scale, offset, angle)
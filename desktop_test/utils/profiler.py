@@ -0,0 +1,152 @@
+"""
+采样分析器
+
+后台线程按固定间隔通过 sys._current_frames() 采集测试线程的调用栈，输出
+折叠栈格式（每行 "frame;frame;... count"），可直接用 flamegraph.pl、speedscope
+等工具生成火焰图。与 cProfile 不同，被测代码不受插桩影响，轮询循环的耗时不会失真。
+desktop_test.utils.test_helper 中的帧标记为 "_[helper]"，desktop_test.pages
+中的帧标记为 "_[page]"。
+"""
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from desktop_test.utils.config import PROFILE_INTERVAL, PROFILE_MAX_DEPTH
+
+# 需要标记的模块前缀 -> 标记
+_FRAME_MARKERS = (
+    ("desktop_test.utils.test_helper", "_[helper]"),
+    ("desktop_test.pages", "_[page]"),
+)
+
+
+class SamplingProfiler:
+    """基于栈采样的低开销分析器"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, max_depth: int = PROFILE_MAX_DEPTH):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._target: Optional[int] = None
+        self._labels: Dict[Tuple[str, str], str] = {}
+        self._current: Optional[Counter] = None
+        self.session: Counter = Counter()
+        self.samples = 0
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        """启动采样线程
+
+        Args:
+            thread_id: 被采样的线程，默认为调用 start 的线程
+        """
+        if self._thread is not None:
+            return
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="dt-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止采样线程"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def begin(self) -> None:
+        """开始记录一个测试的样本"""
+        with self._lock:
+            self._current = Counter()
+
+    def end(self) -> Counter:
+        """结束当前测试的记录
+
+        Returns:
+            Counter: 折叠栈 -> 样本数
+        """
+        with self._lock:
+            stacks, self._current = self._current, None
+        return stacks or Counter()
+
+    def _label(self, frame) -> str:
+        """帧的显示名称（按代码对象缓存）"""
+        code = frame.f_code
+        key = (code.co_filename, code.co_name)
+        label = self._labels.get(key)
+        if label is None:
+            module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+            label = f"{module}:{code.co_name}"
+            for prefix, marker in _FRAME_MARKERS:
+                if module.startswith(prefix):
+                    label += marker
+                    break
+            self._labels[key] = label
+        return label
+
+    def _collapse(self, frame) -> str:
+        """将调用栈转换为折叠栈字符串（根在前）"""
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            names.append(self._label(frame))
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    def _run(self) -> None:
+        """采样循环"""
+        interval = self.interval
+        target = self._target
+        while not self._stop.wait(interval):
+            if self._current is None:
+                continue
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            stack = self._collapse(frame)
+            del frame
+            with self._lock:
+                if self._current is not None:
+                    self._current[stack] += 1
+                    self.session[stack] += 1
+                    self.samples += 1
+
+    @staticmethod
+    def write_collapsed(stacks: Counter, filepath: str) -> str:
+        """写出折叠栈文件
+
+        Args:
+            stacks: 折叠栈 -> 样本数
+            filepath: 输出文件路径
+
+        Returns:
+            str: 输出文件路径
+        """
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with open(filepath, "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        return filepath
+
+    @staticmethod
+    def top_frames(stacks: Counter, limit: int = 10, marked_only: bool = True) -> Dict[str, int]:
+        """统计各帧出现的样本数（按样本数降序）
+
+        Args:
+            stacks: 折叠栈 -> 样本数
+            limit: 返回数量
+            marked_only: 只统计带标记（helper/page）的帧
+
+        Returns:
+            Dict[str, int]: 帧 -> 样本数
+        """
+        totals: Counter = Counter()
+        for stack, count in stacks.items():
+            for name in set(stack.split(";")):
+                if not marked_only or name.endswith(("_[helper]", "_[page]")):
+                    totals[name] += count
+        return dict(totals.most_common(limit))
@@ -0,0 +1,262 @@
+"""
+进度条监视
+
+扫描、识别等耗时任务不再轮询整屏模板，而是高频采集进度条所在的小区域，按像素列估计进度：
+    - 取进度条中间的水平带，每一列取中位数颜色（进度条上的百分比文字不影响结果）
+    - 去掉两端左右对称的列（模板四周的空白和边框），剩下的是进度条内部
+    - 按累积和一次算出所有分割位置的两段平方误差，误差最小的位置即已填充部分的右边界
+    - 两段颜色相差小于 PROGRESS_MIN_CONTRAST 时视为整条同色，按已知的填充色/底色判断是 0% 还是 100%；
+      填充色和底色从出现过分界的帧（或同时显示两段的模板图像）中学习，学习之前整条同色的帧无法判断，不报告进度
+进度和按最近 PROGRESS_RATE_WINDOW 秒拟合速度得到的剩余时间通过回调报告；
+进度达到 PROGRESS_COMPLETE_FRACTION、超过 PROGRESS_STALL_TIMEOUT 没有前进，或进度条消失时返回。
+只支持从左向右填充的水平进度条。
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Callable, Deque, NamedTuple, Optional, Tuple
+
+from desktop_test.utils.config import (
+    PROGRESS_SAMPLE_INTERVAL,
+    PROGRESS_TIMEOUT,
+    PROGRESS_STALL_TIMEOUT,
+    PROGRESS_COMPLETE_FRACTION,
+    PROGRESS_MIN_DELTA,
+    PROGRESS_MIN_CONTRAST,
+    PROGRESS_RATE_WINDOW,
+    PROGRESS_MAX_INSET
+)
+from desktop_test.utils.custom_logger import CustomLogger
+from desktop_test.utils.exceptions import TimeoutError
+from desktop_test.utils.idle import idle_sleep
+from desktop_test.utils.lazy_import import lazy_import
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.screen_capture import ScreenCapture
+from desktop_test.utils.tracing import span
+
+np = lazy_import("numpy")
+
+Region = Tuple[int, int, int, int]
+
+# 进度条无法识别（既不像填充色也不像底色）持续该时间后视为消失（秒）
+_DISAPPEAR_GRACE = 1.0
+
+
+class ProgressSample(NamedTuple):
+    """一次进度报告"""
+    fraction: float  # 进度（0~1）
+    elapsed: float  # 开始监视以来的时间（秒）
+    rate: Optional[float]  # 进度速度（每秒），无法估计时为 None
+    eta: Optional[float]  # 预计剩余时间（秒），无法估计时为 None
+
+
+class ProgressResult(NamedTuple):
+    """监视结束时的结果"""
+    completed: bool  # 是否达到完成进度
+    fraction: float  # 最后一次测得的进度
+    elapsed: float  # 监视时间（秒）
+    reason: str  # 结束原因：complete、stalled、disappeared
+    samples: int  # 采样次数
+
+
+class ProgressMonitor:
+    """进度条监视类"""
+
+    _logger = CustomLogger()
+    _metrics = MetricsRegistry()
+
+    def __init__(
+        self,
+        region: Region,
+        fill_color: Optional[Tuple[int, int, int]] = None,
+        interval: float = PROGRESS_SAMPLE_INTERVAL,
+        stall_timeout: float = PROGRESS_STALL_TIMEOUT,
+        complete_fraction: float = PROGRESS_COMPLETE_FRACTION,
+        min_contrast: float = PROGRESS_MIN_CONTRAST,
+        max_inset: float = PROGRESS_MAX_INSET,
+        reference: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            region: 进度条的屏幕区域 (left, top, width, height)
+            fill_color: 已填充部分的颜色 (B, G, R)，None 表示自动识别
+            interval: 采样间隔（秒）
+            stall_timeout: 进度超过该时间没有前进时视为停滞（秒）
+            complete_fraction: 视为完成的进度
+            min_contrast: 填充色与底色的最小颜色距离
+            max_inset: 两端最多去掉的宽度（相对于进度条宽度的比例）
+            reference: 定位进度条用的模板图像，同时显示已填充和未填充部分时从中学习填充色和底色
+        """
+        self.region = tuple(region)
+        self.interval = interval
+        self.stall_timeout = stall_timeout
+        self.complete_fraction = complete_fraction
+        self.min_contrast = min_contrast
+        self.max_inset = max_inset
+        self._fill = None if fill_color is None else np.asarray(fill_color, dtype=np.float32)
+        self._fixed_fill = fill_color is not None
+        self._track = None
+        if reference is not None and not self._fixed_fill:
+            self._split(self._profile(reference))
+
+    def _profile(self, image: np.ndarray) -> np.ndarray:
+        """进度条内部每一列的中位数颜色，形状为 (列数, 通道数)"""
+        height = image.shape[0]
+        top = height * 3 // 10
+        bottom = max(top + 1, height * 7 // 10)
+        profile = np.median(image[top:bottom], axis=0).astype(np.float64)
+        profile = profile.reshape(profile.shape[0], -1)
+        # 模板四周的空白和边框左右对称，填充部分与底色的分界不对称：
+        # 从两端向内去掉与另一端对应列颜色相同的列（整条同色时最多去掉 max_inset，不影响结果）
+        limit = int(profile.shape[0] * self.max_inset)
+        if limit:
+            same = np.linalg.norm(profile[:limit] - profile[::-1][:limit], axis=1) < self.min_contrast
+            inset = limit if same.all() else int(np.argmin(same))
+            if inset:
+                profile = profile[inset:-inset]
+        return profile
+
+    def measure(self, image: np.ndarray) -> Optional[float]:
+        """估计一帧进度条图像的进度
+
+        Args:
+            image: 进度条区域的图像（BGR 或灰度）
+
+        Returns:
+            Optional[float]: 进度（0~1），无法识别为进度条时返回 None
+        """
+        profile = self._profile(image)
+        columns = profile.shape[0]
+        if self._fixed_fill:
+            # 最右边一个接近填充色的列即已填充部分的右边界（中间被文字遮挡的列不影响结果）
+            filled = np.flatnonzero(np.linalg.norm(profile - self._fill[:profile.shape[1]], axis=1) < self.min_contrast)
+            return (int(filled[-1]) + 1) / columns if filled.size else 0.0
+
+        split = self._split(profile)
+        if split is not None:
+            return split / columns
+
+        # 整条同色：与学习到的填充色、底色比较；还没有学习到时无法判断是 0% 还是 100%
+        if self._fill is None:
+            return None
+        mean = profile.mean(axis=0)
+        to_fill = np.linalg.norm(mean - self._fill)
+        to_track = np.linalg.norm(mean - self._track)
+        if min(to_fill, to_track) >= self.min_contrast:
+            return None
+        return 1.0 if to_fill < to_track else 0.0
+
+    @property
+    def learned(self) -> bool:
+        """是否已知填充色和底色"""
+        return self._fill is not None
+
+    def _split(self, profile: np.ndarray) -> Optional[int]:
+        """已填充部分的右边界（列数），两段颜色相差足够大时同时学习填充色和底色；整条同色时返回 None"""
+        columns = profile.shape[0]
+        if columns < 2:
+            return None
+        # 左段为 [0, split)，右段为 [split, columns)，按累积和一次算出所有分割位置的平方误差
+        sums = np.cumsum(profile, axis=0)
+        squares = np.cumsum((profile ** 2).sum(axis=1))
+        sizes = np.arange(1, columns, dtype=np.float64)
+        left_sums = sums[:-1]
+        right_sums = sums[-1] - left_sums
+        errors = (squares[:-1] - (left_sums ** 2).sum(axis=1) / sizes
+                  + (squares[-1] - squares[:-1]) - (right_sums ** 2).sum(axis=1) / (columns - sizes))
+        best = int(np.argmin(errors))
+        split = best + 1
+        fill = left_sums[best] / split
+        track = right_sums[best] / (columns - split)
+        if np.linalg.norm(fill - track) < self.min_contrast:
+            return None
+        self._fill, self._track = fill, track
+        return split
+
+    @staticmethod
+    def _rate(history: Deque[Tuple[float, float]]) -> Optional[float]:
+        """按窗口内的采样拟合进度速度（每秒）"""
+        if len(history) < 2 or history[-1][0] - history[0][0] <= 0:
+            return None
+        times = np.fromiter((item[0] for item in history), dtype=np.float64, count=len(history))
+        fractions = np.fromiter((item[1] for item in history), dtype=np.float64, count=len(history))
+        times -= times.mean()
+        variance = float((times ** 2).sum())
+        if variance == 0:
+            return None
+        rate = float((times * (fractions - fractions.mean())).sum()) / variance
+        return rate if rate > 0 else None
+
+    def wait(
+        self,
+        timeout: float = PROGRESS_TIMEOUT,
+        on_progress: Optional[Callable[[ProgressSample], None]] = None
+    ) -> ProgressResult:
+        """监视进度条直到完成、停滞或消失
+
+        Args:
+            timeout: 超时时间（秒）
+            on_progress: 进度变化超过 PROGRESS_MIN_DELTA 时的回调，参数为 ProgressSample
+
+        Returns:
+            ProgressResult: 监视结果
+
+        Raises:
+            TimeoutError: 超时前进度条既未完成也未停滞
+        """
+        start = time.monotonic()
+        history: Deque[Tuple[float, float]] = deque()
+        fraction = 0.0
+        reported = None
+        reports = 0
+        advanced_at = start
+        advanced_fraction = 0.0
+        lost_since = None
+        samples = 0
+        with span("wait_progress"):
+            while True:
+                now = time.monotonic()
+                elapsed = now - start
+                measured = self.measure(ScreenCapture.grab(self.region))
+                samples += 1
+                if measured is None and not self.learned:
+                    # 整条同色且还不知道填充色：等待出现分界（超过 stall_timeout 时按停滞返回）
+                    lost_since = None
+                    if now - advanced_at >= self.stall_timeout:
+                        return self._finish(False, fraction, elapsed, "stalled", samples)
+                elif measured is None:
+                    lost_since = now if lost_since is None else lost_since
+                    if now - lost_since >= _DISAPPEAR_GRACE:
+                        return self._finish(False, fraction, elapsed, "disappeared", samples)
+                else:
+                    lost_since = None
+                    fraction = measured
+                    history.append((now, fraction))
+                    while history and now - history[0][0] > PROGRESS_RATE_WINDOW:
+                        history.popleft()
+                    if fraction - advanced_fraction >= PROGRESS_MIN_DELTA:
+                        advanced_at, advanced_fraction = now, fraction
+                    if reported is None or abs(fraction - reported) >= PROGRESS_MIN_DELTA:
+                        reported = fraction
+                        reports += 1
+                        rate = self._rate(history)
+                        eta = (1.0 - fraction) / rate if rate else None
+                        self._logger.log_sampled("进度: %.1f%%", fraction * 100, iteration=reports)
+                        if on_progress is not None:
+                            on_progress(ProgressSample(fraction, elapsed, rate, eta))
+                    if fraction >= self.complete_fraction:
+                        return self._finish(True, fraction, elapsed, "complete", samples)
+                    if now - advanced_at >= self.stall_timeout:
+                        return self._finish(False, fraction, elapsed, "stalled", samples)
+
+                if elapsed >= timeout:
+                    self._metrics.increment("progress.timeout")
+                    raise TimeoutError(f"等待进度完成 (当前: {fraction:.1%})", timeout)
+                idle_sleep(self.interval, "ProgressMonitor.wait")
+
+    def _finish(self, completed: bool, fraction: float, elapsed: float, reason: str, samples: int) -> ProgressResult:
+        """记录监视结果"""
+        self._metrics.observe("progress.wait", elapsed, reason)
+        self._logger.log_hot_step("进度监视结束: %s %.1f%%", reason, fraction * 100)
+        return ProgressResult(completed, fraction, elapsed, reason, samples)
@@ -0,0 +1,88 @@
+"""
+屏幕采集层
+
+所有需要屏幕像素的操作（元素定位、截图、OCR 区域等）都通过 ScreenCapture 获取帧，
+默认使用 pyautogui 截屏，也可以替换为其他帧来源（例如虚拟桌面）。
+"""
+from __future__ import annotations
+
+import os
+from typing import Optional, Tuple
+
+from desktop_test.utils.lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+pyautogui = lazy_import("pyautogui")
+
+Region = Tuple[int, int, int, int]
+
+
+class ScreenCapture:
+    """屏幕采集类，返回 BGR 格式的 numpy 数组"""
+
+    _source = None  # 可替换的帧来源，需提供 grab(region) 和 size() 方法
+
+    @classmethod
+    def set_source(cls, source) -> None:
+        """设置帧来源
+
+        Args:
+            source: 帧来源对象，None 表示恢复为真实屏幕
+        """
+        cls._source = source
+
+    @classmethod
+    def get_source(cls):
+        """获取当前帧来源（None 表示真实屏幕）"""
+        return cls._source
+
+    @classmethod
+    def grab(cls, region: Optional[Region] = None) -> np.ndarray:
+        """采集屏幕图像
+
+        Args:
+            region: 采集区域 (left, top, width, height)，None 表示全屏
+
+        Returns:
+            np.ndarray: BGR 图像
+        """
+        if cls._source is not None:
+            return cls._source.grab(region)
+        screenshot = pyautogui.screenshot(region=region)
+        return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2BGR)
+
+    @classmethod
+    def size(cls) -> Tuple[int, int]:
+        """获取屏幕尺寸 (width, height)"""
+        if cls._source is not None:
+            return cls._source.size()
+        width, height = pyautogui.size()
+        return width, height
+
+    @classmethod
+    def save(cls, filepath: str, region: Optional[Region] = None) -> str:
+        """采集屏幕并保存为图片文件
+
+        先编码再写入文件（cv2.imwrite 失败时只返回 False，且不支持 Windows 上的非 ASCII 路径）。
+
+        Args:
+            filepath: 保存路径
+            region: 采集区域
+
+        Returns:
+            str: 保存路径
+
+        Raises:
+            OSError: 编码失败或文件无法写入（例如目录不存在）
+        """
+        extension = os.path.splitext(filepath)[1] or ".png"
+        image = cls.grab(region)
+        try:
+            encoded, buffer = cv2.imencode(extension, image)
+        except cv2.error as e:
+            raise OSError(f"无法编码截图: {filepath} ({e})") from e
+        if not encoded:
+            raise OSError(f"无法编码截图: {filepath}")
+        buffer.tofile(filepath)
+        return filepath
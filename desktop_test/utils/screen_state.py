@@ -0,0 +1,288 @@
+"""
+屏幕状态识别
+
+用参考截图为每个已知界面状态（主窗口、OCR 页面、扫描页面、文件对话框、关闭确认框……）
+生成缩略指纹，识别当前屏幕时只需一次缩放和一次矩阵乘法，不再逐个匹配模板：
+    - 指纹：整屏缩小到 SCREEN_STATE_SIZE 的灰度图，减去均值后归一化（对整体亮度变化不敏感）
+    - 识别：当前指纹与全部参考指纹的相关系数，取最高者；低于 SCREEN_STATE_MIN_CONFIDENCE 时为未知状态
+    - 只差一个下拉菜单或小对话框的状态相关系数几乎相同：得分相差小于 SCREEN_STATE_MIN_MARGIN 的候选
+      再用 SCREEN_STATE_FINE_SIZE 的缩略图比较，只比较候选参考截图之间有差异的像素
+参考截图放在 SCREEN_STATE_DIR 下，文件名（<状态>.png）或子目录名（<状态>/*.png）即状态名；
+生成的索引缓存到 SCREEN_STATE_INDEX_FILE，参考截图未变化时直接读取。
+"""
+from __future__ import annotations
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from desktop_test.utils.config import (
+    SCREEN_STATE_DIR,
+    SCREEN_STATE_INDEX_FILE,
+    SCREEN_STATE_SIZE,
+    SCREEN_STATE_FINE_SIZE,
+    SCREEN_STATE_MIN_CONFIDENCE,
+    SCREEN_STATE_MIN_MARGIN
+)
+from desktop_test.utils.lazy_import import lazy_import
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.screen_capture import ScreenCapture
+from desktop_test.utils.tracing import span
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+# 精细比较时，候选参考截图之间灰度相差超过该值的像素才参与比较
+_DISTINCT_LEVEL = 16
+
+
+class StateMatch(NamedTuple):
+    """一次状态识别的结果"""
+    state: Optional[str]  # 识别出的状态，未知状态为 None
+    confidence: float  # 与最相似的参考截图的相关系数（-1~1）
+    margin: float  # 与次优状态的差距（相关系数之差，精细比较时为有差异像素的平均灰度差 / 255）
+    ambiguous: bool = False  # 差距是否小于 SCREEN_STATE_MIN_MARGIN
+
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def fingerprint(
+    frame: np.ndarray,
+    size: Tuple[int, int] = SCREEN_STATE_SIZE,
+    fine_size: Tuple[int, int] = SCREEN_STATE_FINE_SIZE
+) -> Tuple[np.ndarray, np.ndarray]:
+    """屏幕帧的缩略指纹
+
+    整帧只做一次区域平均（缩小到精细尺寸），粗指纹由精细缩略图再缩小得到。
+
+    Args:
+        frame: 整屏图像（BGR、BGRA 或灰度）
+        size: 粗指纹尺寸 (width, height)
+        fine_size: 精细缩略图尺寸 (width, height)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (粗指纹：减去均值后归一化的向量，整帧同色时为零向量；
+            精细缩略图：展平的 uint8 灰度)
+    """
+    fine = _gray(cv2.resize(frame, fine_size, interpolation=cv2.INTER_AREA))
+    vector = cv2.resize(fine, size, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = float(np.linalg.norm(vector))
+    return (vector / norm if norm > 0 else vector), fine.ravel()
+
+
+class ScreenStateIndex:
+    """屏幕状态指纹索引类"""
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        size: Tuple[int, int] = SCREEN_STATE_SIZE,
+        fine_size: Tuple[int, int] = SCREEN_STATE_FINE_SIZE,
+        min_confidence: float = SCREEN_STATE_MIN_CONFIDENCE,
+        min_margin: float = SCREEN_STATE_MIN_MARGIN
+    ):
+        self.size = tuple(size)
+        self.fine_size = tuple(fine_size)
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+        self._lock = threading.Lock()
+        self._labels: List[str] = []
+        self._signatures = np.empty((0, self.size[0] * self.size[1]), dtype=np.float32)
+        self._thumbnails = np.empty((0, self.fine_size[0] * self.fine_size[1]), dtype=np.uint8)
+        self._metrics = MetricsRegistry()
+
+    @property
+    def states(self) -> List[str]:
+        """索引中的状态（按加入顺序）"""
+        return list(dict.fromkeys(self._labels))
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(self, state: str, frame: np.ndarray) -> None:
+        """加入一张参考截图（同一状态可以有多张）"""
+        signature, thumbnail = fingerprint(frame, self.size, self.fine_size)
+        with self._lock:
+            self._signatures = np.vstack((self._signatures, signature[np.newaxis]))
+            self._thumbnails = np.vstack((self._thumbnails, thumbnail[np.newaxis]))
+            self._labels.append(state)
+
+    def remove(self, state: str) -> None:
+        """删除状态的全部参考截图"""
+        with self._lock:
+            keep = [index for index, label in enumerate(self._labels) if label != state]
+            self._signatures = self._signatures[keep]
+            self._thumbnails = self._thumbnails[keep]
+            self._labels = [self._labels[index] for index in keep]
+
+    def classify(self, frame: np.ndarray) -> StateMatch:
+        """识别一帧屏幕的状态
+
+        Args:
+            frame: 整屏图像
+
+        Returns:
+            StateMatch: 识别结果，索引为空或相似度不足时 state 为 None
+        """
+        start = time.perf_counter()
+        with span("classify_state"):
+            signature, thumbnail = fingerprint(frame, self.size, self.fine_size)
+            with self._lock:
+                labels, signatures, thumbnails = self._labels, self._signatures, self._thumbnails
+            if not labels:
+                return StateMatch(None, 0.0, 0.0)
+            scores = signatures @ signature
+            best = int(np.argmax(scores))
+            state, confidence = labels[best], float(scores[best])
+            others = [float(score) for label, score in zip(labels, scores) if label != state]
+            margin = confidence - max(others) if others else confidence
+            if margin < self.min_margin:
+                state, margin = self._refine(labels, scores, thumbnails, thumbnail, confidence)
+        match = StateMatch(state if confidence >= self.min_confidence else None, confidence, margin,
+                           margin < self.min_margin)
+        self._metrics.observe("state.classify.latency", time.perf_counter() - start)
+        self._metrics.increment("state.classify", match.state or "unknown")
+        return match
+
+    def _refine(self, labels, scores, thumbnails, thumbnail, confidence) -> Tuple[str, float]:
+        """在得分接近的候选之间，只比较候选参考截图之间有差异的像素
+
+        Returns:
+            Tuple[str, float]: (状态, 与次优状态的平均灰度差之差 / 255)
+        """
+        candidates = np.flatnonzero(scores >= confidence - self.min_margin)
+        references = thumbnails[candidates].astype(np.int16)
+        distinct = (references.max(axis=0) - references.min(axis=0)) > _DISTINCT_LEVEL
+        if not distinct.any():
+            best = int(candidates[int(np.argmax(scores[candidates]))])
+            return labels[best], 0.0
+        errors = np.abs(references[:, distinct] - thumbnail[distinct].astype(np.int16)).mean(axis=1)
+        order = np.argsort(errors)
+        state = labels[int(candidates[order[0]])]
+        second = next((errors[index] for index in order[1:] if labels[int(candidates[index])] != state), None)
+        return state, (float(second - errors[order[0]]) / 255 if second is not None else 0.0)
+
+    def classify_screen(self) -> StateMatch:
+        """采集一帧屏幕并识别状态"""
+        return self.classify(ScreenCapture.grab())
+
+    # ---- 参考截图和缓存 ----
+
+    @staticmethod
+    def _reference_files(directory: str) -> List[Tuple[str, str]]:
+        """参考截图列表 [(状态, 路径)]：<状态>.png 或 <状态>/*.png"""
+        files = []
+        if not os.path.isdir(directory):
+            return files
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if os.path.isdir(path):
+                files.extend((name, os.path.join(path, child)) for child in sorted(os.listdir(path))
+                             if child.lower().endswith(_IMAGE_EXTENSIONS))
+            elif name.lower().endswith(_IMAGE_EXTENSIONS):
+                files.append((os.path.splitext(name)[0], path))
+        return files
+
+    @classmethod
+    def _source_key(cls, files: List[Tuple[str, str]], size: Tuple[int, int]) -> str:
+        """参考截图的路径、大小和 mtime，任一变化时缓存的索引失效"""
+        entries = []
+        for state, path in files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append([state, path, stat.st_size, stat.st_mtime_ns])
+        return json.dumps({"size": list(size), "files": entries}, ensure_ascii=False)
+
+    @classmethod
+    def from_directory(cls, directory: str = SCREEN_STATE_DIR, **kwargs) -> "ScreenStateIndex":
+        """用目录中的参考截图生成索引（无法读取的图片被跳过）"""
+        index = cls(**kwargs)
+        for state, path in cls._reference_files(directory):
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is not None:
+                index.add(state, frame)
+        return index
+
+    def save(self, filepath: str = SCREEN_STATE_INDEX_FILE, source: str = "") -> None:
+        """保存索引（先写临时文件再原子替换）"""
+        directory = os.path.dirname(filepath)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{filepath}.{os.getpid()}.tmp.npz"
+        with self._lock:
+            np.savez(tmp_path, signatures=self._signatures, thumbnails=self._thumbnails,
+                     labels=np.array(self._labels, dtype=str), size=np.array(self.size),
+                     fine_size=np.array(self.fine_size), source=np.array(source))
+        os.replace(tmp_path, filepath)
+
+    @classmethod
+    def load(cls, filepath: str = SCREEN_STATE_INDEX_FILE, **kwargs) -> Tuple["ScreenStateIndex", str]:
+        """读取保存的索引
+
+        Returns:
+            Tuple[ScreenStateIndex, str]: (索引, 生成索引时的参考截图签名)
+        """
+        with np.load(filepath, allow_pickle=False) as data:
+            index = cls(size=tuple(int(value) for value in data["size"]),
+                        fine_size=tuple(int(value) for value in data["fine_size"]), **kwargs)
+            index._signatures = data["signatures"].astype(np.float32)
+            index._thumbnails = data["thumbnails"].astype(np.uint8)
+            index._labels = [str(label) for label in data["labels"]]
+            return index, str(data["source"])
+
+    @classmethod
+    def default(cls, reload: bool = False) -> "ScreenStateIndex":
+        """SCREEN_STATE_DIR 中参考截图的索引（进程内共享）
+
+        参考截图未变化时读取 SCREEN_STATE_INDEX_FILE，否则重新生成并写入缓存。
+        """
+        with cls._default_lock:
+            if cls._default is None or reload:
+                files = cls._reference_files(SCREEN_STATE_DIR)
+                source = cls._source_key(files, SCREEN_STATE_SIZE + SCREEN_STATE_FINE_SIZE)
+                index = None
+                try:
+                    index, cached_source = cls.load(SCREEN_STATE_INDEX_FILE)
+                    if cached_source != source:
+                        index = None
+                except (OSError, ValueError, KeyError):
+                    index = None
+                if index is None:
+                    index = cls.from_directory(SCREEN_STATE_DIR)
+                    if files:
+                        try:
+                            index.save(SCREEN_STATE_INDEX_FILE, source)
+                        except OSError:
+                            pass
+                cls._default = index
+            return cls._default
+
+    @classmethod
+    def set_default(cls, index: Optional["ScreenStateIndex"]) -> None:
+        """替换进程内共享的索引（例如使用模拟器生成的索引），None 表示下次重新读取"""
+        with cls._default_lock:
+            cls._default = index
+
+    @staticmethod
+    def capture_reference(state: str, directory: str = SCREEN_STATE_DIR) -> str:
+        """把当前屏幕保存为状态的一张参考截图
+
+        Returns:
+            str: 截图路径
+        """
+        filepath = os.path.join(directory, state, f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.png")
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        return ScreenCapture.save(filepath)
@@ -0,0 +1,157 @@
+"""
+模板校验清单
+
+记录每个模板文件的校验结果，按路径、大小、mtime 和内容哈希缓存：
+    - 大小和 mtime 都未变化的文件直接使用上次的结果，不读取文件
+    - 大小或 mtime 变化但内容哈希相同（例如只是被 touch）的文件沿用上次的结果
+    - 其余文件并行校验：先比对文件头的魔数，无法识别时再调用 libmagic
+清单写入 CACHE_DIR，多个 pytest worker 共享；写入时先写临时文件再原子替换。
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from desktop_test.utils.config import TEMPLATE_MANIFEST_FILE, TEMPLATE_VALIDATION_WORKERS
+from desktop_test.utils.file_validator import FileValidator
+
+# 清单格式版本，格式变化时旧清单整体失效
+_MANIFEST_VERSION = 1
+
+# (名称, 路径, 原因)
+Failure = Tuple[str, str, str]
+
+
+def _digest(data: bytes) -> str:
+    """文件内容哈希"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class TemplateManifest:
+    """模板校验清单类"""
+
+    def __init__(self, filepath: str = TEMPLATE_MANIFEST_FILE, workers: int = TEMPLATE_VALIDATION_WORKERS):
+        self.filepath = filepath
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.last_stats: Dict[str, int] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """读取清单，文件不存在或损坏时返回空清单"""
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != _MANIFEST_VERSION:
+            return {}
+        return data.get("entries", {})
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """原子写入清单（并发写入时以最后一次为准，不会读到半个文件）"""
+        directory = os.path.dirname(self.filepath)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".manifest_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": _MANIFEST_VERSION,
+                    "updated_at": datetime.now().isoformat(),
+                    "entries": entries
+                }, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.filepath)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _check(path: str, stat: os.stat_result, previous: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """校验一个大小或 mtime 已变化的文件
+
+        Returns:
+            Tuple[Dict[str, Any], bool]: (清单条目, 是否实际执行了校验)
+        """
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            entry.update(hash=None, valid=False, mime=None, reason=f"文件不可读: {e}")
+            return entry, True
+
+        entry["hash"] = _digest(data)
+        if previous is not None and previous.get("hash") == entry["hash"]:
+            # 内容未变化，沿用上次的结果
+            entry.update(valid=previous["valid"], mime=previous.get("mime"), reason=previous.get("reason"))
+            return entry, False
+
+        if not data:
+            entry.update(valid=False, mime=None, reason="空文件")
+            return entry, True
+        mime_type = FileValidator.sniff_image_type(data[:16])
+        if mime_type is None:
+            try:
+                mime_type = FileValidator.detect_mime(path)
+            except Exception as e:
+                entry.update(valid=False, mime=None, reason=f"无法识别文件类型: {e}")
+                return entry, True
+        valid = mime_type.startswith("image/")
+        entry.update(valid=valid, mime=mime_type, reason=None if valid else f"不是图片文件 ({mime_type})")
+        return entry, True
+
+    def validate(self, paths: Dict[str, str]) -> List[Failure]:
+        """校验模板文件
+
+        Args:
+            paths: 名称 -> 图片路径
+
+        Returns:
+            List[Failure]: 全部校验失败的 (名称, 路径, 原因)，全部通过时为空列表
+        """
+        with self._lock:
+            entries = self._load()
+            failures: List[Failure] = []
+            pending = []
+            stats = {"total": len(paths), "cached": 0, "rehashed": 0, "validated": 0, "missing": 0}
+            for name, path in paths.items():
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    stats["missing"] += 1
+                    failures.append((name, path, "文件不存在"))
+                    continue
+                entry = entries.get(path)
+                if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    stats["cached"] += 1
+                    if not entry["valid"]:
+                        failures.append((name, path, entry.get("reason") or "无效的图片"))
+                    continue
+                pending.append((name, path, stat, entry))
+
+            if pending:
+                with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(pending)))) as pool:
+                    results = list(pool.map(lambda item: self._check(item[1], item[2], item[3]), pending))
+                for (name, path, _, _), (entry, validated) in zip(pending, results):
+                    entries[path] = entry
+                    stats["validated" if validated else "rehashed"] += 1
+                    if not entry["valid"]:
+                        failures.append((name, path, entry["reason"]))
+                self._save(entries)
+
+            self.last_stats = stats
+            return failures
+
+    def invalidate(self) -> None:
+        """删除清单，下次校验时重新检查所有文件"""
+        with self._lock:
+            if os.path.exists(self.filepath):
+                os.remove(self.filepath)
+
+    @staticmethod
+    def format_failures(failures: List[Failure]) -> str:
+        """格式化校验失败列表"""
+        return "\n".join(f"  {name} -> {path}: {reason}" for name, path, reason in failures)
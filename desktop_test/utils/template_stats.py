@@ -0,0 +1,291 @@
+"""
+模板性能与可靠性排行榜
+
+在 TestHelper 的定位路径上按模板统计：平均/p95 定位耗时、超时率、失败时的平均
+最高得分、近似重复匹配（歧义）次数以及累计耗时。每个会话生成一份报告，并累计到
+跨会话的汇总文件中，用于判断哪些模板需要重新裁剪、重新选取锚点或增加搜索区域。
+"""
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from desktop_test.utils.config import LEADERBOARD_DIR, LEADERBOARD_CUMULATIVE_FILE
+from desktop_test.utils.metrics import Histogram, template_label
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，改用 msvcrt 锁定文件的第一个字节
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f) -> None:
+    """对打开的文件加跨进程的排他锁（阻塞等待）"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f) -> None:
+    """释放 _lock_file 加的锁"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class TemplateRecord:
+    """单个模板的统计数据"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.locates = 0
+        self.timeouts = 0
+        self.failed_score_sum = 0.0
+        self.failed_score_count = 0
+        self.ambiguous = 0
+
+    def record(self, duration: float, found: bool, best_score: float, ambiguous: bool) -> None:
+        """记录一次定位结果"""
+        self.latency.record(duration)
+        self.locates += 1
+        if not found:
+            self.timeouts += 1
+            self.failed_score_sum += best_score
+            self.failed_score_count += 1
+        if ambiguous:
+            self.ambiguous += 1
+
+    def merge(self, other: "TemplateRecord") -> None:
+        """合并另一份统计"""
+        self.latency.merge(other.latency)
+        self.locates += other.locates
+        self.timeouts += other.timeouts
+        self.failed_score_sum += other.failed_score_sum
+        self.failed_score_count += other.failed_score_count
+        self.ambiguous += other.ambiguous
+
+    def metrics(self) -> Dict[str, float]:
+        """排行榜使用的指标"""
+        return {
+            "locates": self.locates,
+            "mean_locate": self.latency.mean,
+            "p95_locate": self.latency.quantile(0.95),
+            "timeout_rate": self.timeouts / self.locates if self.locates else 0.0,
+            "avg_failed_score": (
+                self.failed_score_sum / self.failed_score_count if self.failed_score_count else None
+            ),
+            "ambiguous": self.ambiguous,
+            "wall_time": self.latency.total
+        }
+
+    def suggestion(self) -> str:
+        """根据统计给出维护建议"""
+        metrics = self.metrics()
+        if not self.locates:
+            return "未使用"
+        if metrics["timeout_rate"] >= 0.2:
+            score = metrics["avg_failed_score"]
+            if score is not None and score >= 0.6:
+                return "重新裁剪（得分接近阈值）"
+            return "检查模板是否过期"
+        if self.ambiguous:
+            return "重新选取锚点（存在近似重复匹配）"
+        if metrics["p95_locate"] >= 1.0:
+            return "增加搜索区域提示"
+        return ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化"""
+        return {
+            "latency": self.latency.to_dict(),
+            "locates": self.locates,
+            "timeouts": self.timeouts,
+            "failed_score_sum": self.failed_score_sum,
+            "failed_score_count": self.failed_score_count,
+            "ambiguous": self.ambiguous
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TemplateRecord":
+        """从序列化数据还原"""
+        record = cls()
+        record.latency = Histogram.from_dict(data.get("latency", {}))
+        record.locates = data.get("locates", 0)
+        record.timeouts = data.get("timeouts", 0)
+        record.failed_score_sum = data.get("failed_score_sum", 0.0)
+        record.failed_score_count = data.get("failed_score_count", 0)
+        record.ambiguous = data.get("ambiguous", 0)
+        return record
+
+
+class TemplateLeaderboard:
+    """模板排行榜（单例）"""
+
+    _instance = None
+
+    # 可用于排序的指标
+    RANK_KEYS = ("wall_time", "mean_locate", "p95_locate", "timeout_rate", "avg_failed_score", "ambiguous")
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TemplateLeaderboard, cls).__new__(cls)
+            cls._instance._records = {}
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def record(
+        self,
+        image_path: str,
+        duration: float,
+        found: bool,
+        best_score: float,
+        ambiguous: bool = False
+    ) -> None:
+        """记录一次定位
+
+        Args:
+            image_path: 模板路径
+            duration: 定位耗时（秒，包含轮询等待）
+            found: 是否找到
+            best_score: 本次定位过程中的最高匹配得分
+            ambiguous: 是否存在近似重复的匹配
+        """
+        label = template_label(image_path)
+        record = self._records.get(label)
+        if record is None:
+            with self._lock:
+                record = self._records.setdefault(label, TemplateRecord())
+        with self._lock:
+            record.record(duration, found, best_score, ambiguous)
+
+    def reset(self) -> None:
+        """清空本会话的统计"""
+        with self._lock:
+            self._records.clear()
+
+    @staticmethod
+    def _known_templates() -> Dict[str, str]:
+        """ImagePaths 中登记的模板：标签 -> 名称（如 MAIN.file_menu）"""
+        try:
+            from desktop_test.utils.image_paths import ImagePaths
+            paths = ImagePaths()._paths
+        except Exception:
+            return {}
+        return {
+            template_label(path): f"{category}.{name}"
+            for category, items in paths.items()
+            for name, path in items.items()
+        }
+
+    @staticmethod
+    def _rows(records: Dict[str, TemplateRecord], known: Dict[str, str], by: str) -> List[Dict[str, Any]]:
+        """生成排序后的排行榜行"""
+        rows = []
+        for label in set(records) | set(known):
+            record = records.get(label) or TemplateRecord()
+            row = {"template": label, "name": known.get(label, "")}
+            row.update(record.metrics())
+            row["suggestion"] = record.suggestion()
+            rows.append(row)
+        rows.sort(key=lambda r: (r[by] is None, -(r[by] or 0), r["template"]))
+        return rows
+
+    def rank(self, by: str = "wall_time", include_unused: bool = True) -> List[Dict[str, Any]]:
+        """按指定指标排序本会话的模板
+
+        Args:
+            by: 排序指标（见 RANK_KEYS），降序
+            include_unused: 是否包含 ImagePaths 中登记但未使用的模板
+
+        Returns:
+            List[Dict[str, Any]]: 排行榜行
+        """
+        if by not in self.RANK_KEYS:
+            raise ValueError(f"不支持的排序指标: {by}")
+        with self._lock:
+            records = dict(self._records)
+        known = self._known_templates() if include_unused else {}
+        return self._rows(records, known, by)
+
+    def save_session_report(self, directory: str = LEADERBOARD_DIR) -> str:
+        """保存本会话的排行榜报告
+
+        Returns:
+            str: 报告文件路径
+        """
+        os.makedirs(directory, exist_ok=True)
+        filepath = os.path.join(
+            directory, f"template_leaderboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        with self._lock:
+            records = {label: record.to_dict() for label, record in self._records.items()}
+        report = {
+            "generated_at": datetime.now().isoformat(),
+            "ranking": self.rank(),
+            "records": records
+        }
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return filepath
+
+    def accumulate(self, filepath: str = LEADERBOARD_CUMULATIVE_FILE) -> List[Dict[str, Any]]:
+        """将本会话统计累加到跨会话汇总文件（文件锁保护，支持多进程）
+
+        Args:
+            filepath: 汇总文件路径
+
+        Returns:
+            List[Dict[str, Any]]: 累计后的排行榜
+        """
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, "a+", encoding="utf-8") as f:
+            _lock_file(f)
+            try:
+                f.seek(0)
+                content = f.read()
+                data = json.loads(content) if content.strip() else {}
+                records = {
+                    label: TemplateRecord.from_dict(item)
+                    for label, item in data.get("records", {}).items()
+                }
+                with self._lock:
+                    for label, record in self._records.items():
+                        records.setdefault(label, TemplateRecord()).merge(record)
+                ranking = self._rows(records, self._known_templates(), "wall_time")
+                data = {
+                    "updated_at": datetime.now().isoformat(),
+                    "sessions": data.get("sessions", 0) + 1,
+                    "ranking": ranking,
+                    "records": {label: record.to_dict() for label, record in records.items()}
+                }
+                f.seek(0)
+                f.truncate()
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            finally:
+                _unlock_file(f)
+        return ranking
+
+    @staticmethod
+    def format_table(rows: List[Dict[str, Any]], limit: Optional[int] = 10) -> List[str]:
+        """生成文本格式的排行榜（毫秒）"""
+        lines = [
+            f"{'template':<36} {'n':>5} {'mean':>8} {'p95':>8} {'timeout':>8} "
+            f"{'fail_sc':>8} {'ambig':>6} {'wall_s':>8}  suggestion"
+        ]
+        for row in rows[:limit] if limit else rows:
+            if not row["locates"]:
+                continue
+            failed = row["avg_failed_score"]
+            lines.append(
+                f"{row['template']:<36.36} {row['locates']:>5} {row['mean_locate'] * 1000:>8.1f} "
+                f"{row['p95_locate'] * 1000:>8.1f} {row['timeout_rate']:>8.1%} "
+                f"{(f'{failed:.3f}' if failed is not None else '-'):>8} {row['ambiguous']:>6} "
+                f"{row['wall_time']:>8.2f}  {row['suggestion']}"
+            )
+        return lines
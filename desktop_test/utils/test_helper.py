@@ -1,30 +1,49 @@
+from __future__ import annotations
+
 import os
 import sys
 import time
-import cv2
-import numpy as np
-import pyautogui
-import pyperclip
-import pytesseract
 from datetime import datetime
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, NamedTuple, List, Callable
 from functools import lru_cache
 from desktop_test.utils.config import *
 from desktop_test.utils.custom_logger import CustomLogger
+from desktop_test.utils.screen_capture import ScreenCapture
+from desktop_test.utils.input_driver import InputDriver
+from desktop_test.utils.metrics import MetricsRegistry, template_label
+from desktop_test.utils.template_stats import TemplateLeaderboard
+from desktop_test.utils.tracing import span, traced
+from desktop_test.utils.idle import idle_sleep
+from desktop_test.utils.lazy_import import lazy_import
+from desktop_test.utils.ocr_engine import OCREngine
+from desktop_test.utils.text_locator import TextIndex, TextMatch
+from desktop_test.utils.progress_monitor import ProgressMonitor, ProgressResult, ProgressSample
+from desktop_test.utils.screen_state import ScreenStateIndex, StateMatch
 from desktop_test.utils.exceptions import (
     ElementNotFoundError,
     ElementNotVisibleError,
     ImageMatchError,
     TimeoutError
 )
-from PIL import Image
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+class MatchResult(NamedTuple):
+    """一次模板匹配的结果"""
+    box: Optional[Tuple[int, int, int, int]]  # 匹配框 (left, top, width, height)，未匹配时为 None
+    score: float  # 最高匹配得分
+    ambiguous: bool = False  # 是否存在得分接近的另一处匹配
 
 class TestHelper:
     """测试辅助类，提供UI自动化测试所需的各种功能"""
     
     _logger = CustomLogger()
+    _metrics = MetricsRegistry()
+    _leaderboard = TemplateLeaderboard()
     _image_cache: Dict[str, Any] = {}
     _last_found_positions: Dict[str, Tuple[int, int]] = {}
+    _text_index: Optional[TextIndex] = None
     
     def __init__(self):
         self.logger = CustomLogger(self.__class__.__name__)
@@ -48,7 +67,8 @@ class TestHelper:
         """
         try:
             if image_path not in TestHelper._image_cache:
-                image = cv2.imread(image_path)
+                with span("template_load", image=image_path):
+                    image = cv2.imread(image_path)
                 if image is None:
                     raise ImageMatchError(f"无法加载图片: {image_path}")
                 TestHelper._image_cache[image_path] = image
@@ -58,6 +78,174 @@ class TestHelper:
             return None
     
     @staticmethod
+    @lru_cache(maxsize=100)
+    def _load_scaled_image(image_path: str, scale: float) -> Optional[np.ndarray]:
+        """加载并缓存按比例缩小的模板（金字塔匹配的粗匹配层）"""
+        template = TestHelper._load_image(image_path)
+        if template is None:
+            return None
+        return cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    @staticmethod
+    def _require_template(image_path: str, timeout: float) -> np.ndarray:
+        """轮询查找前加载模板：文件不存在或无法解码（例如 0 字节的占位图）时立即失败，不轮询到超时
+        
+        Raises:
+            ElementNotFoundError: 图片文件不存在
+            ImageMatchError: 图片无法加载
+        """
+        if not os.path.exists(image_path):
+            raise ElementNotFoundError(f"图片文件不存在: {image_path}", timeout)
+        template = TestHelper._load_image(image_path)
+        if template is None:
+            raise ImageMatchError(image_path)
+        return template
+    
+    @staticmethod
+    def _grab(region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """采集一帧屏幕并记录采集耗时"""
+        capture_start = time.perf_counter()
+        with span("capture"):
+            screen = ScreenCapture.grab(region)
+        TestHelper._metrics.observe("capture.latency", time.perf_counter() - capture_start)
+        return screen
+    
+    @staticmethod
+    def _match(
+        image_path: str,
+        confidence: float = 0.8,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        check_ambiguity: bool = False,
+        screen: Optional[np.ndarray] = None
+    ) -> MatchResult:
+        """采集一帧屏幕并进行一次模板匹配
+        
+        Args:
+            image_path: 模板图片路径
+            confidence: 匹配置信度
+            region: 搜索区域 (left, top, width, height)
+            check_ambiguity: 匹配成功时是否检查近似重复的匹配
+            screen: 已采集的搜索区域图像，None 表示重新采集
+            
+        Returns:
+            MatchResult: 匹配结果
+        """
+        template = TestHelper._load_image(image_path)
+        if template is None:
+            return MatchResult(None, 0.0)
+        if screen is None:
+            screen = TestHelper._grab(region)
+        match_start = time.perf_counter()
+        height, width = template.shape[:2]
+        if screen.shape[0] < height or screen.shape[1] < width:
+            return MatchResult(None, 0.0)
+        with span("match", image=image_path) as match_span:
+            result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (left, top) = cv2.minMaxLoc(result)
+            match_span.set(score=round(float(score), 4))
+        TestHelper._metrics.observe("match.latency", time.perf_counter() - match_start, template_label(image_path))
+        if score < confidence:
+            return MatchResult(None, float(score))
+        ambiguous = False
+        if check_ambiguity:
+            # 屏蔽最佳匹配附近区域后再找次高峰值
+            result[max(0, top - height // 2):top + height // 2 + 1,
+                   max(0, left - width // 2):left + width // 2 + 1] = -1.0
+            _, second, _, _ = cv2.minMaxLoc(result)
+            ambiguous = second >= max(confidence, score - AMBIGUITY_MARGIN)
+        if region:
+            left += region[0]
+            top += region[1]
+        return MatchResult((left, top, width, height), float(score), ambiguous)
+    
+    @staticmethod
+    def _match_pyramid(
+        image_path: str,
+        confidence: float = 0.8,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        screen: Optional[np.ndarray] = None
+    ) -> MatchResult:
+        """两级金字塔匹配：先在缩小的图像上粗匹配，再在原分辨率的小范围内精确匹配
+        
+        Args:
+            image_path: 模板图片路径
+            confidence: 匹配置信度
+            region: 搜索区域 (left, top, width, height)
+            screen: 已采集的搜索区域图像，None 表示重新采集
+            
+        Returns:
+            MatchResult: 匹配结果
+        """
+        template = TestHelper._load_image(image_path)
+        if template is None:
+            return MatchResult(None, 0.0)
+        height, width = template.shape[:2]
+        if min(height, width) * PYRAMID_SCALE < PYRAMID_MIN_TEMPLATE:
+            # 模板太小，缩小后特征不足，直接全分辨率匹配
+            return TestHelper._match(image_path, confidence, region, screen=screen)
+        if screen is None:
+            screen = TestHelper._grab(region)
+        if screen.shape[0] < height or screen.shape[1] < width:
+            return MatchResult(None, 0.0)
+        match_start = time.perf_counter()
+        with span("match_pyramid", image=image_path) as match_span:
+            small_template = TestHelper._load_scaled_image(image_path, PYRAMID_SCALE)
+            small_screen = cv2.resize(screen, None, fx=PYRAMID_SCALE, fy=PYRAMID_SCALE, interpolation=cv2.INTER_AREA)
+            result = cv2.matchTemplate(small_screen, small_template, cv2.TM_CCOEFF_NORMED)
+            small_h, small_w = small_template.shape[:2]
+            pad = int(round(1 / PYRAMID_SCALE)) + 2
+            score, left, top, tried = -1.0, 0, 0, 0
+            # 粗匹配层可能把相似元素混淆，取得分最高的几个候选逐一精确匹配
+            for _ in range(PYRAMID_CANDIDATES):
+                _, coarse_score, _, (coarse_left, coarse_top) = cv2.minMaxLoc(result)
+                if coarse_score < confidence - PYRAMID_COARSE_MARGIN:
+                    break
+                tried += 1
+                result[max(0, coarse_top - small_h // 2):coarse_top + small_h // 2 + 1,
+                       max(0, coarse_left - small_w // 2):coarse_left + small_w // 2 + 1] = -1.0
+                roi_left = min(max(0, int(coarse_left / PYRAMID_SCALE) - pad), screen.shape[1] - width)
+                roi_top = min(max(0, int(coarse_top / PYRAMID_SCALE) - pad), screen.shape[0] - height)
+                roi = screen[roi_top:roi_top + height + 2 * pad, roi_left:roi_left + width + 2 * pad]
+                fine = cv2.matchTemplate(roi, template, cv2.TM_CCOEFF_NORMED)
+                _, fine_score, _, (fine_left, fine_top) = cv2.minMaxLoc(fine)
+                if fine_score > score:
+                    score, left, top = fine_score, roi_left + fine_left, roi_top + fine_top
+            match_span.set(score=round(float(score), 4), candidates=tried)
+        TestHelper._metrics.observe("match.latency", time.perf_counter() - match_start, template_label(image_path))
+        if score < confidence:
+            return MatchResult(None, max(0.0, float(score)))
+        if region:
+            left += region[0]
+            top += region[1]
+        return MatchResult((left, top, width, height), float(score))
+    
+    @staticmethod
+    def _locate(
+        image_path: str,
+        confidence: float = 0.8,
+        region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Optional[Tuple[int, int]]:
+        """单次定位元素中心点（不等待）
+        
+        Args:
+            image_path: 模板图片路径
+            confidence: 匹配置信度
+            region: 搜索区域
+            
+        Returns:
+            Optional[Tuple[int, int]]: 元素中心 (x, y) 或 None
+        """
+        return TestHelper._center(TestHelper._match(image_path, confidence, region).box)
+    
+    @staticmethod
+    def _center(box: Optional[Tuple[int, int, int, int]]) -> Optional[Tuple[int, int]]:
+        """计算匹配框的中心点"""
+        if box is None:
+            return None
+        return box[0] + box[2] // 2, box[1] + box[3] // 2
+    
+    @staticmethod
+    @traced("screenshot")
     def take_screenshot(name: str, region: Optional[Tuple[int, int, int, int]] = None) -> str:
         """截取屏幕截图并保存
         
@@ -68,15 +256,15 @@ class TestHelper:
         Returns:
             str: 截图文件路径
         """
-        time.sleep(SCREENSHOT_DELAY)
+        idle_sleep(SCREENSHOT_DELAY, "TestHelper.take_screenshot")
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"{name}_{timestamp}.png"
         filepath = os.path.join(SCREENSHOTS_DIR, filename)
         
         try:
-            screenshot = pyautogui.screenshot(region=region)
-            screenshot.save(filepath)
-            TestHelper._logger.log_step(f"截图保存: {filepath}")
+            os.makedirs(SCREENSHOTS_DIR, exist_ok=True)
+            ScreenCapture.save(filepath, region)
+            TestHelper._logger.log_hot_step("截图保存: %s", filepath)
             return filepath
         except Exception as e:
             TestHelper._logger.log_test_error("截图操作", str(e), "截图失败")
@@ -121,13 +309,14 @@ class TestHelper:
             else:
                 diff_img = None
             
-            TestHelper._logger.log_assertion("图片相似度", f"{similarity:.4f}")
+            TestHelper._logger.log_assertion("图片相似度", round(similarity, 4))
             return similarity, diff_img
         except Exception as e:
             TestHelper._logger.log_test_error("图片比较", str(e), "比较失败")
             raise
     
     @staticmethod
+    @traced("locate")
     def find_element_on_screen(
         image_path: str,
         confidence: float = 0.8,
@@ -147,54 +336,171 @@ class TestHelper:
         Returns:
             Optional[Tuple[int, int]]: 元素位置 (x, y) 或 None
         """
-        if not os.path.exists(image_path):
-            raise ElementNotFoundError(f"图片文件不存在: {image_path}", timeout)
+        TestHelper._require_template(image_path, timeout)
+        
+        metrics = TestHelper._metrics
+        label = template_label(image_path)
+        locate_start = time.perf_counter()
             
         # 如果启用了上次位置，先在上次位置附近搜索
         if use_last_position and image_path in TestHelper._last_found_positions:
             last_x, last_y = TestHelper._last_found_positions[image_path]
-            search_region = (
-                max(0, last_x - 50),
-                max(0, last_y - 50),
-                100,
-                100
-            )
+            template = TestHelper._load_image(image_path)
+            template_h, template_w = template.shape[:2] if template is not None else (0, 0)
+            left = max(0, last_x - template_w // 2 - 50)
+            top = max(0, last_y - template_h // 2 - 50)
+            search_region = (left, top, template_w + 100, template_h + 100)
             try:
-                location = pyautogui.locateCenterOnScreen(
-                    image_path,
-                    confidence=confidence,
-                    region=search_region
-                )
+                with span("locate_last_position"):
+                    location = TestHelper._locate(image_path, confidence, search_region)
                 if location:
                     TestHelper._last_found_positions[image_path] = location
-                    TestHelper._logger.log_step(f"在上次位置找到元素: {image_path}")
+                    TestHelper._logger.log_hot_step("在上次位置找到元素: %s", image_path)
+                    duration = time.perf_counter() - locate_start
+                    metrics.increment("locate.last_position_hit", label)
+                    metrics.observe("locate.latency", duration, label)
+                    TestHelper._leaderboard.record(image_path, duration, True, confidence)
                     return location
-            except:
+            except Exception:
                 pass
         
         # 在指定区域或全屏搜索
         start_time = time.time()
+        attempt = 0
+        best_score = 0.0
         while time.time() - start_time < timeout:
+            attempt += 1
+            TestHelper._logger.log_sampled("轮询查找元素: %s", image_path, iteration=attempt)
             try:
-                location = pyautogui.locateCenterOnScreen(
-                    image_path,
-                    confidence=confidence,
-                    region=region
-                )
+                match = TestHelper._match(image_path, confidence, region, check_ambiguity=True)
+                best_score = max(best_score, match.score)
+                location = TestHelper._center(match.box)
                 if location:
                     TestHelper._last_found_positions[image_path] = location
-                    TestHelper._logger.log_step(f"查找元素: {image_path}", "成功")
+                    TestHelper._logger.log_hot_step("查找元素: %s", image_path)
+                    duration = time.perf_counter() - locate_start
+                    metrics.increment("locate.found", label)
+                    metrics.increment("locate.retries", label, attempt - 1)
+                    metrics.observe("locate.latency", duration, label)
+                    if match.ambiguous:
+                        metrics.increment("locate.ambiguous", label)
+                    TestHelper._leaderboard.record(image_path, duration, True, match.score, match.ambiguous)
                     return location
-            except pyautogui.ImageNotFoundException:
-                pass
             except Exception as e:
                 TestHelper._logger.log_test_error("查找元素", str(e), f"查找失败: {image_path}")
+                metrics.increment("locate.error", label)
                 return None
-            time.sleep(0.2)
+            idle_sleep(0.2, "TestHelper.find_element_on_screen")
+        
+        duration = time.perf_counter() - locate_start
+        metrics.increment("locate.timeout", label)
+        metrics.increment("locate.retries", label, max(0, attempt - 1))
+        metrics.observe("locate.latency", duration, label)
+        TestHelper._leaderboard.record(image_path, duration, False, best_score)
+        raise ElementNotFoundError(f"未找到元素: {image_path}", timeout)
+    
+    @staticmethod
+    @traced("locate_batch")
+    def find_elements_on_screen(
+        image_paths: List[str],
+        confidence: float = 0.8,
+        timeout: float = DEFAULT_TIMEOUT,
+        region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Dict[str, Optional[Tuple[int, int]]]:
+        """在同一帧屏幕上批量查找多个元素，每次轮询只采集一次屏幕
+        
+        Args:
+            image_paths: 要查找的图片路径列表
+            confidence: 匹配置信度
+            timeout: 超时时间（秒），超时后未找到的元素返回 None
+            region: 搜索区域 (left, top, width, height)
             
+        Returns:
+            Dict[str, Optional[Tuple[int, int]]]: 图片路径 -> 元素位置 (x, y) 或 None
+        """
+        for image_path in image_paths:
+            TestHelper._require_template(image_path, timeout)
+        
+        locate_start = time.perf_counter()
+        locations: Dict[str, Optional[Tuple[int, int]]] = dict.fromkeys(image_paths)
+        best_scores = dict.fromkeys(image_paths, 0.0)
+        pending = list(dict.fromkeys(image_paths))
+        start_time = time.time()
+        attempt = 0
+        while pending and time.time() - start_time < timeout:
+            attempt += 1
+            TestHelper._logger.log_sampled("批量轮询查找 %d 个元素", len(pending), iteration=attempt)
+            screen = TestHelper._grab(region)
+            for image_path in list(pending):
+                match = TestHelper._match(image_path, confidence, region, screen=screen)
+                best_scores[image_path] = max(best_scores[image_path], match.score)
+                location = TestHelper._center(match.box)
+                if location:
+                    locations[image_path] = location
+                    TestHelper._last_found_positions[image_path] = location
+                    TestHelper._leaderboard.record(
+                        image_path, time.perf_counter() - locate_start, True, match.score
+                    )
+                    pending.remove(image_path)
+            if pending:
+                idle_sleep(0.2, "TestHelper.find_elements_on_screen")
+        
+        for image_path in pending:
+            TestHelper._leaderboard.record(
+                image_path, time.perf_counter() - locate_start, False, best_scores[image_path]
+            )
+        TestHelper._metrics.observe("locate.batch.latency", time.perf_counter() - locate_start)
+        TestHelper._logger.log_hot_step("批量查找元素: 找到 %d/%d", len(image_paths) - len(pending), len(image_paths))
+        return locations
+    
+    @staticmethod
+    @traced("locate_pyramid")
+    def find_element_pyramid(
+        image_path: str,
+        confidence: float = 0.8,
+        timeout: float = DEFAULT_TIMEOUT,
+        region: Optional[Tuple[int, int, int, int]] = None
+    ) -> Optional[Tuple[int, int]]:
+        """使用金字塔匹配在屏幕上查找元素（适合大屏幕、较大的模板）
+        
+        Args:
+            image_path: 要查找的图片路径
+            confidence: 匹配置信度
+            timeout: 超时时间（秒）
+            region: 搜索区域 (left, top, width, height)
+            
+        Returns:
+            Optional[Tuple[int, int]]: 元素位置 (x, y)
+        """
+        TestHelper._require_template(image_path, timeout)
+        
+        label = template_label(image_path)
+        locate_start = time.perf_counter()
+        start_time = time.time()
+        attempt = 0
+        best_score = 0.0
+        while time.time() - start_time < timeout:
+            attempt += 1
+            TestHelper._logger.log_sampled("金字塔轮询查找元素: %s", image_path, iteration=attempt)
+            match = TestHelper._match_pyramid(image_path, confidence, region)
+            best_score = max(best_score, match.score)
+            location = TestHelper._center(match.box)
+            if location:
+                duration = time.perf_counter() - locate_start
+                TestHelper._last_found_positions[image_path] = location
+                TestHelper._logger.log_hot_step("金字塔查找元素: %s", image_path)
+                TestHelper._metrics.observe("locate.pyramid.latency", duration, label)
+                TestHelper._leaderboard.record(image_path, duration, True, match.score)
+                return location
+            idle_sleep(0.2, "TestHelper.find_element_pyramid")
+        
+        duration = time.perf_counter() - locate_start
+        TestHelper._metrics.observe("locate.pyramid.latency", duration, label)
+        TestHelper._leaderboard.record(image_path, duration, False, best_score)
         raise ElementNotFoundError(f"未找到元素: {image_path}", timeout)
     
     @staticmethod
+    @traced("click")
     def click_element(
         image_path: str,
         confidence: float = 0.8,
@@ -219,6 +525,7 @@ class TestHelper:
             bool: 是否点击成功
         """
         try:
+            click_start = time.perf_counter()
             location = TestHelper.find_element_on_screen(
                 image_path,
                 confidence,
@@ -226,13 +533,18 @@ class TestHelper:
                 region
             )
             if location:
-                pyautogui.click(
-                    location,
-                    clicks=clicks,
-                    interval=interval,
-                    button=button
-                )
-                TestHelper._logger.log_step(f"点击元素: {image_path}", "成功")
+                with span("input"):
+                    InputDriver.click(
+                        location[0],
+                        location[1],
+                        clicks=clicks,
+                        interval=interval,
+                        button=button
+                    )
+                TestHelper._logger.log_hot_step("点击元素: %s", image_path)
+                label = template_label(image_path)
+                TestHelper._metrics.increment("click.count", label)
+                TestHelper._metrics.observe("click.latency", time.perf_counter() - click_start, label)
                 return True
             return False
         except Exception as e:
@@ -240,6 +552,7 @@ class TestHelper:
             raise
     
     @staticmethod
+    @traced("wait")
     def wait_for_element(
         image_path: str,
         timeout: float = DEFAULT_TIMEOUT,
@@ -259,18 +572,41 @@ class TestHelper:
         Returns:
             bool: 是否找到元素
         """
+        metrics = TestHelper._metrics
+        label = template_label(image_path)
         try:
+            TestHelper._require_template(image_path, timeout)
             start_time = time.time()
+            wait_start = time.perf_counter()
+            attempt = 0
+            best_score = 0.0
             while time.time() - start_time < timeout:
-                if TestHelper.element_exists(image_path, confidence, region):
+                attempt += 1
+                TestHelper._logger.log_sampled("轮询等待元素: %s", image_path, iteration=attempt)
+                try:
+                    with span("element_exists"):
+                        match = TestHelper._match(image_path, confidence, region, check_ambiguity=True)
+                except Exception:
+                    match = MatchResult(None, 0.0)
+                best_score = max(best_score, match.score)
+                if match.box is not None:
+                    duration = time.perf_counter() - wait_start
+                    metrics.increment("wait.found", label)
+                    metrics.observe("wait.latency", duration, label)
+                    TestHelper._leaderboard.record(image_path, duration, True, match.score, match.ambiguous)
                     return True
-                time.sleep(check_interval)
+                idle_sleep(check_interval, "TestHelper.wait_for_element")
+            duration = time.perf_counter() - wait_start
+            metrics.increment("wait.timeout", label)
+            metrics.observe("wait.latency", duration, label)
+            TestHelper._leaderboard.record(image_path, duration, False, best_score)
             raise TimeoutError("等待元素超时", timeout)
         except Exception as e:
             TestHelper._logger.log_test_error("等待元素", str(e), "等待失败")
             return False
     
     @staticmethod
+    @traced("element_exists")
     def element_exists(
         image_path: str,
         confidence: float = 0.8,
@@ -287,15 +623,335 @@ class TestHelper:
             bool: 元素是否存在
         """
         try:
-            location = pyautogui.locateCenterOnScreen(
-                image_path,
-                confidence=confidence,
-                region=region
-            )
-            return location is not None
-        except:
+            return TestHelper._locate(image_path, confidence, region) is not None
+        except Exception:
             return False
     
+    @staticmethod
+    @traced("ocr_element")
+    def get_element_text(
+        image_path: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        confidence: float = 0.8,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        lang: Optional[str] = None,
+        psm: Optional[int] = None
+    ) -> str:
+        """识别元素区域内的文本（定位和识别使用同一帧屏幕）
+        
+        Args:
+            image_path: 元素图片路径
+            timeout: 等待元素出现的超时时间（秒）
+            confidence: 匹配置信度
+            region: 搜索区域
+            lang: 识别语言，None 表示 OCR_LANG
+            psm: 页面分割模式，None 表示 OCR_PSM
+            
+        Returns:
+            str: 识别出的文本
+            
+        Raises:
+            ElementNotFoundError: 超时前未找到元素
+        """
+        start_time = time.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            TestHelper._logger.log_sampled("轮询查找文本元素: %s", image_path, iteration=attempt)
+            screen = TestHelper._grab(region)
+            match = TestHelper._match(image_path, confidence, region, screen=screen)
+            if match.box is not None:
+                break
+            if time.time() - start_time >= timeout:
+                raise ElementNotFoundError(image_path, timeout)
+            idle_sleep(0.2, "TestHelper.get_element_text")
+        
+        # _match 返回屏幕坐标，裁剪时换算到 screen 内的坐标
+        left, top, width, height = match.box
+        if region is not None:
+            left, top = left - region[0], top - region[1]
+        result = OCREngine().recognize_regions(screen, [(left, top, width, height)], lang, psm)[0]
+        TestHelper._logger.log_hot_step("识别元素文本: %s -> %s", image_path, result.text)
+        return result.text
+    
+    @staticmethod
+    @traced("ocr_elements")
+    def get_elements_text(
+        image_paths: List[str],
+        confidence: float = 0.8,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        lang: Optional[str] = None,
+        psm: Optional[int] = None
+    ) -> Dict[str, Optional[str]]:
+        """在同一帧屏幕上定位多个元素并批量识别文本（不等待）
+        
+        Args:
+            image_paths: 元素图片路径列表
+            confidence: 匹配置信度
+            region: 搜索区域
+            lang: 识别语言
+            psm: 页面分割模式
+            
+        Returns:
+            Dict[str, Optional[str]]: 图片路径 -> 识别出的文本，未找到的元素为 None
+        """
+        screen = TestHelper._grab(region)
+        offset_x, offset_y = (region[0], region[1]) if region is not None else (0, 0)
+        texts: Dict[str, Optional[str]] = dict.fromkeys(image_paths)
+        found, boxes = [], []
+        for image_path in dict.fromkeys(image_paths):
+            box = TestHelper._match(image_path, confidence, region, screen=screen).box
+            if box is not None:
+                found.append(image_path)
+                boxes.append((box[0] - offset_x, box[1] - offset_y, box[2], box[3]))
+        for image_path, result in zip(found, OCREngine().recognize_regions(screen, boxes, lang, psm)):
+            texts[image_path] = result.text
+        TestHelper._logger.log_hot_step("批量识别元素文本: %d/%d", len(found), len(texts))
+        return texts
+    
+    @staticmethod
+    @traced("ocr_regions")
+    def get_region_texts(
+        regions: List[Tuple[int, int, int, int]],
+        lang: Optional[str] = None,
+        psm: Optional[int] = None
+    ) -> List[str]:
+        """采集一帧屏幕并批量识别多个区域的文本
+        
+        Args:
+            regions: 屏幕区域列表 (left, top, width, height)
+            lang: 识别语言
+            psm: 页面分割模式
+            
+        Returns:
+            List[str]: 与区域顺序一致的文本
+        """
+        screen = TestHelper._grab()
+        return [result.text for result in OCREngine().recognize_regions(screen, regions, lang, psm)]
+    
+    @staticmethod
+    @traced("wait_text")
+    def wait_for_text(
+        region: Tuple[int, int, int, int],
+        expected: Optional[str] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        changed_from: Optional[str] = None,
+        lang: Optional[str] = None,
+        psm: Optional[int] = None,
+        check_interval: float = 0.2
+    ) -> str:
+        """轮询屏幕区域直到文本满足条件
+        
+        识别结果按像素哈希缓存，区域像素未变化时轮询不会重复识别。
+        
+        Args:
+            region: 屏幕区域 (left, top, width, height)
+            expected: 期望包含的文本，None 表示不检查
+            timeout: 超时时间（秒）
+            changed_from: 文本不再等于该值时返回（用于等待状态文本变化），None 表示不检查
+            lang: 识别语言
+            psm: 页面分割模式
+            check_interval: 检查间隔
+            
+        Returns:
+            str: 满足条件时识别出的文本
+            
+        Raises:
+            TimeoutError: 超时前文本未满足条件
+        """
+        engine = OCREngine()
+        start_time = time.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            screen = TestHelper._grab(region)
+            text = engine.recognize(screen, lang, psm).text
+            TestHelper._logger.log_sampled("轮询等待文本: %s", text, iteration=attempt)
+            if (expected is None or expected in text) and (changed_from is None or text != changed_from):
+                return text
+            if time.time() - start_time >= timeout:
+                raise TimeoutError(f"等待文本 (期望: {expected}, 当前: {text})", timeout)
+            idle_sleep(check_interval, "TestHelper.wait_for_text")
+    
+    @staticmethod
+    def text_index() -> TextIndex:
+        """屏幕文字索引（所有按文字定位的方法共享，只重新识别变化了的分块）"""
+        if TestHelper._text_index is None:
+            TestHelper._text_index = TextIndex()
+        return TestHelper._text_index
+    
+    @staticmethod
+    @traced("locate_text")
+    def find_text(
+        text: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        exact: bool = False,
+        index: int = 0,
+        min_confidence: float = TEXT_MIN_CONFIDENCE
+    ) -> Tuple[int, int]:
+        """按文字查找元素
+        
+        每次轮询采集一帧屏幕，只重新识别与搜索区域相交且像素变化了的分块。
+        
+        Args:
+            text: 元素上的文字（忽略空白和大小写）
+            timeout: 超时时间（秒）
+            region: 搜索区域 (left, top, width, height)
+            exact: 是否要求匹配完整的词
+            index: 有多处匹配时使用第几处（按从上到下、从左到右排序）
+            min_confidence: 词的最低置信度
+            
+        Returns:
+            Tuple[int, int]: 文字中心位置 (x, y)
+            
+        Raises:
+            ElementNotFoundError: 超时前未找到文字
+        """
+        text_index = TestHelper.text_index()
+        locate_start = time.perf_counter()
+        start_time = time.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            TestHelper._logger.log_sampled("轮询查找文字: %s", text, iteration=attempt)
+            text_index.update(TestHelper._grab(), region)
+            matches = text_index.find(text, region, exact, min_confidence)
+            if len(matches) > index:
+                TestHelper._logger.log_hot_step("查找文字: %s", text)
+                TestHelper._metrics.increment("locate.text.found")
+                TestHelper._metrics.observe("locate.text.latency", time.perf_counter() - locate_start)
+                return matches[index].center
+            if time.time() - start_time >= timeout:
+                TestHelper._metrics.increment("locate.text.timeout")
+                raise ElementNotFoundError(f"文字: {text}", timeout)
+            idle_sleep(0.2, "TestHelper.find_text")
+    
+    @staticmethod
+    @traced("locate_text_batch")
+    def find_texts(
+        texts: List[str],
+        region: Optional[Tuple[int, int, int, int]] = None,
+        exact: bool = False,
+        min_confidence: float = TEXT_MIN_CONFIDENCE
+    ) -> Dict[str, List[TextMatch]]:
+        """在同一帧屏幕上查找多个文字（不等待，整帧最多识别一次）
+        
+        Args:
+            texts: 要查找的文字列表
+            region: 搜索区域
+            exact: 是否要求匹配完整的词
+            min_confidence: 词的最低置信度
+            
+        Returns:
+            Dict[str, List[TextMatch]]: 文字 -> 全部匹配，未找到的文字为空列表
+        """
+        text_index = TestHelper.text_index()
+        text_index.update(TestHelper._grab(), region)
+        return {text: text_index.find(text, region, exact, min_confidence) for text in texts}
+    
+    @staticmethod
+    @traced("click_text")
+    def click_text(
+        text: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        exact: bool = False,
+        index: int = 0,
+        clicks: int = 1,
+        interval: float = 0.25,
+        button: str = 'left'
+    ) -> bool:
+        """按文字点击元素
+        
+        Args:
+            text: 元素上的文字
+            timeout: 超时时间（秒）
+            region: 搜索区域
+            exact: 是否要求匹配完整的词
+            index: 有多处匹配时点击第几处
+            clicks: 点击次数
+            interval: 点击间隔
+            button: 鼠标按键 ('left', 'right', 'middle')
+            
+        Returns:
+            bool: 是否点击成功
+        """
+        try:
+            x, y = TestHelper.find_text(text, timeout, region, exact, index)
+            with span("input"):
+                InputDriver.click(x, y, clicks=clicks, interval=interval, button=button)
+            TestHelper._logger.log_hot_step("点击文字: %s", text)
+            TestHelper._metrics.increment("click.text.count")
+            return True
+        except Exception as e:
+            TestHelper._logger.log_test_error("点击文字", str(e), "点击失败")
+            raise
+    
+    @staticmethod
+    @traced("classify_state")
+    def current_state() -> StateMatch:
+        """采集一帧屏幕，按参考截图指纹识别当前界面状态（一次缩放和一次矩阵乘法，不做模板匹配）
+        
+        Returns:
+            StateMatch: 识别结果，未知状态时 state 为 None
+        """
+        match = ScreenStateIndex.default().classify(TestHelper._grab())
+        TestHelper._logger.log_hot_step("识别界面状态: %s (%.3f)", match.state, match.confidence)
+        return match
+    
+    @staticmethod
+    @traced("wait_progress")
+    def wait_for_progress(
+        image_path: str,
+        timeout: float = PROGRESS_TIMEOUT,
+        confidence: float = 0.7,
+        locate_timeout: float = DEFAULT_TIMEOUT,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        stall_timeout: float = PROGRESS_STALL_TIMEOUT,
+        on_progress: Optional[Callable[[ProgressSample], None]] = None,
+        fill_color: Optional[Tuple[int, int, int]] = None
+    ) -> ProgressResult:
+        """定位进度条后只采集进度条区域，等待进度完成或停滞
+        
+        模板匹配只在定位时执行，之后按进度条区域的像素列估计进度。
+        
+        Args:
+            image_path: 进度条模板图片路径
+            timeout: 等待进度完成的超时时间（秒）
+            confidence: 定位进度条的匹配置信度（进度不同时外观不同，默认低于普通元素）
+            locate_timeout: 等待进度条出现的超时时间（秒）
+            region: 定位进度条的搜索区域
+            stall_timeout: 进度超过该时间没有前进时视为停滞（秒）
+            on_progress: 进度回调，参数为 ProgressSample（进度、已用时间、速度、预计剩余时间）
+            fill_color: 已填充部分的颜色 (B, G, R)，None 表示自动识别
+            
+        Returns:
+            ProgressResult: 监视结果
+            
+        Raises:
+            ElementNotFoundError: 超时前未找到进度条
+            ImageMatchError: 进度条模板无法加载
+            TimeoutError: 超时前进度既未完成也未停滞
+        """
+        reference = TestHelper._require_template(image_path, locate_timeout)
+        start_time = time.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            TestHelper._logger.log_sampled("轮询查找进度条: %s", image_path, iteration=attempt)
+            box = TestHelper._match(image_path, confidence, region).box
+            if box is not None:
+                break
+            if time.time() - start_time >= locate_timeout:
+                raise ElementNotFoundError(image_path, locate_timeout)
+            idle_sleep(0.2, "TestHelper.wait_for_progress")
+        
+        TestHelper._logger.log_hot_step("监视进度条: %s %s", image_path, box)
+        monitor = ProgressMonitor(box, fill_color=fill_color, stall_timeout=stall_timeout,
+                                  reference=reference)
+        return monitor.wait(timeout, on_progress)
+    
     @staticmethod
     def drag_and_drop(
         source_image_path: str,
@@ -334,14 +990,16 @@ class TestHelper:
             target_y = target_location[1] + target_offset[1]
             
             # 执行拖放
-            pyautogui.moveTo(source_x, source_y)
-            pyautogui.mouseDown()
-            pyautogui.moveTo(target_x, target_y, duration=duration)
-            pyautogui.mouseUp()
-            
-            TestHelper._logger.log_step(
-                f"拖放操作: {source_image_path} -> {target_image_path}",
-                "成功"
+            with span("input"):
+                InputDriver.move_to(source_x, source_y)
+                InputDriver.mouse_down()
+                InputDriver.move_to(target_x, target_y, duration=duration)
+                InputDriver.mouse_up()
+            
+            TestHelper._logger.log_hot_step(
+                "拖放操作: %s -> %s",
+                source_image_path,
+                target_image_path
             )
             return True
         except Exception as e:
@@ -349,6 +1007,7 @@ class TestHelper:
             raise
     
     @staticmethod
+    @traced("type")
     def type_text(
         text: str,
         interval: float = 0.1,
@@ -362,15 +1021,17 @@ class TestHelper:
             press_enter: 是否按回车键
         """
         try:
-            pyautogui.write(text, interval=interval)
-            if press_enter:
-                pyautogui.press('enter')
-            TestHelper._logger.log_step(f"输入文本: {text}", "成功")
+            with span("input"):
+                InputDriver.write(text, interval=interval)
+                if press_enter:
+                    InputDriver.press('enter')
+            TestHelper._logger.log_hot_step("输入文本: %s", text)
         except Exception as e:
             TestHelper._logger.log_test_error("输入文本", str(e), "输入失败")
             raise
     
     @staticmethod
+    @traced("key")
     def press_key(
         key: str,
         presses: int = 1,
@@ -384,8 +1045,9 @@ class TestHelper:
             interval: 按键间隔
         """
         try:
-            pyautogui.press(key, presses=presses, interval=interval)
-            TestHelper._logger.log_step(f"按键操作: {key} x {presses}", "成功")
+            with span("input"):
+                InputDriver.press(key, presses=presses, interval=interval)
+            TestHelper._logger.log_hot_step("按键操作: %s x %s", key, presses)
         except Exception as e:
             TestHelper._logger.log_test_error("按键操作", str(e), "按键失败")
             raise
@@ -396,8 +1058,22 @@ class TestHelper:
         TestHelper._image_cache.clear()
         TestHelper._last_found_positions.clear()
         TestHelper._load_image.cache_clear()
+        TestHelper._load_scaled_image.cache_clear()
+    
+    @staticmethod
+    def register_template(image_path: str, image: np.ndarray) -> None:
+        """为模板路径登记图像（替代从磁盘读取，用于模拟器为占位模板生成替身图像）
+        
+        Args:
+            image_path: 模板路径
+            image: BGR 图像
+        """
+        TestHelper._image_cache[image_path] = image
+        TestHelper._load_image.cache_clear()
+        TestHelper._load_scaled_image.cache_clear()
 
     @staticmethod
+    @traced("double_click")
     def double_click_element(image_path, confidence=0.8, timeout=DEFAULT_TIMEOUT):
         """
         双击屏幕上的元素
@@ -409,8 +1085,9 @@ class TestHelper:
         try:
             location = TestHelper.find_element_on_screen(image_path, confidence, timeout)
             if location:
-                pyautogui.doubleClick(location)
-                TestHelper._logger.log_step(f"双击元素: {image_path}", "成功")
+                with span("input"):
+                    InputDriver.double_click(location[0], location[1])
+                TestHelper._logger.log_hot_step("双击元素: %s", image_path)
                 return True
             return False
         except Exception as e:
@@ -430,20 +1107,20 @@ class TestHelper:
             duration: 拖动持续时间
         """
         try:
-            location = pyautogui.locateOnScreen(image_path, confidence=0.8)
-            if location:
+            box = TestHelper._match(image_path, 0.8).box
+            if box:
                 # 计算相对于图片的坐标
-                rel_start_x = location.left + start_x
-                rel_start_y = location.top + start_y
-                rel_end_x = location.left + end_x
-                rel_end_y = location.top + end_y
+                rel_start_x = box[0] + start_x
+                rel_start_y = box[1] + start_y
+                rel_end_x = box[0] + end_x
+                rel_end_y = box[1] + end_y
                 
                 # 执行拖动
-                pyautogui.moveTo(rel_start_x, rel_start_y)
-                pyautogui.mouseDown()
-                pyautogui.moveTo(rel_end_x, rel_end_y, duration=duration)
-                pyautogui.mouseUp()
-                TestHelper._logger.log_step(f"拖动元素: {image_path}")
+                InputDriver.move_to(rel_start_x, rel_start_y)
+                InputDriver.mouse_down()
+                InputDriver.move_to(rel_end_x, rel_end_y, duration=duration)
+                InputDriver.mouse_up()
+                TestHelper._logger.log_hot_step("拖动元素: %s", image_path)
             else:
                 raise Exception(f"未找到元素: {image_path}")
         except Exception as e:
@@ -461,19 +1138,18 @@ class TestHelper:
             duration: 滚动持续时间
         """
         try:
-            location = pyautogui.locateOnScreen(image_path, confidence=0.8)
-            if location:
+            center = TestHelper._locate(image_path, 0.8)
+            if center:
                 # 计算滚动方向
                 if direction.lower() == 'up':
                     scroll_amount = -scroll_amount
                 
                 # 移动到元素中心
-                center = pyautogui.center(location)
-                pyautogui.moveTo(center)
+                InputDriver.move_to(center[0], center[1])
                 
                 # 执行滚动
-                pyautogui.scroll(scroll_amount)
-                TestHelper._logger.log_step(f"滚动元素: {image_path}, 方向: {direction}, 距离: {scroll_amount}")
+                InputDriver.scroll(scroll_amount)
+                TestHelper._logger.log_hot_step("滚动元素: %s, 方向: %s, 距离: %s", image_path, direction, scroll_amount)
             else:
                 raise Exception(f"未找到元素: {image_path}")
         except Exception as e:
@@ -492,12 +1168,11 @@ class TestHelper:
             bool: 是否匹配
         """
         try:
-            location = pyautogui.locateOnScreen(image_path, confidence=threshold)
-            matched = location is not None
+            matched = TestHelper._locate(image_path, threshold) is not None
             if matched:
-                TestHelper._logger.log_step(f"图片匹配: {image_path}", "成功")
+                TestHelper._logger.log_hot_step("图片匹配: %s", image_path)
             else:
-                TestHelper._logger.log_step(f"图片匹配: {image_path}", "未匹配")
+                TestHelper._logger.log_hot_step("图片匹配: %s", image_path, status="未匹配")
             return matched
         except Exception as e:
             TestHelper._logger.log_test_error("图片匹配", str(e), "匹配失败")
@@ -511,8 +1186,8 @@ class TestHelper:
             text: 要输入的文本
         """
         try:
-            pyautogui.write(text)
-            TestHelper._logger.log_step(f"输入文本: {text}")
+            InputDriver.write(text)
+            TestHelper._logger.log_hot_step("输入文本: %s", text)
         except Exception as e:
             TestHelper._logger.log_test_error("输入文本", str(e), "输入失败")
             raise
@@ -525,8 +1200,8 @@ class TestHelper:
             key: 按键名称
         """
         try:
-            pyautogui.keyDown(key)
-            TestHelper._logger.log_step(f"按下按键: {key}")
+            InputDriver.key_down(key)
+            TestHelper._logger.log_hot_step("按下按键: %s", key)
         except Exception as e:
             TestHelper._logger.log_test_error("按下按键", str(e), "按键失败")
             raise
@@ -539,8 +1214,8 @@ class TestHelper:
             key: 按键名称
         """
         try:
-            pyautogui.keyUp(key)
-            TestHelper._logger.log_step(f"释放按键: {key}")
+            InputDriver.key_up(key)
+            TestHelper._logger.log_hot_step("释放按键: %s", key)
         except Exception as e:
             TestHelper._logger.log_test_error("释放按键", str(e), "释放失败")
             raise
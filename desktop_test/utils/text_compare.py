@@ -0,0 +1,207 @@
+"""
+流式文本比较
+
+按块读取两侧文本并逐块比较，找到第一处差异即停止，内存占用与文本大小无关：
+    - 与 actual.strip() == expected.strip() 等价：忽略流开头和结尾的空白，
+      块末尾的空白会暂存到确认后面还有非空白内容时再参与比较
+    - 报告第一处差异的行号、列号、字符偏移和前后文
+    - 可选计算归一化相似度（字符频次重合度，即 difflib.SequenceMatcher.quick_ratio，
+      是 ratio 的上界），相同的前缀直接计入，只需继续读取差异之后的部分
+"""
+from collections import Counter
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from desktop_test.utils.config import TEXT_COMPARE_CHUNK, TEXT_DIFF_CONTEXT
+
+
+class TextDiff(NamedTuple):
+    """文本比较结果"""
+    equal: bool  # 文本是否相同
+    line: int = 0  # 第一处差异所在行（从 1 开始，行号和列号都在去掉开头空白后计算）
+    column: int = 0  # 第一处差异所在列（从 1 开始）
+    offset: int = 0  # 第一处差异的字符偏移（去掉开头空白后）
+    before: str = ""  # 差异之前两侧相同的文本
+    expected: str = ""  # 期望文本从差异处开始的片段
+    actual: str = ""  # 实际文本从差异处开始的片段
+    similarity: Optional[float] = None  # 归一化相似度（0~1），未计算时为 None
+
+    def describe(self) -> str:
+        """差异的文字描述"""
+        if self.equal:
+            return "文本相同"
+        lines = [
+            f"第 {self.line} 行第 {self.column} 列（偏移 {self.offset}）开始不同:",
+            f"  期望: {self.before!r} >>> {self.expected!r}",
+            f"  实际: {self.before!r} >>> {self.actual!r}",
+        ]
+        if self.similarity is not None:
+            lines.append(f"  相似度: {self.similarity:.4f}")
+        return "\n".join(lines)
+
+
+def iter_text(text: str, chunk_size: int = TEXT_COMPARE_CHUNK) -> Iterator[str]:
+    """按块切分字符串"""
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+
+def iter_text_file(file_path: str, chunk_size: int = TEXT_COMPARE_CHUNK, encoding: str = "utf-8") -> Iterator[str]:
+    """按块读取文本文件"""
+    with open(file_path, "r", encoding=encoding) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _stripped(chunks: Iterable[str]) -> Iterator[str]:
+    """去掉流开头和结尾的空白"""
+    started = False
+    pending = ""  # 块末尾的空白，后面还有非空白内容时才输出
+    for chunk in chunks:
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        body = chunk.rstrip()
+        if not body:
+            pending += chunk
+            continue
+        if pending:
+            yield pending
+        yield body
+        pending = chunk[len(body):]
+
+
+class _Side:
+    """一侧文本的读取缓冲"""
+
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = _stripped(chunks)
+        self.buffer = ""
+        self.done = False
+
+    def fill(self, size: int = 1) -> None:
+        """读取到缓冲区至少有 size 个字符或读完"""
+        while len(self.buffer) < size and not self.done:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.done = True
+            else:
+                self.buffer += chunk
+
+    def drain(self, counter: Optional[Counter]) -> int:
+        """读完剩余文本，返回剩余字符数（并统计字符频次）"""
+        total = 0
+        while True:
+            if self.buffer:
+                total += len(self.buffer)
+                if counter is not None:
+                    counter.update(self.buffer)
+                self.buffer = ""
+            if self.done:
+                return total
+            self.fill()
+
+
+def _mismatch(a: str, b: str) -> int:
+    """两个等长字符串第一处不同的下标（二分查找，比较在 C 中完成）"""
+    low, high = 0, len(a)
+    while low < high:
+        mid = (low + high) // 2
+        if a[low:mid + 1] == b[low:mid + 1]:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+def compare_text(
+    actual: Iterable[str],
+    expected: Iterable[str],
+    context: int = TEXT_DIFF_CONTEXT,
+    similarity: bool = False
+) -> TextDiff:
+    """流式比较两段文本（忽略开头和结尾的空白）
+
+    Args:
+        actual: 实际文本的块序列
+        expected: 期望文本的块序列
+        context: 差异前后显示的字符数
+        similarity: 存在差异时是否计算归一化相似度（需要读完两侧文本）
+
+    Returns:
+        TextDiff: 比较结果
+    """
+    actual_side, expected_side = _Side(actual), _Side(expected)
+    line, column, offset = 1, 1, 0
+    before = ""
+    while True:
+        actual_side.fill()
+        expected_side.fill()
+        a, e = actual_side.buffer, expected_side.buffer
+        size = min(len(a), len(e))
+        if size == 0:
+            if not a and not e:
+                return TextDiff(True, similarity=1.0 if similarity else None)
+            index = 0  # 一侧已经结束
+        elif a[:size] == e[:size]:
+            index = size
+        else:
+            index = _mismatch(a[:size], e[:size])
+
+        matched = a[:index]
+        if matched:
+            newlines = matched.count("\n")
+            if newlines:
+                line += newlines
+                column = len(matched) - matched.rfind("\n")
+            else:
+                column += len(matched)
+            offset += len(matched)
+            before = (before + matched)[-context:]
+            actual_side.buffer, expected_side.buffer = a[index:], e[index:]
+        if index == size and size > 0:
+            continue
+
+        # 找到第一处差异
+        actual_side.fill(context)
+        expected_side.fill(context)
+        diff = TextDiff(
+            False, line, column, offset, before,
+            expected_side.buffer[:context], actual_side.buffer[:context]
+        )
+        if not similarity:
+            return diff
+        actual_counts, expected_counts = Counter(), Counter()
+        actual_rest = actual_side.drain(actual_counts)
+        expected_rest = expected_side.drain(expected_counts)
+        total = 2 * offset + actual_rest + expected_rest
+        matches = offset + sum((actual_counts & expected_counts).values())
+        return diff._replace(similarity=2.0 * matches / total if total else 1.0)
+
+
+def compare_text_file(
+    file_path: str,
+    expected_text: str,
+    encoding: str = "utf-8",
+    similarity: bool = False
+) -> TextDiff:
+    """流式比较文本文件与期望文本"""
+    return compare_text(iter_text_file(file_path, encoding=encoding), iter_text(expected_text), similarity=similarity)
+
+
+def compare_text_files(
+    actual_path: str,
+    expected_path: str,
+    encoding: str = "utf-8",
+    similarity: bool = False
+) -> TextDiff:
+    """流式比较两个文本文件"""
+    return compare_text(
+        iter_text_file(actual_path, encoding=encoding),
+        iter_text_file(expected_path, encoding=encoding),
+        similarity=similarity
+    )
@@ -0,0 +1,290 @@
+"""
+文字定位
+
+按界面上的文字（"保存"、"开始识别"）定位元素，不需要为每个按钮维护模板图片：
+    - 一帧屏幕按 TEXT_TILE_SIZE 分块做版面识别，得到每个词的位置和置信度
+    - 词按位置合并成行，并登记到网格空间索引中，同一帧上的多次查询只查索引，不再识别
+    - 下一帧只重新识别像素哈希变化了的分块，其余分块沿用上次的词
+每个分块向四周扩展 TEXT_TILE_OVERLAP 像素后识别，只保留中心落在分块内的词，
+跨越分块边界的词不会被截断，也不会被重复登记。
+"""
+from __future__ import annotations
+
+import time
+import hashlib
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from desktop_test.utils.config import (
+    TEXT_TILE_SIZE,
+    TEXT_TILE_OVERLAP,
+    TEXT_INDEX_CELL,
+    TEXT_MIN_CONFIDENCE,
+    TEXT_LINE_GAP
+)
+from desktop_test.utils.metrics import MetricsRegistry
+from desktop_test.utils.ocr_engine import OCREngine, OCRWord, Region
+from desktop_test.utils.tracing import span
+
+
+class TextMatch(NamedTuple):
+    """一处文字匹配"""
+    text: str  # 匹配到的词（同一行内连续的词拼接而成）
+    box: Region  # 屏幕坐标 (left, top, width, height)
+    confidence: float  # 组成匹配的词中最低的置信度
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        """匹配框中心 (x, y)"""
+        left, top, width, height = self.box
+        return left + width // 2, top + height // 2
+
+
+def _normalize(text: str) -> str:
+    """去掉空白并忽略大小写（中文标签在版面识别中常被拆成单字）"""
+    return "".join(text.split()).casefold()
+
+
+def _join(words: Sequence[OCRWord]) -> str:
+    """拼接同一行的词，只在两个西文词之间加空格"""
+    text = ""
+    for word in words:
+        if text and text[-1].isascii() and text[-1].isalnum() and word.text[0].isascii() and word.text[0].isalnum():
+            text += " "
+        text += word.text
+    return text
+
+
+def _union(boxes: Sequence[Region]) -> Region:
+    """包含全部矩形的最小矩形"""
+    left = min(box[0] for box in boxes)
+    top = min(box[1] for box in boxes)
+    right = max(box[0] + box[2] for box in boxes)
+    bottom = max(box[1] + box[3] for box in boxes)
+    return left, top, right - left, bottom - top
+
+
+def _intersects(box: Region, region: Region) -> bool:
+    return (box[0] < region[0] + region[2] and region[0] < box[0] + box[2]
+            and box[1] < region[1] + region[3] and region[1] < box[1] + box[3])
+
+
+def _contains_point(region: Region, point: Tuple[int, int]) -> bool:
+    return region[0] <= point[0] < region[0] + region[2] and region[1] <= point[1] < region[1] + region[3]
+
+
+class _Tile:
+    """一个识别分块"""
+
+    __slots__ = ("core", "bounds", "digest", "words")
+
+    def __init__(self, core: Region, bounds: Region):
+        self.core = core  # 分块本身，中心落在其中的词属于该分块
+        self.bounds = bounds  # 向四周扩展后实际识别的区域
+        self.digest: Optional[bytes] = None  # 上次识别时扩展区域的像素哈希
+        self.words: List[OCRWord] = []  # 屏幕坐标的词
+
+
+class _Line:
+    """同一行内相邻的词（按从左到右的顺序）"""
+
+    __slots__ = ("words", "compact", "owners")
+
+    def __init__(self, words: List[OCRWord]):
+        self.words = words
+        # compact 为去掉空白后的整行文本，owners[i] 为第 i 个字符所属的词
+        parts = [_normalize(word.text) for word in words]
+        self.compact = "".join(parts)
+        self.owners = [index for index, part in enumerate(parts) for _ in part]
+
+
+class TextIndex:
+    """一帧屏幕的文字空间索引类"""
+
+    def __init__(
+        self,
+        tile_size: Tuple[int, int] = TEXT_TILE_SIZE,
+        overlap: int = TEXT_TILE_OVERLAP,
+        cell: int = TEXT_INDEX_CELL,
+        lang: Optional[str] = None,
+        psm: Optional[int] = None
+    ):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.cell = cell
+        self.lang = lang
+        self.psm = psm
+        self._lock = threading.RLock()
+        self._metrics = MetricsRegistry()
+        self._frame_size: Optional[Tuple[int, int]] = None
+        self._tiles: List[_Tile] = []
+        self._lines: List[_Line] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self.last_stats: Dict[str, int] = {}
+
+    def _layout(self, width: int, height: int) -> None:
+        """按帧尺寸划分分块（尺寸变化时之前的结果全部作废）"""
+        tile_width, tile_height = self.tile_size
+        self._tiles = []
+        for top in range(0, height, tile_height):
+            for left in range(0, width, tile_width):
+                core = (left, top, min(tile_width, width - left), min(tile_height, height - top))
+                bounds_left, bounds_top = max(0, left - self.overlap), max(0, top - self.overlap)
+                bounds_right = min(width, left + core[2] + self.overlap)
+                bounds_bottom = min(height, top + core[3] + self.overlap)
+                bounds = (bounds_left, bounds_top, bounds_right - bounds_left, bounds_bottom - bounds_top)
+                self._tiles.append(_Tile(core, bounds))
+        self._frame_size = (width, height)
+        self._rebuild()
+
+    def update(self, frame, region: Optional[Region] = None) -> int:
+        """用新的一帧屏幕更新索引
+
+        Args:
+            frame: 整个屏幕的一帧（BGR）
+            region: 只更新与该区域相交的分块，None 表示整帧
+
+        Returns:
+            int: 重新识别的分块数量
+        """
+        with self._lock:
+            height, width = frame.shape[:2]
+            if self._frame_size != (width, height):
+                self._layout(width, height)
+
+            changed: List[Tuple[_Tile, bytes]] = []
+            crops = []
+            checked = 0
+            for tile in self._tiles:
+                if region is not None and not _intersects(tile.core, region):
+                    continue
+                checked += 1
+                left, top, tile_width, tile_height = tile.bounds
+                crop = frame[top:top + tile_height, left:left + tile_width]
+                digest = hashlib.blake2b(crop.tobytes(), digest_size=16).digest()
+                if digest != tile.digest:
+                    changed.append((tile, digest))
+                    crops.append(crop)
+
+            if changed:
+                start = time.perf_counter()
+                with span("text_index", tiles=len(changed)):
+                    results = OCREngine().recognize_words(crops, self.lang, self.psm)
+                for (tile, digest), words in zip(changed, results):
+                    tile.digest = digest
+                    tile.words = []
+                    for word in words:
+                        left, top, word_width, word_height = word.box
+                        box = (left + tile.bounds[0], top + tile.bounds[1], word_width, word_height)
+                        if _contains_point(tile.core, (box[0] + word_width // 2, box[1] + word_height // 2)):
+                            tile.words.append(word._replace(box=box))
+                self._rebuild()
+                self._metrics.observe("text.index.update", time.perf_counter() - start)
+            self._metrics.increment("text.index.tiles", "recognized", len(changed))
+            self._metrics.increment("text.index.tiles", "reused", checked - len(changed))
+            self.last_stats = {"tiles": checked, "recognized": len(changed), "reused": checked - len(changed)}
+            return len(changed)
+
+    def _rebuild(self) -> None:
+        """把各分块的词合并成行，并重建网格索引"""
+        words = sorted((word for tile in self._tiles for word in tile.words), key=lambda word: word.box[0])
+        lines: List[List[OCRWord]] = []
+        for word in words:
+            left, top, _, height = word.box
+            middle = top + height / 2
+            for line in lines:
+                last = line[-1]
+                last_middle = last.box[1] + last.box[3] / 2
+                gap = left - (last.box[0] + last.box[2])
+                limit = max(height, last.box[3])
+                if abs(middle - last_middle) <= limit / 2 and -limit / 2 <= gap <= limit * TEXT_LINE_GAP:
+                    line.append(word)
+                    break
+            else:
+                lines.append([word])
+
+        self._lines = [_Line(line) for line in lines]
+        self._grid = {}
+        for line_id, line in enumerate(self._lines):
+            for key in self._cells(_union([word.box for word in line.words])):
+                self._grid.setdefault(key, []).append(line_id)
+
+    def _cells(self, box: Region):
+        """与矩形相交的网格"""
+        left, top, width, height = box
+        for cell_y in range(top // self.cell, (top + max(1, height) - 1) // self.cell + 1):
+            for cell_x in range(left // self.cell, (left + max(1, width) - 1) // self.cell + 1):
+                yield cell_x, cell_y
+
+    def _candidate_lines(self, region: Optional[Region]) -> List[_Line]:
+        if region is None:
+            return self._lines
+        ids = set()
+        for key in self._cells(region):
+            ids.update(self._grid.get(key, ()))
+        return [self._lines[line_id] for line_id in sorted(ids)]
+
+    def find(
+        self,
+        text: str,
+        region: Optional[Region] = None,
+        exact: bool = False,
+        min_confidence: float = TEXT_MIN_CONFIDENCE
+    ) -> List[TextMatch]:
+        """在索引中查找文字（不识别）
+
+        Args:
+            text: 要查找的文字（忽略空白和大小写）
+            region: 只返回中心落在该区域内的匹配，None 表示整帧
+            exact: True 时匹配必须由完整的词组成，False 时可以是词的一部分
+            min_confidence: 组成匹配的词的最低置信度
+
+        Returns:
+            List[TextMatch]: 按从上到下、从左到右排序的匹配
+        """
+        target = _normalize(text)
+        if not target:
+            return []
+        matches = []
+        with self._lock:
+            for line in self._candidate_lines(region):
+                start = line.compact.find(target)
+                while start >= 0:
+                    end = start + len(target) - 1
+                    first, last = line.owners[start], line.owners[end]
+                    if not exact or ((start == 0 or line.owners[start - 1] != first)
+                                     and (end == len(line.owners) - 1 or line.owners[end + 1] != last)):
+                        words = line.words[first:last + 1]
+                        confidence = min(word.confidence for word in words)
+                        match = TextMatch(_join(words),
+                                          _union([word.box for word in words]), confidence)
+                        if confidence >= min_confidence and (region is None or _contains_point(region, match.center)):
+                            matches.append(match)
+                    start = line.compact.find(target, start + 1)
+        matches.sort(key=lambda match: (match.box[1], match.box[0]))
+        return matches
+
+    def words(self, region: Optional[Region] = None) -> List[OCRWord]:
+        """区域内的词（按行排序）"""
+        with self._lock:
+            lines = sorted(self._candidate_lines(region), key=lambda line: (line.words[0].box[1], line.words[0].box[0]))
+            return [word for line in lines for word in line.words if region is None or _intersects(word.box, region)]
+
+    def read(self, region: Optional[Region] = None) -> str:
+        """区域内的文字，每行一行"""
+        with self._lock:
+            lines = sorted(self._candidate_lines(region), key=lambda line: (line.words[0].box[1], line.words[0].box[0]))
+            texts = []
+            for line in lines:
+                words = [word for word in line.words if region is None or _intersects(word.box, region)]
+                if words:
+                    texts.append(_join(words))
+            return "\n".join(texts)
+
+    def clear(self) -> None:
+        """清空索引，下次更新时重新识别全部分块"""
+        with self._lock:
+            self._frame_size = None
+            self._tiles = []
+            self._lines = []
+            self._grid = {}
@@ -0,0 +1,194 @@
+"""
+轻量级嵌套耗时追踪
+
+在 TestHelper、BasePage 的关键路径上记录嵌套的 span（采集、模板加载、匹配、
+轮询等待、输入、日志等），每个线程写入自己的环形缓冲区，并可导出为
+Chrome Trace Event 格式（可在 Perfetto 或 chrome://tracing 中查看）。
+追踪关闭时 span() 只做一次布尔判断并返回共享的空上下文。
+"""
+import os
+import json
+import time
+import functools
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from desktop_test.utils.config import TRACE_ENABLED, TRACE_BUFFER_SIZE
+
+
+class _NullSpan:
+    """追踪关闭时使用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args) -> None:
+        """追踪关闭时忽略附加参数"""
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """一次耗时记录"""
+
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: Optional[Dict[str, Any]]):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        Tracer._buffer().append((self.name, self.start, end - self.start, self.args))
+        return False
+
+    def set(self, **args) -> None:
+        """在 span 结束前补充参数（如匹配得分）"""
+        if self.args is None:
+            self.args = args
+        else:
+            self.args.update(args)
+
+
+class Tracer:
+    """追踪器：管理开关、各线程的环形缓冲区以及导出"""
+
+    enabled: bool = TRACE_ENABLED
+    buffer_size: int = TRACE_BUFFER_SIZE
+    _local = threading.local()
+    _buffers: Dict[int, "deque"] = {}
+    _thread_names: Dict[int, str] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def enable(cls, buffer_size: Optional[int] = None) -> None:
+        """开启追踪
+
+        Args:
+            buffer_size: 每个线程环形缓冲区的容量（span 数量）
+        """
+        if buffer_size:
+            cls.buffer_size = buffer_size
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        """关闭追踪"""
+        cls.enabled = False
+
+    @classmethod
+    def _buffer(cls) -> "deque":
+        """获取当前线程的环形缓冲区"""
+        buffer = getattr(cls._local, "buffer", None)
+        if buffer is None:
+            buffer = deque(maxlen=cls.buffer_size)
+            thread = threading.current_thread()
+            with cls._lock:
+                cls._buffers[thread.ident] = buffer
+                cls._thread_names[thread.ident] = thread.name
+            cls._local.buffer = buffer
+        return buffer
+
+    @classmethod
+    def clear(cls) -> None:
+        """清空所有线程的缓冲区"""
+        with cls._lock:
+            for buffer in cls._buffers.values():
+                buffer.clear()
+
+    @classmethod
+    def collect(cls) -> List[Dict[str, Any]]:
+        """收集缓冲区中的 span 并转换为 Chrome Trace 事件
+
+        Returns:
+            List[Dict[str, Any]]: Trace Event 列表（时间单位为微秒）
+        """
+        pid = os.getpid()
+        events = []
+        with cls._lock:
+            buffers = [(tid, list(buffer)) for tid, buffer in cls._buffers.items()]
+            names = dict(cls._thread_names)
+        for tid, spans in buffers:
+            if not spans:
+                continue
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                "args": {"name": names.get(tid, str(tid))}
+            })
+            for name, start, duration, args in spans:
+                event = {
+                    "name": name, "ph": "X", "pid": pid, "tid": tid,
+                    "ts": start / 1000.0, "dur": duration / 1000.0
+                }
+                if args:
+                    event["args"] = args
+                events.append(event)
+        return events
+
+    @classmethod
+    def export_chrome_trace(cls, filepath: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """导出为 Chrome Trace Event JSON 文件
+
+        Args:
+            filepath: 输出文件路径
+            metadata: 附加的元数据（如测试名称）
+
+        Returns:
+            str: 输出文件路径
+        """
+        trace = {
+            "traceEvents": cls.collect(),
+            "displayTimeUnit": "ms",
+            "otherData": metadata or {}
+        }
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False, default=str)
+        return filepath
+
+
+def span(name: str, **args):
+    """创建一个 span 上下文
+
+    Args:
+        name: span 名称
+        **args: 附加参数，会写入 Trace Event 的 args
+
+    Returns:
+        上下文管理器，追踪关闭时为共享的空上下文
+    """
+    if not Tracer.enabled:
+        return _NULL_SPAN
+    return _Span(name, args or None)
+
+
+def traced(name: Optional[str] = None):
+    """为函数整体记录 span 的装饰器
+
+    Args:
+        name: span 名称，默认使用函数的限定名
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not Tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(label, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator